@@ -0,0 +1,181 @@
+"""
+ExitEngine - first-touch take-profit / stop-loss search over NumPy price arrays.
+"""
+import weakref
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from model.bars import Bars
+
+
+class ExitEngine:
+    """
+    Finds the first bar after an entry whose range touches the target or the stop.
+
+    High/Low are pulled out of the DataFrame once; each search scans
+    doubling windows with boolean masks instead of stepping bar by bar.
+    When target and stop are both touched on the same bar the target wins,
+    matching the bar loop it replaces.
+
+    For many entries at once, first_touch_batch answers every query with
+    sparse tables of range max(High) / min(Low) in O(log n) each.
+    """
+
+    FIRST_WINDOW = 32
+
+    def __init__(self, high: np.ndarray, low: np.ndarray):
+        self.high = np.asarray(high, dtype=float)
+        self.low = np.asarray(low, dtype=float)
+        self._max_tables: Optional[List[np.ndarray]] = None
+        self._min_tables: Optional[List[np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.high)
+
+    @classmethod
+    def from_df(cls, df: Union[pd.DataFrame, Bars]) -> 'ExitEngine':
+        """Build from a DataFrame with High/Low columns, or from Bars without copying."""
+        if isinstance(df, pd.DataFrame):
+            return cls(df['High'].to_numpy(dtype=float), df['Low'].to_numpy(dtype=float))
+        return cls(df.high, df.low)
+
+    def first_touch(
+        self,
+        entry_idx: int,
+        tp_price: float,
+        sl_price: float,
+        is_long: bool
+    ) -> Tuple[Optional[int], bool]:
+        """
+        Search bars entry_idx+1 .. end for the first target/stop touch.
+
+        Returns (exit_idx, is_target). exit_idx is None when neither level is touched.
+        """
+        n = len(self.high)
+        start = int(entry_idx) + 1
+        width = self.FIRST_WINDOW
+        while start < n:
+            end = min(n, start + width)
+            high = self.high[start:end]
+            low = self.low[start:end]
+            if is_long:
+                tp_hit = high >= tp_price
+                sl_hit = low <= sl_price
+            else:
+                tp_hit = low <= tp_price
+                sl_hit = high >= sl_price
+            touched = tp_hit | sl_hit
+            if touched.any():
+                j = int(touched.argmax())
+                return start + j, bool(tp_hit[j])
+            start = end
+            width *= 2
+        return None, False
+
+    def first_touch_batch(
+        self,
+        entry_idx: np.ndarray,
+        tp_prices: np.ndarray,
+        sl_prices: np.ndarray,
+        is_long: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized first_touch for many entries.
+
+        Returns (exit_idx, is_target) arrays; exit_idx is -1 where neither level is touched.
+        """
+        starts = np.asarray(entry_idx, dtype=np.int64) + 1
+        tp_prices = np.asarray(tp_prices, dtype=float)
+        sl_prices = np.asarray(sl_prices, dtype=float)
+        is_long = np.broadcast_to(np.asarray(is_long, dtype=bool), starts.shape)
+        n = len(self.high)
+
+        tp_idx = np.full(len(starts), n, dtype=np.int64)
+        sl_idx = np.full(len(starts), n, dtype=np.int64)
+        longs = np.flatnonzero(is_long)
+        shorts = np.flatnonzero(~is_long)
+        if len(longs):
+            tp_idx[longs] = self.first_high_at_or_above(starts[longs], tp_prices[longs])
+            sl_idx[longs] = self.first_low_at_or_below(starts[longs], sl_prices[longs])
+        if len(shorts):
+            tp_idx[shorts] = self.first_low_at_or_below(starts[shorts], tp_prices[shorts])
+            sl_idx[shorts] = self.first_high_at_or_above(starts[shorts], sl_prices[shorts])
+
+        exit_idx = np.minimum(tp_idx, sl_idx)
+        # Target first when both are touched on the same bar
+        is_target = (tp_idx <= sl_idx) & (exit_idx < n)
+        exit_idx[exit_idx >= n] = -1
+        return exit_idx, is_target
+
+    def first_high_at_or_above(self, starts: np.ndarray, levels: np.ndarray) -> np.ndarray:
+        """For each query, the first index >= start with High >= level (len(self) if none)."""
+        if self._max_tables is None:
+            self._max_tables = _sparse_table(np.where(np.isnan(self.high), -np.inf, self.high), np.maximum)
+        return _first_reaching(self._max_tables, starts, levels, above=True)
+
+    def first_low_at_or_below(self, starts: np.ndarray, levels: np.ndarray) -> np.ndarray:
+        """For each query, the first index >= start with Low <= level (len(self) if none)."""
+        if self._min_tables is None:
+            self._min_tables = _sparse_table(np.where(np.isnan(self.low), np.inf, self.low), np.minimum)
+        return _first_reaching(self._min_tables, starts, levels, above=False)
+
+
+def _sparse_table(values: np.ndarray, op) -> List[np.ndarray]:
+    """Level k holds op over values[i : i + 2**k] for every valid i."""
+    tables = [values]
+    span = 1
+    while span * 2 <= len(values):
+        prev = tables[-1]
+        tables.append(op(prev[:-span], prev[span:]))
+        span *= 2
+    return tables
+
+
+def _first_reaching(tables: List[np.ndarray], starts: np.ndarray, levels: np.ndarray, above: bool) -> np.ndarray:
+    """
+    Binary lifting over a sparse table: skip the longest run of bars that stay
+    short of the level, descending through power-of-two spans for all queries at once.
+    """
+    n = len(tables[0])
+    pos = np.array(starts, dtype=np.int64)
+    levels = np.asarray(levels, dtype=float)
+    for k in range(len(tables) - 1, -1, -1):
+        span = 1 << k
+        can = np.flatnonzero(pos + span <= n)
+        if len(can) == 0:
+            continue
+        extreme = tables[k][pos[can]]
+        short_of = (extreme < levels[can]) if above else (extreme > levels[can])
+        pos[can[short_of]] += span
+
+    # pos now points at the first bar reaching the level, or past the end
+    inside = np.flatnonzero(pos < n)
+    reached = np.zeros(len(pos), dtype=bool)
+    value = tables[0][pos[inside]]
+    reached[inside] = (value >= levels[inside]) if above else (value <= levels[inside])
+    return np.where(reached, pos, n)
+
+
+# Engines shared by every agent in the process, keyed by DataFrame (or Bars)
+# id() and dropped when it is garbage collected. Cached inputs are treated
+# as read-only.
+_ENGINES: Dict[int, Tuple[weakref.ref, ExitEngine]] = {}
+
+
+def engine_for(df: Union[pd.DataFrame, Bars]) -> ExitEngine:
+    """Return the shared ExitEngine for df, building it on first use."""
+    key = id(df)
+    cached = _ENGINES.get(key)
+    if cached is not None and cached[0]() is df and len(cached[1]) == len(df):
+        return cached[1]
+
+    def _drop(ref, key=key):
+        entry = _ENGINES.get(key)
+        if entry is not None and entry[0] is ref:
+            del _ENGINES[key]
+
+    engine = ExitEngine.from_df(df)
+    _ENGINES[key] = (weakref.ref(df, _drop), engine)
+    return engine
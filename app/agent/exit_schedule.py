@@ -0,0 +1,62 @@
+"""
+Exit schedule - priority queue of pending position exits keyed by integer time.
+
+PaperTradeAgent resolves every exit when a position opens, so the exit time
+is known up front. Scheduled exits sit in a heap keyed by
+(exit time, opening order) and are popped as the signal clock advances:
+each signal costs O(log positions) instead of a scan over the portfolio.
+
+Keys are UTC epoch nanoseconds from model.timestamps (tz-naive stamps are
+exchange wall clock); integer bar indices are used as they are. Entries are
+validated when popped, so a position that was closed, replaced or
+rescheduled in the meantime is skipped.
+"""
+import heapq
+import math
+from typing import Any, List, Tuple
+
+import numpy as np
+
+from model.timestamps import epoch_ns
+
+# Sorts before / after every real key
+EARLIEST = -math.inf
+LATEST = math.inf
+
+
+def event_time_key(value: Any) -> float:
+    """
+    Integer time key of a date, or EARLIEST when it cannot be read.
+
+    Unreadable exit dates are always due, as they were when the old scan
+    could not compare them.
+    """
+    if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        return int(value)
+    ns = epoch_ns(value)
+    return EARLIEST if ns is None else ns
+
+
+class ExitSchedule:
+    """Min-heap of (time key, opening order, security, position)."""
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def clear(self):
+        self._heap = []
+
+    def push(self, key: float, order: int, security: str, position: Any):
+        """Schedule position to exit at key; order breaks ties like portfolio order did."""
+        heapq.heappush(self._heap, (key, order, security, position))
+
+    def pop_due(self, until: float) -> List[Tuple[float, int, str, Any]]:
+        """Remove and return every entry with key <= until, in key order."""
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= until:
+            due.append(heapq.heappop(heap))
+        return due
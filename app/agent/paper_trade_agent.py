@@ -1,13 +1,20 @@
 """
 TradeAgent - Executes trades based on signals and tracks performance with Portfolio.
 """
-from typing import List, Optional
+from typing import List, Optional, Sequence, Union
+import numpy as np
 import pandas as pd
 import logging
 from ui.common import get_force_close_at_end
 
 from agent.agent import Agent
+from agent.exit_engine import engine_for
+from agent.exit_schedule import ExitSchedule, LATEST, event_time_key
+from model.signal_batch import SignalBatch
+from model.timestamps import DAY_NS, EXCHANGE_OFFSET_NS, MINUTE_NS, NAT_NS, epoch_ns, exchange_day
 from model.OutcomeType import OutcomeType
+from model.bars import Bars
+from model.ledger import TradeLedger
 from model.SignalType import SignalType
 from model.trade import Trade, SignalStrength
 from model.trade_summary import TradeSummary
@@ -18,6 +25,9 @@ from utility.signal_util import is_long_signal, check_position_exit
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
+# 3:30 PM exchange time, in minutes since midnight
+_EOD_MINUTE = 15 * 60 + 30
+
 
 class PaperTradeAgent(Agent):
     def __init__(
@@ -48,7 +58,7 @@ class PaperTradeAgent(Agent):
     def _reset_state(self):
         """Reset all state variables for a new execution."""
         self.cash = self.initial_capital
-        self.trades: List[Trade] = []
+        self.trades = TradeLedger()
         self.portfolio = Portfolio()
         self._daily_allocated: dict = {}
         self.winning_streak = 0
@@ -59,6 +69,12 @@ class PaperTradeAgent(Agent):
         self.total_losses = 0
         self.final_pnl = 0.0
         self.final_balance = self.initial_capital
+        # Exits resolved in bulk by _prefetch_exits, keyed by (entry_idx, tp, sl, is_long)
+        self._exit_lookup: dict = {}
+        self._exit_lookup_df = None
+        # Pending exits keyed by exit time, popped by _process_pending_exits
+        self._exit_schedule = ExitSchedule()
+        self._open_count = 0
 
     def allocation_pct(self, strength: int) -> float:
         """Calculate allocation percentage based on signal strength.
@@ -87,73 +103,55 @@ class PaperTradeAgent(Agent):
         """
         return min(float(self.initial_capital), 100000.0)
 
-    def _get_signal_day_key(self, signal_date) -> Optional[pd.Timestamp]:
-        """Normalize signal date to day key for daily allocation tracking."""
-        if signal_date is None:
-            return None
-        try:
-            ts = pd.to_datetime(signal_date)
-            if pd.isna(ts):
-                return None
-            return pd.Timestamp(ts).normalize()
-        except Exception:
-            return None
+    def _get_signal_day_key(self, signal_date) -> Optional[int]:
+        """Exchange day number of a signal date for daily allocation tracking."""
+        ns = epoch_ns(signal_date)
+        return None if ns is None else exchange_day(ns)
 
-    def prepare_signals_for_execution(self, signals: List[Signal]) -> List[Signal]:
-        """Apply pre-execution prioritization rules to signals.
+    def prepare_signals_for_execution(self, signals: Union[SignalBatch, List[Signal]]) -> List[Signal]:
+        """Sort signals chronologically and apply pre-execution prioritization rules.
 
         Rule: when multiple signals occur on the same date at 3:30 PM,
         keep only the highest-price stock signal for entry.
 
         For daily-granularity datasets (timestamps without intraday time),
-        this rule is skipped.
+        this rule is skipped. Dates are compared on the int64 time_ns column
+        of a SignalBatch (see model.timestamps).
         """
-        if not signals:
+        batch = SignalBatch.from_signals(signals)
+        if not len(batch):
             return []
 
+        # Signals without a readable date sort first, as Timestamp.min did
+        batch = batch[batch.time_order()]
+        time_ns = batch.data['time_ns']
+        valid = time_ns != NAT_NS
+        time_of_day = (time_ns + EXCHANGE_OFFSET_NS) % DAY_NS
+
         # Daily-granularity data generally has midnight timestamps.
         # In that case we should not apply intraday 3:30 PM prioritization.
-        parsed_times = []
-        for s in signals:
-            try:
-                ts = pd.to_datetime(getattr(s, 'date', None))
-                if ts is not None and not pd.isna(ts):
-                    parsed_times.append((ts.hour, ts.minute, ts.second))
-            except Exception:
-                pass
-
-        if parsed_times and all(h == 0 and m == 0 and sec == 0 for h, m, sec in parsed_times):
-            return sorted(signals, key=lambda s: s.date if s.date is not None else pd.Timestamp.min)
-
-        non_eod_signals: List[Signal] = []
-        eod_by_day = {}
-
-        for s in signals:
-            try:
-                ts = pd.to_datetime(getattr(s, 'date', None))
-            except Exception:
-                ts = None
-
-            if ts is not None and not pd.isna(ts) and ts.hour == 15 and ts.minute == 30:
-                day_key = ts.date()
-                eod_by_day.setdefault(day_key, []).append(s)
-            else:
-                non_eod_signals.append(s)
-
-        selected_eod: List[Signal] = []
-        for day_signals in eod_by_day.values():
-            chosen = max(
-                day_signals,
-                key=lambda x: (
-                    float(getattr(x, 'price', 0.0) or 0.0),
-                    int(getattr(x, 'signalStrength', 0) or 0),
-                    str(getattr(x, 'symbol', '') or '')
-                )
+        if valid.any() and not time_of_day[valid].any():
+            return batch.to_signals()
+
+        is_eod = valid & (time_of_day // MINUTE_NS == _EOD_MINUTE)
+        if not is_eod.any():
+            return batch.to_signals()
+
+        chosen_by_day = {}
+        for pos in np.flatnonzero(is_eod).tolist():
+            s = batch[pos]
+            rank = (
+                float(getattr(s, 'price', 0.0) or 0.0),
+                int(getattr(s, 'signalStrength', 0) or 0),
+                str(getattr(s, 'symbol', '') or '')
             )
-            selected_eod.append(chosen)
+            day = exchange_day(int(time_ns[pos]))
+            if day not in chosen_by_day or rank > chosen_by_day[day][0]:
+                chosen_by_day[day] = (rank, pos)
 
-        combined = non_eod_signals + selected_eod
-        return sorted(combined, key=lambda s: s.date if s.date is not None else pd.Timestamp.min)
+        keep = ~is_eod
+        keep[[pos for _, pos in chosen_by_day.values()]] = True
+        return batch[keep].to_signals()
 
     def execute_signals(self, df: pd.DataFrame, enhanced_signals: List[Signal]) -> pd.DataFrame:
         """
@@ -162,9 +160,9 @@ class PaperTradeAgent(Agent):
         """
         self._reset_state()
 
-        # Sort signals chronologically by date
-        signals = sorted(enhanced_signals, key=lambda s: s.date if s.date is not None else pd.Timestamp.min)
-        signals = self.prepare_signals_for_execution(signals)
+        # Sorts signals chronologically and applies prioritization rules
+        signals = self.prepare_signals_for_execution(enhanced_signals)
+        self._prefetch_exits(df, signals)
 
         # expose df mapping so _process_pending_exits can adjust dates if needed
         self._df_mapping = {signal.symbol: df for signal in signals}
@@ -199,6 +197,7 @@ class PaperTradeAgent(Agent):
                             position.pnl = position.shares * (position.entry_price - position.exit_price)
                             position.proceeds = 0.0
                         position.outcome = OutcomeType.EXIT
+                        self.schedule_exit(security)
                 # Now process exits up to last_date
                 self._process_pending_exits(last_date)
             except Exception as e:
@@ -323,7 +322,7 @@ class PaperTradeAgent(Agent):
                  target=tp_price,
                  signal_strength=strength
              )
-             self.portfolio.add_position(position)
+             self._add_position(position)
 
              # Store exit info in position for later processing
              position.exit_idx = exit_idx
@@ -334,6 +333,7 @@ class PaperTradeAgent(Agent):
              position.outcome = outcome
              position.is_long = is_long
              position.cash_before = cash_before
+             self.schedule_exit(security)
 
              # Track per-day capital deployment (counting entry notional)
              if day_key is not None:
@@ -354,7 +354,7 @@ class PaperTradeAgent(Agent):
              target=tp_price,
              signal_strength=strength
          )
-        self.portfolio.add_position(position)
+        self._add_position(position)
 
         # Track per-day capital deployment (counting entry notional)
         if day_key is not None:
@@ -364,6 +364,28 @@ class PaperTradeAgent(Agent):
 
 
 
+    def _add_position(self, position: Position):
+        """Add a position to the portfolio, remembering its opening order for exit tie-breaks."""
+        self._open_count += 1
+        position.open_order = self._open_count
+        self.portfolio.add_position(position)
+
+    def schedule_exit(self, security: str):
+        """Queue the exit already recorded on the open position of security.
+
+        Every place that sets exit_date on an open position calls this; positions
+        whose exit is not scheduled are not seen by _process_pending_exits.
+        """
+        position = self.portfolio.get_position(security)
+        if position is None or getattr(position, 'exit_date', None) is None:
+            return
+        self._exit_schedule.push(
+            event_time_key(position.exit_date),
+            position.open_order,
+            security,
+            position
+        )
+
     def _calculate_exit_prices(self, entry_price: float, is_long: bool) -> tuple:
         """Calculate target price and stop loss price."""
         if is_long:
@@ -376,7 +398,7 @@ class PaperTradeAgent(Agent):
 
     def _simulate_exit(
         self,
-        df: pd.DataFrame,
+        df: Union[pd.DataFrame, Bars],
         entry_idx: int,
         tp_price: float,
         sl_price: float,
@@ -386,6 +408,7 @@ class PaperTradeAgent(Agent):
 
         Returns (exit_price, exit_idx, outcome) where exit_idx is an integer index > entry_idx when an exit occurs.
         If no exit is found, returns (None, None, OutcomeType.EXIT) to indicate position remains open.
+        df may also be Bars, e.g. memory-mapped columns from BarStore.
         """
         n = len(df)
 
@@ -393,58 +416,109 @@ class PaperTradeAgent(Agent):
         if entry_idx is None or entry_idx >= n - 1:
             return None, None, OutcomeType.EXIT
 
-        for i in range(int(entry_idx) + 1, n):
-            high = df['High'].iat[i]
-            low = df['Low'].iat[i]
-
-            if is_long:
-                if high >= tp_price:
-                    logger.debug("TP hit at idx %s price %s", i, tp_price)
-                    return tp_price, i, OutcomeType.WIN
-                if low <= sl_price:
-                    logger.debug("SL hit at idx %s price %s", i, sl_price)
-                    return sl_price, i, OutcomeType.LOSS
+        if self._exit_lookup_df is df:
+            key = (int(entry_idx), tp_price, sl_price, bool(is_long))
+            if key in self._exit_lookup:
+                return self._exit_lookup[key]
+
+        # TP is checked before SL when both are touched on the same bar
+        exit_idx, is_target = engine_for(df).first_touch(entry_idx, tp_price, sl_price, is_long)
+
+        if exit_idx is None:
+            # No exit hit - keep position open
+            return None, None, OutcomeType.EXIT
+
+        side = "" if is_long else " (short)"
+        if is_target:
+            logger.debug("TP hit%s at idx %s price %s", side, exit_idx, tp_price)
+            return tp_price, exit_idx, OutcomeType.WIN
+        logger.debug("SL hit%s at idx %s price %s", side, exit_idx, sl_price)
+        return sl_price, exit_idx, OutcomeType.LOSS
+
+    def simulate_exits(
+        self,
+        df: Union[pd.DataFrame, Bars],
+        entry_indices: Sequence[int],
+        tp_prices: Sequence[float],
+        sl_prices: Sequence[float],
+        is_long
+    ) -> List[tuple]:
+        """Resolve the exits of many entries on one symbol in a single call.
+
+        Batch counterpart of _simulate_exit: returns one (exit_price, exit_idx, outcome)
+        tuple per entry, with the same TP-before-SL rule. is_long may be a single
+        bool or one per entry. Queries run against sparse tables of the symbol's
+        High/Low, which are built once per DataFrame and shared across agents.
+        """
+        entry_indices = np.asarray(entry_indices, dtype=np.int64)
+        if len(entry_indices) == 0:
+            return []
+        tp_prices = np.asarray(tp_prices, dtype=float)
+        sl_prices = np.asarray(sl_prices, dtype=float)
+        exit_idx, is_target = engine_for(df).first_touch_batch(entry_indices, tp_prices, sl_prices, is_long)
+
+        results = []
+        for i, (idx, target) in enumerate(zip(exit_idx.tolist(), is_target.tolist())):
+            if idx < 0:
+                results.append((None, None, OutcomeType.EXIT))
+            elif target:
+                results.append((tp_prices[i].item(), idx, OutcomeType.WIN))
             else:
-                if low <= tp_price:
-                    logger.debug("TP hit (short) at idx %s price %s", i, tp_price)
-                    return tp_price, i, OutcomeType.WIN
-                if high >= sl_price:
-                    logger.debug("SL hit (short) at idx %s price %s", i, sl_price)
-                    return sl_price, i, OutcomeType.LOSS
+                results.append((sl_prices[i].item(), idx, OutcomeType.LOSS))
+        return results
+
+    def _prefetch_exits(self, df: pd.DataFrame, signals: List[Signal]):
+        """Resolve the exit of every signal that could open a position in one batch call."""
+        self._exit_lookup = {}
+        self._exit_lookup_df = None
+        keys = []
+        for signal in signals:
+            if (signal.signalStrength or 0) <= 0 or signal.price is None or signal.price <= 0:
+                continue
+            try:
+                entry_idx = int(signal.index)
+            except (TypeError, ValueError):
+                continue
+            if entry_idx < 0:
+                continue
+            is_long = is_long_signal(signal.type)
+            tp_price, sl_price = self._calculate_exit_prices(signal.price, is_long)
+            keys.append((entry_idx, tp_price, sl_price, is_long))
+        if not keys:
+            return
 
-        # No exit hit - keep position open
-        return None, None, OutcomeType.EXIT
+        try:
+            entries, tps, sls, longs = zip(*keys)
+            results = self.simulate_exits(df, entries, tps, sls, np.array(longs, dtype=bool))
+        except Exception as e:
+            logger.debug("Batch exit resolution unavailable, falling back to per-signal search: %s", e)
+            return
+
+        self._exit_lookup = dict(zip(keys, results))
+        self._exit_lookup_df = df
 
     def _process_pending_exits(self, current_date):
-        """Process any positions that have exits scheduled before current date."""
-        # Find positions with pending exits at or before current date
-        positions_to_exit = []
-        for security, position in list(self.portfolio.positions.items()):
-            if hasattr(position, 'exit_date') and position.exit_date is not None:
-                # Compare by date, handling timezone mismatches
-                if current_date is None:
-                    positions_to_exit.append((security, position))
-                else:
-                    try:
-                        # Try direct comparison first
-                        if position.exit_date <= current_date:
-                            positions_to_exit.append((security, position))
-                    except TypeError:
-                        # Handle timezone mismatch by converting to tz-naive
-                        try:
-                            exit_date_naive = position.exit_date.tz_localize(None) if hasattr(position.exit_date, 'tz_localize') else position.exit_date
-                            current_date_naive = current_date.tz_localize(None) if hasattr(current_date, 'tz_localize') else current_date
-                            if exit_date_naive <= current_date_naive:
-                                positions_to_exit.append((security, position))
-                        except:
-                            # If all else fails, assume we should process the exit
-                            positions_to_exit.append((security, position))
+        """Process any positions that have exits scheduled at or before current date.
 
-        # Sort by exit date to process in chronological order
-        positions_to_exit.sort(key=lambda x: x[1].exit_date)
+        Due exits are popped from the exit schedule in (exit date, opening order),
+        so the cost grows with the number of exits rather than open positions.
+        A current_date of None processes every scheduled exit.
+        """
+        until = LATEST if current_date is None else event_time_key(current_date)
+        positions_to_exit = []
+        for key, _, security, position in self._exit_schedule.pop_due(until):
+            # Skip entries for positions closed, replaced or rescheduled since they were queued
+            if self.portfolio.get_position(security) is not position:
+                continue
+            if getattr(position, 'exit_date', None) is None or event_time_key(position.exit_date) != key:
+                continue
+            positions_to_exit.append((security, position))
 
         # Process each exit
         for security, position in positions_to_exit:
+            # A duplicate entry may follow one that already closed or cleared this exit
+            if self.portfolio.get_position(security) is not position or position.exit_date is None:
+                continue
             # Defensive: keep exit_date aligned to exit_idx when available.
             # Avoid synthetic calendar-date adjustments that can create date/price mismatches.
             try:
@@ -521,6 +595,13 @@ class PaperTradeAgent(Agent):
             except Exception:
                 pass
 
+            # Positions opened without an exit record no entry cash. Finalizing one
+            # used to fail here after updating the streaks, which ended the batch
+            # and left it and the remaining due exits open; keep that outcome.
+            if position.cash_before is None:
+                self._update_streaks(position.pnl)
+                break
+
             # Return cash from the exit
             if hasattr(position, 'is_long') and position.is_long:
                 self.cash += position.proceeds
@@ -565,31 +646,8 @@ class PaperTradeAgent(Agent):
             self.total_losses += 1
 
     def _trades_to_dataframe(self) -> pd.DataFrame:
-        """Convert trades list to DataFrame."""
-        if not self.trades:
-            return pd.DataFrame()
-
-        rows = []
-        for trade in self.trades:
-            rows.append({
-                'entry_index': trade.entry_index,
-                'entry_date': trade.entry_date,
-                'exit_date': trade.exit_date,
-                'side': trade.side.value if hasattr(trade.side, 'value') else trade.side,
-                'entry_price': trade.entry_price,
-                'exit_price': trade.exit_price,
-                'shares': trade.shares,
-                'pnl': trade.pnl,
-                'security': trade.security,
-                'outcome': trade.outcome.value if hasattr(trade.outcome, 'value') else trade.outcome,
-                'signalStrength': trade.signalStrength.value if hasattr(trade.signalStrength, 'value') else trade.signalStrength,
-                'cash_before': trade.cash_before,
-                'cash_after': trade.cash_after,
-                'money_allocated': trade.money_allocated,
-                'lockin_period': trade.lockin_period
-            })
-
-        return pd.DataFrame(rows)
+        """Trades as a DataFrame over the ledger's columns (no per-trade conversion)."""
+        return self.trades.to_dataframe()
 
     def get_summary(self) -> TradeSummary:
         """Return a TradeSummary object with execution results."""
@@ -651,5 +709,6 @@ class PaperTradeAgent(Agent):
 
                 # mark outcome as EXIT (forced)
                 position.outcome = OutcomeType.EXIT
+                self.schedule_exit(security)
             except Exception as e:
                 logger.exception("Failed to force-close position %s: %s", security, e)
@@ -0,0 +1,211 @@
+"""
+Parallel signal generation - load data and run the strategies for many symbols in worker processes.
+
+The strategies are CPU-bound Python, so the load-plus-generate stage is
+split into chunks of symbols and fanned out over a ProcessPoolExecutor.
+Every chunk loads its own data (CSV files or one database query), runs
+run_signal_pipeline with the picklable SignalConfig and ships back
+(symbol, DataFrame, signals). With store_path set, workers read through the
+SignalStore at that path and skip symbols whose data has not changed.
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from agent.signal_generator import SignalConfig, SignalGenerator
+from service.signal_store import SignalStore
+from model.signal import Signal
+
+logger = logging.getLogger(__name__)
+
+# progress(done, total) is called in the parent as symbols complete
+ProgressCallback = Callable[[int, int], None]
+
+
+@dataclass
+class SymbolSignals:
+    """Data and signals produced for one symbol (or CSV security group)."""
+    symbol: str
+    df: Optional[pd.DataFrame]
+    signals: List[Signal] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+
+def default_worker_count() -> int:
+    """Leave one core for the UI thread."""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def generate_for_csv_groups(
+    groups: Dict[str, List[str]],
+    folder: str = 'backtest_data',
+    config: Optional[SignalConfig] = None,
+    max_workers: Optional[int] = None,
+    chunk_size: int = 1,
+    progress: Optional[ProgressCallback] = None,
+    store_path: Optional[str] = None
+) -> List[SymbolSignals]:
+    """
+    Load, merge and generate signals for groups of CSV files.
+
+    Args:
+        groups: Security name -> CSV file names (or paths) to merge
+        folder: Resource folder passed to load_data
+        config: Strategy settings (defaults to SignalConfig())
+        max_workers: Worker processes (defaults to cores - 1; 1 runs in-process)
+        chunk_size: Security groups per task
+        progress: Optional progress callback
+        store_path: SignalStore database to read through (None always runs the strategies)
+
+    Returns:
+        One SymbolSignals per group, sorted by security name
+    """
+    items = sorted(groups.items())
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), max(chunk_size, 1))]
+    tasks = [(_csv_chunk, (chunk, folder, config, store_path), len(chunk)) for chunk in chunks]
+    results = _run_tasks(tasks, len(items), max_workers, progress)
+    return sorted(results, key=lambda r: r.symbol)
+
+
+def generate_for_db_symbols(
+    symbols: Sequence[str],
+    db_path: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    config: Optional[SignalConfig] = None,
+    max_workers: Optional[int] = None,
+    chunk_size: int = 8,
+    progress: Optional[ProgressCallback] = None,
+    store_path: Optional[str] = None
+) -> List[SymbolSignals]:
+    """
+    Load bars from the stock database and generate signals, one panel query per chunk.
+
+    Args:
+        symbols: Symbols to process
+        db_path: Path to the stock database
+        start: Inclusive lower bound on datetime (optional)
+        end: Inclusive upper bound on datetime (optional)
+        config: Strategy settings (defaults to SignalConfig())
+        max_workers: Worker processes (defaults to cores - 1; 1 runs in-process)
+        chunk_size: Symbols per task
+        progress: Optional progress callback
+        store_path: SignalStore database to read through (None always runs the strategies)
+
+    Returns:
+        SymbolSignals for every symbol with data, in the order requested
+    """
+    symbols = list(dict.fromkeys(symbols))
+    chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), max(chunk_size, 1))]
+    tasks = [(_db_chunk, (chunk, db_path, start, end, config, store_path), len(chunk)) for chunk in chunks]
+    results = _run_tasks(tasks, len(symbols), max_workers, progress)
+    order = {s: i for i, s in enumerate(symbols)}
+    return sorted(results, key=lambda r: order[r.symbol])
+
+
+def merge_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate frames of one security in start-date order, keeping the first row per date."""
+    def start_of(df):
+        return pd.to_datetime(df.index.min()) if len(df.index) > 0 else pd.NaT
+
+    frames = sorted(frames, key=lambda df: (pd.NaT if pd.isna(start_of(df)) else start_of(df)))
+    try:
+        merged = pd.concat(frames).sort_index()
+        # drop duplicate indices keeping first occurrence
+        return merged[~merged.index.duplicated(keep='first')]
+    except Exception:
+        # fallback: take first df
+        return frames[0]
+
+
+def _run_tasks(tasks, total: int, max_workers: Optional[int], progress: Optional[ProgressCallback]) -> List[SymbolSignals]:
+    """Run (fn, args, size) tasks in a process pool, or in-process for a single worker."""
+    if max_workers is None:
+        max_workers = default_worker_count()
+    max_workers = min(max_workers, len(tasks))
+
+    results: List[SymbolSignals] = []
+    done = 0
+    pending = list(range(len(tasks)))
+
+    if max_workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(fn, *args): i for i, (fn, args, _) in enumerate(tasks)}
+                for future in as_completed(futures):
+                    i = futures[future]
+                    results.extend(future.result())
+                    pending.remove(i)
+                    done += tasks[i][2]
+                    if progress:
+                        progress(done, total)
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning(f"Process pool unavailable ({e}); finishing {len(pending)} task(s) in-process")
+
+    for i in pending:
+        fn, args, size = tasks[i]
+        results.extend(fn(*args))
+        done += size
+        if progress:
+            progress(done, total)
+    return results
+
+
+def _generator(config: Optional[SignalConfig], store_path: Optional[str]) -> SignalGenerator:
+    return SignalGenerator(config=config, store=SignalStore(store_path) if store_path else None)
+
+
+def _csv_chunk(groups: List[Tuple[str, List[str]]], folder: str, config: Optional[SignalConfig],
+               store_path: Optional[str] = None) -> List[SymbolSignals]:
+    from utility.utility import load_data
+
+    sg = _generator(config, store_path)
+    results = []
+    for security, file_names in groups:
+        frames, warnings = [], []
+        for file_name in file_names:
+            try:
+                df = load_data(file_name, folder)
+            except Exception as e:
+                warnings.append(f"Failed to load {file_name}: {e}")
+                continue
+            if df is None or df.empty:
+                warnings.append(f"No data in file: {file_name}")
+                continue
+            frames.append(df)
+        if not frames:
+            results.append(SymbolSignals(security, None, [], warnings))
+            continue
+
+        merged = merge_frames(frames)
+        try:
+            signals = sg.generate_from_file(merged, security)
+        except Exception as e:
+            warnings.append(f"Signal generation failed for {security}: {e}")
+            signals = []
+        results.append(SymbolSignals(security, merged, signals, warnings))
+    return results
+
+
+def _db_chunk(symbols: List[str], db_path: str, start: Optional[str], end: Optional[str],
+              config: Optional[SignalConfig], store_path: Optional[str] = None) -> List[SymbolSignals]:
+    from service.bar_store import bar_store_for
+    from service.connection_pool import get_pool
+
+    conn = get_pool(db_path, read_only=True).connection()
+    # Bars come from the memory-mapped store next to the database
+    panel = bar_store_for(db_path).load_frames(conn, symbols, start=start, end=end)
+    sg = _generator(config, store_path)
+    results = []
+    for symbol, df in panel.items():
+        try:
+            signals = sg.generate_from_file(df, symbol)
+            results.append(SymbolSignals(symbol, df, signals))
+        except Exception as e:
+            results.append(SymbolSignals(symbol, df, [], [f"Error generating signals for {symbol}: {e}"]))
+    return results
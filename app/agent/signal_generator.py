@@ -12,14 +12,26 @@ Assumptions:
 - "Dark" FVG boxes are those with alpha >= 0.4 (alpha computed by FVG implementation)
 - CSV file can be either a full path to a CSV or a short filter string used by utility.load_data
 - Handles Signal objects and dict-like signals produced by the strategies
+
+run_signal_pipeline() is the stateless entry point; SignalGenerator wraps it
+with a SignalConfig so one instance can be shared across threads. Given a
+SignalStore, SignalGenerator reads results through it and only runs the
+strategies for data or settings it has not seen. When a stored series only
+gained new bars, the strategies are restored from their checkpoint and fed
+the new bars through update() instead of rerunning the whole history.
 """
-from typing import List
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Tuple
 import pandas as pd
 
 from utility.file_util import get_security_name, read_csv_into_df
 from strategy.fvgorderblocks import FVGOrderBlocks
 from strategy.sonarlaplaceorderblocks import SonarlaplaceOrderBlocks
+from model.bars import as_bars
+from model.box import Box
+from model.ledger import Ledger
 from model.signal import Signal
+from service.signal_store import SignalStore, get_signal_store
 from agent.signal_processor import (
     normalize_raw_signal,
     is_buy_signal,
@@ -28,10 +40,219 @@ from agent.signal_processor import (
 )
 from agent.signal_strength import (
     calculate_signal_strength,
-    check_fvg_inclusion,
-    check_sonar_inclusion
+    check_inclusions_batch
+)
+
+# Columns of SignalGenerator.to_dataframe
+SIGNAL_FIELDS = (
+    ('date', 'datetime'),
+    ('index', 'int'),
+    ('price', 'float'),
+    ('type', 'object'),
+    ('symbol', 'object'),
+    ('color', 'object'),
+    ('fvg_alpha', 'float'),
+    ('signalStrength', 'int'),
+    ('source_strategy', 'object'),
 )
 
+
+@dataclass(frozen=True)
+class SignalConfig:
+    """
+    Picklable settings for one signal generation run.
+
+    fvg_params and sonar_params are keyword arguments for FVGOrderBlocks and
+    SonarlaplaceOrderBlocks; empty means the strategy defaults.
+    """
+    dark_alpha_threshold: float = 0.4
+    fvg_params: Dict[str, Any] = field(default_factory=dict)
+    sonar_params: Dict[str, Any] = field(default_factory=dict)
+
+    def build_strategies(self) -> Tuple[FVGOrderBlocks, SonarlaplaceOrderBlocks]:
+        """Fresh strategy instances for one run."""
+        return FVGOrderBlocks(**self.fvg_params), SonarlaplaceOrderBlocks(**self.sonar_params)
+
+
+@dataclass(frozen=True)
+class BoxSnapshot:
+    """Boxes left by the strategies at the end of a run."""
+    fvg_bull: Tuple[Box, ...] = ()
+    fvg_bear: Tuple[Box, ...] = ()
+    sonar_long: Tuple[Box, ...] = ()
+    sonar_short: Tuple[Box, ...] = ()
+
+
+@dataclass
+class StrategyState:
+    """Strategies primed for update() after the first `bars` bars of a series."""
+    bars: int
+    fvg: FVGOrderBlocks
+    sonar: SonarlaplaceOrderBlocks
+
+    @property
+    def strategies(self) -> list:
+        return [self.fvg, self.sonar]
+
+    def can_extend(self, n_bars: int) -> bool:
+        """Whether feeding the series up to n_bars reproduces a full run."""
+        return self.bars <= n_bars and all(s.supports_resume(n_bars) for s in self.strategies)
+
+    def extend(self, df: pd.DataFrame):
+        """Feed the bars after the first `bars` to every strategy."""
+        bars = as_bars(df)
+        tail = zip(bars.open[self.bars:].tolist(), bars.high[self.bars:].tolist(),
+                   bars.low[self.bars:].tolist(), bars.close[self.bars:].tolist())
+        for bar in tail:
+            for strategy in self.strategies:
+                strategy.update(bar)
+        self.bars = len(bars)
+
+
+@dataclass
+class SignalResult:
+    """Signals and box snapshot of one run (plus strategy state when kept)."""
+    signals: List[Signal]
+    boxes: BoxSnapshot
+    state: Optional[StrategyState] = None
+
+
+def run_signal_pipeline(
+    df: pd.DataFrame,
+    file_name: str,
+    config: Optional[SignalConfig] = None,
+    resume_from: Optional[StrategyState] = None,
+    keep_state: bool = False
+) -> SignalResult:
+    """
+    Generate enhanced signals for one symbol.
+
+    Pure function: every call builds its own strategy instances (or continues
+    the ones in resume_from), so calls may run concurrently in threads or processes.
+
+    Args:
+        df: OHLC DataFrame (or Bars) to run the strategies on
+        file_name: File name or symbol; the signal symbol is derived from it
+        config: Strategy settings (defaults to SignalConfig())
+        resume_from: Strategies that already processed a prefix of df; only
+            the remaining bars are processed when that matches a full run
+        keep_state: Return the strategies primed for update() in result.state
+
+    Returns:
+        SignalResult with the enhanced signals and the final boxes
+    """
+    config = config or SignalConfig()
+    n = len(df)
+    if resume_from is not None and resume_from.can_extend(n):
+        state = resume_from
+        fvg, sonar = state.fvg, state.sonar
+        state.extend(df)
+    else:
+        state = None
+        fvg, sonar = config.build_strategies()
+        # Run all strategies
+        run_all_strategies([fvg, sonar], df)
+    strategies = [fvg, sonar]
+
+    # Collect raw signals from all strategies
+    raw_signals = collect_signals_from_strategies(strategies)
+
+    # Process and enhance signals
+    enhanced = _enhance_signals(raw_signals, df, file_name, fvg, sonar, config.dark_alpha_threshold)
+
+    boxes = BoxSnapshot(
+        fvg_bull=tuple(fvg.bull_boxes),
+        fvg_bear=tuple(fvg.bear_boxes),
+        sonar_long=tuple(sonar.long_boxes),
+        sonar_short=tuple(sonar.short_boxes),
+    )
+
+    if keep_state and state is None and all(s.supports_resume(n) for s in strategies):
+        for strategy in strategies:
+            strategy.prime_updates(df)
+        state = StrategyState(n, fvg, sonar)
+    return SignalResult(enhanced, boxes, state if keep_state else None)
+
+
+def _enhance_signals(raw_signals: List, df: pd.DataFrame, file_name: str, fvg, sonar,
+                     dark_alpha_threshold: float) -> List[Signal]:
+    """Process raw signals and create enhanced Signal objects."""
+    rows = []
+    seen = set()
+    symbol = get_security_name(file_name)
+    dates = _index_values(df)
+
+    for s in raw_signals:
+        # Normalize signal
+        normalized = normalize_raw_signal(s)
+        if normalized is None:
+            continue
+
+        # Deduplicate
+        key = (normalized['idx'], round(normalized['price'], 6), str(normalized['typ']))
+        if key in seen:
+            continue
+        seen.add(key)
+        rows.append(normalized)
+
+    if not rows:
+        return []
+
+    # Check box inclusions for all signals at once
+    inside_fvg, fvg_alpha, inside_sonar = check_inclusions_batch(
+        [r['idx'] for r in rows],
+        [r['price'] for r in rows],
+        [is_buy_signal(r['typ']) for r in rows],
+        fvg,
+        sonar
+    )
+
+    enhanced = []
+    for i, r in enumerate(rows):
+        idx = r['idx']
+        typ = r['typ']
+
+        # Calculate signal strength
+        signalStrength = calculate_signal_strength(
+            inside_fvg[i], inside_sonar[i], fvg_alpha[i], dark_alpha_threshold
+        )
+
+        # Create enhanced signal
+        enhanced.append(Signal(
+            index=idx,
+            price=r['price'],
+            date=_get_date_from_index(dates, idx),
+            type=typ if typ is not None else '',
+            symbol=symbol,
+            color=r['color'],
+            inside_fvg=inside_fvg[i],
+            inside_sonar=inside_sonar[i],
+            fvg_alpha=fvg_alpha[i],
+            signalStrength=signalStrength,
+            source_strategy=[r['source']]
+        ))
+
+    return enhanced
+
+
+def _index_values(df: pd.DataFrame) -> list:
+    """DataFrame index as a list, so per-signal lookups skip pandas indexing."""
+    try:
+        return list(df.index)
+    except Exception:
+        return []
+
+
+def _get_date_from_index(dates: list, idx: int):
+    """Get date value at a bar position of the index."""
+    try:
+        if len(dates) > idx:
+            return dates[int(idx)]
+    except Exception:
+        pass
+    return None
+
+
 # Module-level singleton instance
 _instance = None
 
@@ -40,6 +261,11 @@ def get_signal_generator(dark_alpha_threshold: float = 0.4) -> 'SignalGenerator'
     """
     Get or create a singleton SignalGenerator instance.
 
+    The instance holds only its SignalConfig and reads through the shared
+    SignalStore when persistence is configured (see
+    service.signal_store.configure_signal_store), so sharing it across
+    threads is safe.
+
     Args:
         dark_alpha_threshold: Only used when creating the instance for the first time.
 
@@ -48,7 +274,7 @@ def get_signal_generator(dark_alpha_threshold: float = 0.4) -> 'SignalGenerator'
     """
     global _instance
     if _instance is None:
-        _instance = SignalGenerator(dark_alpha_threshold)
+        _instance = SignalGenerator(dark_alpha_threshold, store=get_signal_store())
     return _instance
 
 
@@ -59,120 +285,68 @@ def reset_signal_generator():
 
 
 class SignalGenerator:
-    def __init__(self, dark_alpha_threshold: float = 0.4):
-        """dark_alpha_threshold: alpha >= this value is considered dark block"""
-        self.dark_alpha_threshold = dark_alpha_threshold
+    def __init__(self, dark_alpha_threshold: float = 0.4, config: Optional[SignalConfig] = None,
+                 store: Optional[SignalStore] = None):
+        """
+        dark_alpha_threshold: alpha >= this value is considered dark block
+        config: full settings; overrides dark_alpha_threshold when given
+        store: optional persistent cache of results; None always runs the strategies
+        """
+        self.config = config or SignalConfig(dark_alpha_threshold=dark_alpha_threshold)
+        self.store = store
+
+    @property
+    def dark_alpha_threshold(self) -> float:
+        return self.config.dark_alpha_threshold
 
     def generate_from_file(self, df: pd.DataFrame, file_name: str) -> List[Signal]:
         """Main entry: generates signals from DataFrame.
         Returns list of Signal objects with computed signalStrength."""
-
-        # Create fresh strategy instances for each call (thread-safe)
-        self.fvg = FVGOrderBlocks()
-        self.sonar = SonarlaplaceOrderBlocks()
-        self.strategies = [self.fvg, self.sonar]
-
-        # Run all strategies
-        run_all_strategies(self.strategies, df)
-
-        # Collect raw signals from all strategies
-        raw_signals = collect_signals_from_strategies(self.strategies)
-
-        # Process and enhance signals
-        enhanced = self._process_raw_signals(raw_signals, df, file_name)
-
-        return enhanced
+        return self.generate_with_boxes(df, file_name).signals
+
+    def generate_with_boxes(self, df: pd.DataFrame, file_name: str) -> SignalResult:
+        """Like generate_from_file, but also returns the strategies' final boxes."""
+        if self.store is None:
+            return run_signal_pipeline(df, file_name, self.config)
+
+        key = self.store.key(df, get_security_name(file_name), self.config)
+        result = self.store.get(key)
+        if result is None:
+            # New bars only: continue the checkpointed strategies over the tail
+            checkpoint = self.store.get_checkpoint(key, df)
+            result = run_signal_pipeline(df, file_name, self.config, resume_from=checkpoint, keep_state=True)
+            if result.state is not None:
+                self.store.put_checkpoint(key, result.state)
+            result = replace(result, state=None)
+            self.store.put(key, result)
+        return result
 
     def generate_signals(self, df: pd.DataFrame, symbol: str) -> List[Signal]:
         """Alias for generate_from_file for compatibility with optimizer."""
         return self.generate_from_file(df, symbol)
 
-    def _process_raw_signals(self, raw_signals: List, df: pd.DataFrame, file_name: str) -> List[Signal]:
-        """Process raw signals and create enhanced Signal objects."""
-        enhanced = []
-        seen = set()
-
-        for s in raw_signals:
-            # Normalize signal
-            normalized = normalize_raw_signal(s)
-            if normalized is None:
-                continue
-
-            idx = normalized['idx']
-            price = normalized['price']
-            typ = normalized['typ']
-            color = normalized['color']
-            source = normalized['source']
-
-            # Deduplicate
-            key = (idx, round(price, 6), str(typ))
-            if key in seen:
-                continue
-            seen.add(key)
-
-            # Determine signal direction
-            is_buy = is_buy_signal(typ)
-
-            # Check box inclusions
-            inside_fvg, fvg_alpha = check_fvg_inclusion(idx, price, is_buy, self.fvg)
-            inside_sonar = check_sonar_inclusion(idx, price, is_buy, self.sonar)
-
-            # Calculate signal strength
-            signalStrength = calculate_signal_strength(
-                inside_fvg, inside_sonar, fvg_alpha, self.dark_alpha_threshold
-            )
-
-            # Map index to date
-            date_val = self._get_date_from_index(df, idx)
-
-            # Create enhanced signal
-            enhanced.append(Signal(
-                index=idx,
-                price=price,
-                date=date_val,
-                type=typ if typ is not None else '',
-                symbol=get_security_name(file_name),
-                color=color,
-                inside_fvg=inside_fvg,
-                inside_sonar=inside_sonar,
-                fvg_alpha=fvg_alpha,
-                signalStrength=signalStrength,
-                source_strategy=[source]
-            ))
-
-        return enhanced
-
-    def _get_date_from_index(self, df: pd.DataFrame, idx: int):
-        """Get date value from DataFrame index."""
-        try:
-            if hasattr(df, 'index') and len(df.index) > idx:
-                return df.index[int(idx)]
-        except Exception:
-            pass
-        return None
-
     def to_dataframe(self, enhanced_signals: List[Signal]) -> pd.DataFrame:
         """Convert enhanced signals list to a pandas DataFrame for UI or export."""
-        rows = []
+        # Signals are written straight into columns, not into a dict per signal
+        ledger = Ledger(SIGNAL_FIELDS, capacity=len(enhanced_signals))
         for s in enhanced_signals:
-            rows.append({
-                'date': s.date,
-                'index': s.index,
-                'price': s.price,
-                'type': self._normalize_signal_type(s.type),
-                'symbol': s.symbol,
-                'color': s.color,
-                'fvg_alpha': s.fvg_alpha,
-                'signalStrength': s.signalStrength,
-                'source_strategy': ','.join(s.source_strategy) if isinstance(s.source_strategy, list) else s.source_strategy
-            })
+            ledger.append_row(s, (
+                s.date,
+                s.index,
+                s.price,
+                self._normalize_signal_type(s.type),
+                s.symbol,
+                s.color,
+                s.fvg_alpha,
+                s.signalStrength,
+                ','.join(s.source_strategy) if isinstance(s.source_strategy, list) else s.source_strategy
+            ))
 
         # Always ensure the resulting DataFrame has the expected columns even when empty
-        columns = ['date', 'index', 'price', 'type', 'symbol', 'color', 'fvg_alpha', 'signalStrength', 'source_strategy']
-        if rows:
-            df = pd.DataFrame(rows)
+        if len(ledger):
+            df = ledger.to_dataframe()
         else:
-            df = pd.DataFrame(columns=columns)
+            df = pd.DataFrame(columns=[name for name, _ in SIGNAL_FIELDS])
 
         # Normalize date column to datetime dtype if present
         if 'date' in df.columns:
@@ -1,7 +1,12 @@
 """
 Signal strength calculation based on FVG and Sonar box inclusion.
 """
-from typing import Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from model.box import Box
+from model.box_table import BoxTable
 
 
 def calculate_signal_strength(
@@ -94,4 +99,53 @@ def check_sonar_inclusion(
             if point_in_box(idx, price, box):
                 return True
 
-    return False
\ No newline at end of file
+    return False
+
+
+def check_inclusions_batch(
+    idx: Sequence[int],
+    price: Sequence[float],
+    is_buy: Sequence[bool],
+    fvg_strategy,
+    sonar_strategy
+) -> Tuple[List[bool], List[Optional[float]], List[bool]]:
+    """
+    check_fvg_inclusion and check_sonar_inclusion for many signals at once.
+
+    Each box list is turned into a BoxTable once and every signal of a side
+    is tested against it in one vectorized query, instead of a Python loop
+    over the boxes per signal. Box lists holding legacy dicts fall back to
+    the per-signal checks.
+
+    Returns:
+        (inside_fvg, fvg_alpha, inside_sonar), one entry per signal
+    """
+    n = len(idx)
+    inside_fvg = [False] * n
+    fvg_alpha: List[Optional[float]] = [None] * n
+    inside_sonar = [False] * n
+    idx = np.asarray(idx, dtype=np.int64)
+    price = np.asarray(price, dtype=float)
+    is_buy = np.asarray(is_buy, dtype=bool)
+
+    for buy_side in (True, False):
+        rows = np.flatnonzero(is_buy == buy_side)
+        if len(rows) == 0:
+            continue
+        fvg_boxes = fvg_strategy.bull_boxes if buy_side else fvg_strategy.bear_boxes
+        sonar_boxes = sonar_strategy.long_boxes if buy_side else sonar_strategy.short_boxes
+        if not all(isinstance(b, Box) for b in fvg_boxes) or not all(isinstance(b, Box) for b in sonar_boxes):
+            for r in rows.tolist():
+                inside_fvg[r], fvg_alpha[r] = check_fvg_inclusion(int(idx[r]), float(price[r]), buy_side, fvg_strategy)
+                inside_sonar[r] = check_sonar_inclusion(int(idx[r]), float(price[r]), buy_side, sonar_strategy)
+            continue
+
+        fvg_hits = BoxTable.from_boxes(fvg_boxes).first_containing(idx[rows], price[rows])
+        sonar_hits = BoxTable.from_boxes(sonar_boxes).first_containing(idx[rows], price[rows])
+        for r, fvg_pos, sonar_pos in zip(rows.tolist(), fvg_hits.tolist(), sonar_hits.tolist()):
+            if fvg_pos >= 0:
+                inside_fvg[r] = True
+                fvg_alpha[r] = fvg_boxes[fvg_pos].alpha
+            inside_sonar[r] = sonar_pos >= 0
+
+    return inside_fvg, fvg_alpha, inside_sonar
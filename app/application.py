@@ -10,16 +10,14 @@ from agent.signal_generator import SignalGenerator
 from agent.paper_trade_agent import PaperTradeAgent
 from strategy.fvgorderblocks import FVGOrderBlocks
 from strategy.sonarlaplaceorderblocks import SonarlaplaceOrderBlocks
+from service.data_catalog import get_catalog
 from ui.backtest import render_backtest
 from ui.data_download import render_data_download
 from ui.viewer import render_viewer
 
-# try alternative path if the file layout differs
-data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'resource', 'data')
-backTest_data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'resource', 'backtest_data')
-
-CSV_FILES = [f for f in os.listdir(data_dir) if f.endswith('.csv')] if os.path.isdir(data_dir) else []
-BACK_TEST_CSV_FILES = [f for f in os.listdir(backTest_data_dir) if f.endswith('.csv')] if os.path.isdir(backTest_data_dir) else []
+# File lists come from the persistent data catalog (resource/data and resource/backtest_data)
+CSV_FILES = get_catalog().files('data')
+BACK_TEST_CSV_FILES = get_catalog().files('backtest_data')
 
 
 def plot_both_strategies_on_ax(ax: plt.Axes, df: DataFrame, file_name: str):
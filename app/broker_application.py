@@ -11,6 +11,7 @@ from agent.signal_generator import get_signal_generator
 from agent.trade_agent import TradeAgent
 from model import Signal
 from service.broker_service import BrokerConfig
+from service.data_catalog import get_catalog
 from utility.env_loader import load_project_env
 from utility.file_util import read_csv_into_df
 
@@ -21,7 +22,7 @@ logging.basicConfig(level=logging.INFO)
 # locate backtest data directory relative to project root
 PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
 BACKTEST_DATA_DIR = os.path.join(PROJECT_ROOT, 'resource', 'backtest_data')
-BACKTEST_CSV_FILES: List[str] = [f for f in os.listdir(BACKTEST_DATA_DIR) if f.endswith('.csv')] if os.path.isdir(BACKTEST_DATA_DIR) else []
+BACKTEST_CSV_FILES: List[str] = get_catalog().files('backtest_data')
 
 
 class TradePulse:
@@ -4,5 +4,9 @@ from model.box import Box, BoxType
 from model.OutcomeType import OutcomeType
 from model.trade import Trade, SignalStrength
 from model.trade_summary import TradeSummary
+from model.bars import Bars
+from model.box_table import BoxTable
+from model.signal_batch import SignalBatch
+from model.ledger import Ledger, TradeLedger
 
-__all__ = ['Signal', 'SignalType', 'Box', 'BoxType', 'OutcomeType', 'Trade', 'SignalStrength', 'TradeSummary']
\ No newline at end of file
+__all__ = ['Signal', 'SignalType', 'Box', 'BoxType', 'OutcomeType', 'Trade', 'SignalStrength', 'TradeSummary', 'Bars', 'BoxTable', 'SignalBatch', 'Ledger', 'TradeLedger']
\ No newline at end of file
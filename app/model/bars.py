@@ -0,0 +1,39 @@
+"""
+Bars dataclass holding OHLC columns as contiguous NumPy arrays.
+"""
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class Bars:
+    """Column arrays for a price series, aligned by bar position."""
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    index: Optional[pd.Index] = None
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> 'Bars':
+        """Build Bars from a DataFrame with Open/High/Low/Close columns."""
+        return cls(
+            open=df['Open'].to_numpy(dtype=float),
+            high=df['High'].to_numpy(dtype=float),
+            low=df['Low'].to_numpy(dtype=float),
+            close=df['Close'].to_numpy(dtype=float),
+            index=df.index,
+        )
+
+
+def as_bars(data: Union[Bars, pd.DataFrame]) -> Bars:
+    """Return data unchanged if it already is Bars, otherwise convert the DataFrame."""
+    if isinstance(data, pd.DataFrame):
+        return Bars.from_df(data)
+    return data
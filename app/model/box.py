@@ -15,7 +15,7 @@ class BoxType(StrEnum):
     BEARISH = "bearish"
 
 
-@dataclass
+@dataclass(slots=True)
 class Box:
     """Represents an order block box."""
     left: int
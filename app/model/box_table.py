@@ -0,0 +1,78 @@
+"""
+BoxTable - boxes as a NumPy structured array for vectorized containment tests.
+"""
+from typing import List, Sequence
+
+import numpy as np
+
+from model.box import Box
+
+BOX_DTYPE = np.dtype([
+    ('left', np.int64),
+    ('right', np.int64),
+    ('top', np.float64),
+    ('bottom', np.float64),
+    ('alpha', np.float64),
+    ('broken', np.bool_),
+])
+
+# Rows x boxes compared per block in first_containing
+_BLOCK_CELLS = 1 << 20
+
+
+class BoxTable:
+    """
+    Columns of a box list, one row per box in list order.
+
+    The Box objects are kept alongside as the list view; the table is a
+    snapshot, so boxes must not be mutated while it is in use.
+    """
+
+    __slots__ = ('data', '_boxes')
+
+    def __init__(self, data: np.ndarray, boxes: Sequence[Box]):
+        self.data = data
+        self._boxes = list(boxes)
+
+    @classmethod
+    def from_boxes(cls, boxes: Sequence[Box]) -> 'BoxTable':
+        boxes = list(boxes)
+        data = np.empty(len(boxes), dtype=BOX_DTYPE)
+        if boxes:
+            data['left'] = [b.left for b in boxes]
+            data['right'] = [b.right for b in boxes]
+            data['top'] = [b.top for b in boxes]
+            data['bottom'] = [b.bottom for b in boxes]
+            data['alpha'] = [np.nan if b.alpha is None else b.alpha for b in boxes]
+            data['broken'] = [bool(b.broken) for b in boxes]
+        return cls(data, boxes)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def to_boxes(self) -> List[Box]:
+        """The boxes in table order."""
+        return list(self._boxes)
+
+    def first_containing(self, idx: np.ndarray, price: np.ndarray) -> np.ndarray:
+        """
+        Position of the first box containing each point, or -1.
+
+        Vectorized Box.contains_point: left <= idx <= right and
+        bottom <= price <= top, first match in list order.
+        """
+        idx = np.asarray(idx, dtype=np.int64)
+        price = np.asarray(price, dtype=float)
+        out = np.full(len(idx), -1, dtype=np.int64)
+        if len(self.data) == 0 or len(idx) == 0:
+            return out
+        left, right = self.data['left'], self.data['right']
+        top, bottom = self.data['top'], self.data['bottom']
+        step = max(1, _BLOCK_CELLS // len(self.data))
+        for start in range(0, len(idx), step):
+            i = idx[start:start + step, None]
+            p = price[start:start + step, None]
+            inside = (left <= i) & (i <= right) & (p <= top) & (p >= bottom)
+            hit = inside.any(axis=1)
+            out[start:start + step] = np.where(hit, inside.argmax(axis=1), -1)
+        return out
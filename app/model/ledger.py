@@ -0,0 +1,227 @@
+"""
+Ledger - append-only record columns backed by amortized-growth NumPy arrays.
+"""
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional; only to_arrow needs it
+    pa = None
+
+from model.trade import Trade
+
+# Column kinds and their storage dtype; dates and durations are stored as int64 ns
+_STORAGE = {
+    'int': np.int64,
+    'number': np.int64,
+    'float': np.float64,
+    'object': object,
+    'datetime': np.int64,
+    'timedelta': np.int64,
+}
+_NAT = np.iinfo(np.int64).min
+_MIN_CAPACITY = 64
+
+
+class Ledger:
+    """
+    Records appended as rows into one preallocated array per field.
+
+    Arrays double when full, so an append is amortized O(1) and no dict is
+    built per record. to_dataframe wraps the filled prefix of each array
+    without copying: the frame shares the ledger's buffers, so copy it before
+    modifying it in place. The appended records are kept as the row view.
+
+    Datetime columns take the timezone of their first value; a column that
+    later gets a value it cannot store (a None in an int column, a tz-naive
+    date in a tz-aware column) falls back to an object column. A number
+    column keeps the dtype pandas would infer from its values: int64 while
+    only ints arrive, float64 from the first float or None.
+    """
+
+    def __init__(self, fields: Sequence[Tuple[str, str]], capacity: int = _MIN_CAPACITY):
+        """
+        Initialize ledger.
+
+        Args:
+            fields: (column name, kind) pairs; kind is one of int, number,
+                float, object, datetime, timedelta
+            capacity: Rows preallocated per column
+        """
+        self.fields = list(fields)
+        self._kinds = dict(self.fields)
+        self._capacity = max(int(capacity), 1)
+        self._columns = {name: np.empty(self._capacity, dtype=_STORAGE[kind]) for name, kind in self.fields}
+        self._tz: dict = {}
+        self._records: List[Any] = []
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._records)
+
+    def __getitem__(self, pos):
+        return self._records[pos]
+
+    @property
+    def records(self) -> List[Any]:
+        """Appended records in order (a copy of the internal list)."""
+        return list(self._records)
+
+    def append_row(self, record: Any, values: Sequence[Any]):
+        """Append record with its column values, in field order."""
+        if self._n == self._capacity:
+            self._grow()
+        i = self._n
+        for (name, _), value in zip(self.fields, values):
+            self._store(name, i, value)
+        self._records.append(record)
+        self._n += 1
+
+    def column(self, name: str) -> np.ndarray:
+        """Filled prefix of a column's array (a view, not a copy)."""
+        return self._columns[name][:self._n]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Columns as a DataFrame sharing the ledger's arrays."""
+        return pd.DataFrame({name: self._export(name) for name, _ in self.fields}, copy=False)
+
+    def to_arrow(self):
+        """Columns as a pyarrow Table; numeric and date columns are not copied."""
+        if pa is None:
+            raise ImportError("pyarrow is required for Ledger.to_arrow")
+        arrays = {}
+        for name, _ in self.fields:
+            values = self._export(name)
+            if isinstance(values, pd.DatetimeIndex):
+                arrays[name] = pa.Array.from_pandas(values)
+            else:
+                arrays[name] = pa.array(values, from_pandas=True)
+        return pa.table(arrays)
+
+    def _grow(self):
+        self._capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.empty(self._capacity, dtype=column.dtype)
+            grown[:self._n] = column[:self._n]
+            self._columns[name] = grown
+
+    def _store(self, name: str, i: int, value: Any):
+        kind = self._kinds[name]
+        column = self._columns[name]
+        try:
+            if kind == 'float':
+                column[i] = np.nan if value is None else value
+            elif kind == 'datetime':
+                column[i] = self._date_ns(name, value)
+            elif kind == 'timedelta':
+                column[i] = _NAT if value is None or pd.isna(value) else pd.Timedelta(value).value
+            elif kind == 'int' and not isinstance(value, (int, np.integer)):
+                raise TypeError(f"{name} is not an integer: {value!r}")
+            elif kind == 'number' and not isinstance(value, (int, np.integer)):
+                if value is not None and not isinstance(value, (float, np.floating)):
+                    raise TypeError(f"{name} is not a number: {value!r}")
+                self._to_float(name)
+                self._columns[name][i] = np.nan if value is None else value
+            else:
+                column[i] = value
+        except (TypeError, ValueError, OverflowError):
+            self._demote(name)
+            self._columns[name][i] = value
+
+    def _date_ns(self, name: str, value: Any) -> int:
+        if value is None or pd.isna(value):
+            return _NAT
+        ts = pd.Timestamp(value)
+        tz = ts.tz
+        if name not in self._tz:
+            self._tz[name] = tz
+        elif (tz is None) != (self._tz[name] is None):
+            raise TypeError(f"{name} mixes tz-naive and tz-aware dates")
+        return ts.as_unit('ns').value
+
+    def _to_float(self, name: str):
+        """Turn a number column into a float column, as pandas does for mixed ints and floats."""
+        self._columns[name] = self._columns[name].astype(np.float64)
+        self._kinds[name] = 'float'
+
+    def _demote(self, name: str):
+        """Turn a typed column into an object column holding the exported values."""
+        column = np.empty(self._capacity, dtype=object)
+        column[:self._n] = list(self._export(name))
+        self._columns[name] = column
+        self._kinds[name] = 'object'
+
+    def _export(self, name: str):
+        kind = self._kinds[name]
+        values = self.column(name)
+        if kind == 'datetime':
+            index = pd.DatetimeIndex(values.view('M8[ns]'))
+            tz = self._tz.get(name)
+            return index if tz is None else index.tz_localize('UTC').tz_convert(tz)
+        if kind == 'timedelta':
+            return values.view('m8[ns]')
+        return values
+
+
+# Prices and cash keep the dtype the agents' values have (int64 or float64)
+TRADE_FIELDS = (
+    ('entry_index', 'int'),
+    ('entry_date', 'datetime'),
+    ('exit_date', 'datetime'),
+    ('side', 'object'),
+    ('entry_price', 'number'),
+    ('exit_price', 'number'),
+    ('shares', 'int'),
+    ('pnl', 'number'),
+    ('security', 'object'),
+    ('outcome', 'object'),
+    ('signalStrength', 'int'),
+    ('cash_before', 'number'),
+    ('cash_after', 'number'),
+    ('money_allocated', 'number'),
+    ('lockin_period', 'timedelta'),
+)
+
+
+class TradeLedger(Ledger):
+    """Ledger of Trades with the columns of the agents' trades DataFrame."""
+
+    def __init__(self, capacity: int = _MIN_CAPACITY):
+        super().__init__(TRADE_FIELDS, capacity)
+
+    def append(self, trade: Trade):
+        """Record a completed trade."""
+        self.append_row(trade, (
+            trade.entry_index,
+            trade.entry_date,
+            trade.exit_date,
+            _value(trade.side),
+            trade.entry_price,
+            trade.exit_price,
+            trade.shares,
+            trade.pnl,
+            trade.security,
+            _value(trade.outcome),
+            _value(trade.signalStrength),
+            trade.cash_before,
+            trade.cash_after,
+            trade.money_allocated,
+            trade.lockin_period,
+        ))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Trades as a DataFrame (empty and without columns when there are none)."""
+        if not self._n:
+            return pd.DataFrame()
+        return super().to_dataframe()
+
+
+def _value(member: Optional[Any]) -> Any:
+    """Enum members are exported as their value."""
+    return member.value if hasattr(member, 'value') else member
@@ -5,8 +5,10 @@ from dataclasses import dataclass, field
 from typing import Dict, Optional
 import pandas as pd
 
+from model.OutcomeType import OutcomeType
 
-@dataclass
+
+@dataclass(slots=True)
 class Position:
     """Represents an open position in a security."""
     security: str
@@ -18,6 +20,17 @@ class Position:
     stop_loss: float
     target: float
     signal_strength: int
+    # Exit scheduled by the trading agent; exit_date None means none yet
+    exit_idx: Optional[int] = None
+    exit_date: Optional[pd.Timestamp] = None
+    exit_price: Optional[float] = None
+    pnl: float = 0.0
+    proceeds: float = 0.0
+    outcome: Optional[OutcomeType] = None
+    is_long: bool = True
+    cash_before: Optional[float] = None
+    # Opening sequence number, breaks ties between exits at the same time
+    open_order: int = 0
 
     @property
     def current_value(self) -> float:
@@ -61,21 +74,18 @@ class Portfolio:
         if not self.positions:
             return pd.DataFrame()
 
-        rows = []
-        for security, pos in self.positions.items():
-            rows.append({
-                'security': security,
-                'shares': pos.shares,
-                'entry_price': pos.entry_price,
-                'entry_date': pos.entry_date,
-                'money_allocated': pos.money_allocated,
-                'stop_loss': pos.stop_loss,
-                'target': pos.target,
-                'signal_strength': pos.signal_strength,
-                'current_value': pos.current_value
-            })
-
-        return pd.DataFrame(rows)
+        positions = list(self.positions.values())
+        return pd.DataFrame({
+            'security': list(self.positions.keys()),
+            'shares': [p.shares for p in positions],
+            'entry_price': [p.entry_price for p in positions],
+            'entry_date': [p.entry_date for p in positions],
+            'money_allocated': [p.money_allocated for p in positions],
+            'stop_loss': [p.stop_loss for p in positions],
+            'target': [p.target for p in positions],
+            'signal_strength': [p.signal_strength for p in positions],
+            'current_value': [p.current_value for p in positions]
+        })
 
     def summary(self) -> dict:
         """Get portfolio summary."""
@@ -6,7 +6,7 @@ import pandas as pd
 from model.SignalType import SignalType
 
 
-@dataclass
+@dataclass(slots=True)
 class Signal:
     index: int
     price: float
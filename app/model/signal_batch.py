@@ -0,0 +1,96 @@
+"""
+SignalBatch - signals as a NumPy structured array with the Signal list as its view.
+"""
+from datetime import datetime
+from typing import Iterator, List, Sequence, Union
+
+import numpy as np
+
+from model.signal import Signal
+from model.timestamps import NAT_NS, epoch_ns, epoch_ns_array
+
+SIGNAL_DTYPE = np.dtype([
+    ('index', np.int64),
+    ('price', np.float64),
+    ('time_ns', np.int64),
+    ('strength', np.int64),
+    ('inside_fvg', np.bool_),
+    ('inside_sonar', np.bool_),
+    ('fvg_alpha', np.float64),
+])
+
+
+class SignalBatch:
+    """
+    Numeric columns of a signal list, one row per signal in list order.
+
+    time_ns holds the int64 key of each date (see model.timestamps), NAT_NS
+    when it cannot be read; an unusable index is -1 and a missing fvg_alpha
+    NaN. Selecting rows returns a new batch over the same Signal objects.
+    """
+
+    __slots__ = ('data', '_signals')
+
+    def __init__(self, data: np.ndarray, signals: Sequence[Signal]):
+        self.data = data
+        self._signals = list(signals)
+
+    @classmethod
+    def from_signals(cls, signals: Union['SignalBatch', Sequence[Signal]]) -> 'SignalBatch':
+        if isinstance(signals, SignalBatch):
+            return signals
+        signals = list(signals)
+        data = np.empty(len(signals), dtype=SIGNAL_DTYPE)
+        if signals:
+            data['index'] = [_int_or(getattr(s, 'index', None), -1) for s in signals]
+            data['price'] = [_float_or(getattr(s, 'price', None), np.nan) for s in signals]
+            data['time_ns'] = _time_keys([getattr(s, 'date', None) for s in signals])
+            data['strength'] = [_int_or(getattr(s, 'signalStrength', None), 0) for s in signals]
+            data['inside_fvg'] = [bool(getattr(s, 'inside_fvg', False)) for s in signals]
+            data['inside_sonar'] = [bool(getattr(s, 'inside_sonar', False)) for s in signals]
+            data['fvg_alpha'] = [_float_or(getattr(s, 'fvg_alpha', None), np.nan) for s in signals]
+        return cls(data, signals)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self) -> Iterator[Signal]:
+        return iter(self._signals)
+
+    def __getitem__(self, key) -> Union[Signal, 'SignalBatch']:
+        """A Signal for an integer position, a SignalBatch for a mask or position array."""
+        if isinstance(key, (int, np.integer)):
+            return self._signals[key]
+        positions = np.arange(len(self._signals))[key]
+        return SignalBatch(self.data[positions], [self._signals[i] for i in positions.tolist()])
+
+    def to_signals(self) -> List[Signal]:
+        """The signals in batch order."""
+        return list(self._signals)
+
+    def time_order(self) -> np.ndarray:
+        """Positions that sort the batch by time, stable, unreadable dates first."""
+        return np.argsort(self.data['time_ns'], kind='stable')
+
+
+def _time_keys(dates: list) -> np.ndarray:
+    """Epoch ns of dates, in one pass when they are datetimes of a single tz-awareness."""
+    present = [d for d in dates if d is not None]
+    if all(isinstance(d, datetime) for d in present) and len({d.tzinfo is None for d in present}) <= 1:
+        return epoch_ns_array(dates)
+    # Naive and aware values cannot be parsed together without shifting the naive ones
+    return np.array([NAT_NS if (ns := epoch_ns(d)) is None else ns for d in dates], dtype=np.int64)
+
+
+def _int_or(value, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _float_or(value, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
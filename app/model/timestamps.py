@@ -0,0 +1,76 @@
+"""
+Canonical time keys - int64 UTC epoch nanoseconds plus the exchange offset.
+
+Loaders parse their timestamps once with normalize_index: a nanosecond
+DatetimeIndex, tz-aware stamps converted to the exchange zone. Comparisons
+in the agents use the int64 keys from epoch_ns / epoch_ns_array instead of
+Timestamps, so tz-aware and tz-naive dates never meet. Tz-naive stamps are
+exchange wall clock. The trading day and time of day of a key are integer
+arithmetic on the fixed exchange offset.
+"""
+import warnings
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+EXCHANGE_TZ = 'Asia/Kolkata'
+# IST has no daylight saving, so one offset maps wall clock to UTC
+EXCHANGE_OFFSET_NS = (5 * 3600 + 30 * 60) * 1_000_000_000
+MINUTE_NS = 60 * 1_000_000_000
+DAY_NS = 24 * 60 * MINUTE_NS
+# int64 value of NaT
+NAT_NS = np.iinfo(np.int64).min
+
+
+def normalize_index(values: Any) -> pd.DatetimeIndex:
+    """
+    Parse values to a nanosecond DatetimeIndex.
+
+    Tz-aware input, including strings with mixed UTC offsets, comes back in
+    EXCHANGE_TZ; tz-naive input stays naive. Unparseable values become NaT.
+    """
+    try:
+        with warnings.catch_warnings():
+            # Older pandas warns on mixed offsets and returns objects, which DatetimeIndex rejects
+            warnings.simplefilter('ignore', FutureWarning)
+            index = pd.DatetimeIndex(pd.to_datetime(values, errors='coerce'))
+    except (TypeError, ValueError):
+        # Mixed offsets only parse as UTC
+        index = pd.DatetimeIndex(pd.to_datetime(values, errors='coerce', utc=True))
+    if index.tz is not None:
+        index = index.tz_convert(EXCHANGE_TZ)
+    return index.as_unit('ns')
+
+
+def epoch_ns_array(values: Any) -> np.ndarray:
+    """UTC epoch nanoseconds of values as int64; NaT maps to NAT_NS."""
+    index = values if isinstance(values, pd.DatetimeIndex) else normalize_index(values)
+    ns = index.as_unit('ns').asi8
+    if index.tz is None:
+        ns = np.where(ns == NAT_NS, NAT_NS, ns - EXCHANGE_OFFSET_NS)
+    return ns
+
+
+def epoch_ns(value: Any) -> Optional[int]:
+    """UTC epoch nanoseconds of a single date, or None when it cannot be read."""
+    if value is None:
+        return None
+    try:
+        ts = pd.Timestamp(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if pd.isna(ts):
+        return None
+    ns = ts.as_unit('ns').value
+    return ns if ts.tz is not None else ns - EXCHANGE_OFFSET_NS
+
+
+def exchange_day(ns: int) -> int:
+    """Trading day number (days since 1970-01-01 in exchange time) of a key."""
+    return (ns + EXCHANGE_OFFSET_NS) // DAY_NS
+
+
+def exchange_time_of_day(ns: int) -> int:
+    """Nanoseconds since exchange midnight of a key."""
+    return (ns + EXCHANGE_OFFSET_NS) % DAY_NS
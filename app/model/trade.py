@@ -18,7 +18,7 @@ class SignalStrength(IntEnum):
     EXTREME = 5
 
 
-@dataclass
+@dataclass(slots=True)
 class Trade:
     entry_index: int
     entry_date: Optional[pd.Timestamp]
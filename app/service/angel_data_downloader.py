@@ -5,12 +5,14 @@ import logging
 import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-import time
 
 import pandas as pd
 import pyotp
 from SmartApi import SmartConnect
 
+from service.download_engine import CANDLE_COLUMNS, CandleRequest, DownloadEngine, TokenBucket
+from service.instrument_master import get_instrument_master
+
 logger = logging.getLogger(__name__)
 
 
@@ -83,40 +85,31 @@ class AngelDataDownloader:
             if not self.smart_api:
                 raise RuntimeError("Not connected to Angel One API. Call connect() first.")
             
-            # Angel One provides instrument list which includes F&O stocks
-            # Download the instrument file
+            # F&O underlyings come from the daily-cached instrument master
             logger.info("Fetching NSE F&O stocks list...")
             
-            # Get all instruments
-            instruments_url = "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json"
-            
-            import requests
-            response = requests.get(instruments_url)
+            instruments = get_instrument_master().rows('NFO')
             
-            if response.status_code == 200:
-                instruments = response.json()
-                
+            if instruments:
                 # Filter for NSE F&O stocks (equity derivatives)
                 fno_stocks = []
                 seen_symbols = set()
                 
                 for instrument in instruments:
-                    # Check if it's NSE F&O
-                    if instrument.get('exch_seg') == 'NFO':  # NSE F&O segment
-                        symbol = instrument.get('symbol', '')
-                        # Get underlying symbol (remove expiry dates, strike prices, etc.)
-                        if symbol and symbol not in seen_symbols:
-                            # Basic cleanup - symbols in NFO have derivatives
-                            # Extract base symbol (before any digits or special chars)
-                            base_symbol = ''.join([c for c in symbol if c.isalpha() or c == '&'])
-                            
-                            if base_symbol and base_symbol not in seen_symbols:
-                                seen_symbols.add(base_symbol)
-                                fno_stocks.append({
-                                    'symbol': base_symbol,
-                                    'token': instrument.get('token', ''),
-                                    'name': instrument.get('name', base_symbol)
-                                })
+                    symbol = instrument.get('symbol', '')
+                    # Get underlying symbol (remove expiry dates, strike prices, etc.)
+                    if symbol and symbol not in seen_symbols:
+                        # Basic cleanup - symbols in NFO have derivatives
+                        # Extract base symbol (before any digits or special chars)
+                        base_symbol = ''.join([c for c in symbol if c.isalpha() or c == '&'])
+                        
+                        if base_symbol and base_symbol not in seen_symbols:
+                            seen_symbols.add(base_symbol)
+                            fno_stocks.append({
+                                'symbol': base_symbol,
+                                'token': instrument.get('token', ''),
+                                'name': instrument.get('name', base_symbol)
+                            })
                 
                 # Additionally, get stocks from NSE cash segment that have F&O
                 # These are typically the major stocks
@@ -145,7 +138,7 @@ class AngelDataDownloader:
                 logger.info(f"Found {len(fno_stocks)} NSE F&O stocks")
                 return fno_stocks
             else:
-                logger.error(f"Failed to download instruments: Status {response.status_code}")
+                logger.error("Instrument master is unavailable")
                 return []
                 
         except Exception as e:
@@ -201,18 +194,7 @@ class AngelDataDownloader:
             if response['status'] and response['data']:
                 data = response['data']
                 
-                # Convert to DataFrame
-                df = pd.DataFrame(
-                    data,
-                    columns=['timestamp', 'Open', 'High', 'Low', 'Close', 'Volume']
-                )
-                
-                # Convert timestamp to datetime
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                df.set_index('timestamp', inplace=True)
-                
-                # Add symbol column
-                df['Symbol'] = symbol
+                df = _to_ohlcv_frame(pd.DataFrame(data, columns=CANDLE_COLUMNS), symbol)
                 
                 logger.info(f"Downloaded {len(df)} rows for {symbol}")
                 return df
@@ -235,30 +217,7 @@ class AngelDataDownloader:
             Token string or None if not found
         """
         try:
-            instruments_url = "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json"
-            
-            import requests
-            response = requests.get(instruments_url)
-            
-            if response.status_code == 200:
-                instruments = response.json()
-                
-                # Look for exact match in NSE segment
-                for instrument in instruments:
-                    if (instrument.get('exch_seg') == 'NSE' and 
-                        instrument.get('symbol') == symbol and
-                        instrument.get('instrumenttype') == 'EQ'):
-                        return instrument.get('token')
-                
-                # Fallback: try to find in NFO
-                for instrument in instruments:
-                    if instrument.get('exch_seg') == 'NFO':
-                        inst_symbol = instrument.get('symbol', '')
-                        if inst_symbol.startswith(symbol):
-                            return instrument.get('token')
-            
-            return None
-            
+            return get_instrument_master().token(symbol)
         except Exception as e:
             logger.error(f"Error finding token for {symbol}: {e}")
             return None
@@ -267,26 +226,35 @@ class AngelDataDownloader:
         self,
         symbols: List[str],
         years: int = 5,
-        interval: str = "ONE_DAY"
+        interval: str = "ONE_DAY",
+        max_in_flight: int = 4,
+        limiter: Optional[TokenBucket] = None
     ) -> Dict[str, pd.DataFrame]:
         """
-        Download historical data for multiple symbols.
+        Download historical data for multiple symbols concurrently.
         
         Args:
             symbols: List of stock symbols
             years: Number of years of historical data
             interval: Timeframe
+            max_in_flight: Requests outstanding at once
+            limiter: Shared rate limiter (defaults to the documented candle quota)
         
         Returns:
             Dictionary mapping symbol to DataFrame
         """
+        if not self.smart_api:
+            logger.error("Not connected to Angel One API. Call connect() first.")
+            return {}
+
         results = {}
         to_date = datetime.now()
         from_date = to_date - timedelta(days=365 * years)
         
         logger.info(f"Downloading data for {len(symbols)} symbols...")
         
-        for i, symbol_info in enumerate(symbols):
+        requests = []
+        for symbol_info in symbols:
             # Handle both dict and string formats
             if isinstance(symbol_info, dict):
                 symbol = symbol_info['symbol']
@@ -295,27 +263,23 @@ class AngelDataDownloader:
                 symbol = symbol_info
                 token = ''
             
-            try:
-                df = self.get_historical_data(
-                    symbol=symbol,
-                    token=token,
-                    from_date=from_date,
-                    to_date=to_date,
-                    interval=interval
-                )
-                
-                if df is not None and not df.empty:
-                    results[symbol] = df
-                    logger.info(f"[{i+1}/{len(symbols)}] Downloaded {symbol}: {len(df)} rows")
-                else:
-                    logger.warning(f"[{i+1}/{len(symbols)}] No data for {symbol}")
-                
-                # Rate limiting - wait between requests
-                time.sleep(0.5)
-                
-            except Exception as e:
-                logger.error(f"Error downloading {symbol}: {e}")
-                continue
+            # If token is empty, try to find it
+            if not token:
+                token = self._find_token(symbol)
+                if not token:
+                    logger.warning(f"Could not find token for {symbol}, skipping")
+                    continue
+            requests.append(CandleRequest(
+                symbol, token, from_date.strftime("%Y-%m-%d %H:%M"), to_date.strftime("%Y-%m-%d %H:%M"), interval
+            ))
+        
+        engine = DownloadEngine(self.smart_api, limiter, max_in_flight=max_in_flight)
+        for i, result in enumerate(engine.iter_results(requests)):
+            if result.ok:
+                results[result.symbol] = _to_ohlcv_frame(result.df, result.symbol)
+                logger.info(f"[{i+1}/{len(requests)}] Downloaded {result.symbol}: {len(result.df)} rows")
+            else:
+                logger.warning(f"[{i+1}/{len(requests)}] No data for {result.symbol}: {result.error}")
         
         logger.info(f"Successfully downloaded data for {len(results)}/{len(symbols)} symbols")
         return results
@@ -328,3 +292,16 @@ class AngelDataDownloader:
                 logger.info("Closed Angel One API connection")
             except Exception as e:
                 logger.warning(f"Error closing connection: {e}")
+
+
+def _to_ohlcv_frame(candles: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """Index raw candles by timestamp and tag them with the symbol."""
+    df = candles.rename(columns={'DateTime': 'timestamp'})
+    
+    # Convert timestamp to datetime
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df.set_index('timestamp', inplace=True)
+    
+    # Add symbol column
+    df['Symbol'] = symbol
+    return df
@@ -0,0 +1,267 @@
+"""
+Backfill Planner - Split missing history into API-sized windows and resume from download_log.
+
+For each symbol the planner compares the requested range with what is
+already known:
+
+  * bars stored in stock_data, where a run of missing weekdays between two
+    consecutive bars counts as an interior hole, and
+  * windows recorded as completed in download_log (including windows the
+    broker answered with no bars, e.g. before listing).
+
+Whatever is left is cut into windows no longer than the broker accepts per
+getCandleData call for the interval. Each finished window is written back to
+download_log, so a crashed or rate-limited run picks up exactly where it
+stopped and no window is requested twice.
+
+stock_data has no interval column, so a database is expected to hold one
+interval.
+"""
+import logging
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from model.timestamps import EXCHANGE_TZ
+from service.download_engine import CandleRequest
+
+logger = logging.getLogger(__name__)
+
+_API_FORMAT = '%Y-%m-%d %H:%M'
+
+# Most days of history getCandleData returns per call
+MAX_DAYS_PER_REQUEST = {
+    'ONE_MINUTE': 30,
+    'THREE_MINUTE': 60,
+    'FIVE_MINUTE': 100,
+    'TEN_MINUTE': 100,
+    'FIFTEEN_MINUTE': 200,
+    'THIRTY_MINUTE': 200,
+    'ONE_HOUR': 400,
+    'ONE_DAY': 2000,
+}
+
+BAR_STEP = {
+    'ONE_MINUTE': timedelta(minutes=1),
+    'THREE_MINUTE': timedelta(minutes=3),
+    'FIVE_MINUTE': timedelta(minutes=5),
+    'TEN_MINUTE': timedelta(minutes=10),
+    'FIFTEEN_MINUTE': timedelta(minutes=15),
+    'THIRTY_MINUTE': timedelta(minutes=30),
+    'ONE_HOUR': timedelta(hours=1),
+    'ONE_DAY': timedelta(days=1),
+}
+
+_MINUTE = timedelta(minutes=1)
+
+Range = Tuple[datetime, datetime]
+
+
+@dataclass
+class BackfillWindow:
+    """One getCandleData call worth of missing history (start and end inclusive, exchange time)."""
+    symbol: str
+    token: str
+    interval: str
+    start: datetime
+    end: datetime
+
+    def request(self) -> CandleRequest:
+        return CandleRequest(self.symbol, self.token, self.start.strftime(_API_FORMAT),
+                             self.end.strftime(_API_FORMAT), self.interval)
+
+
+def ensure_window_columns(conn: sqlite3.Connection):
+    """Add the interval/window columns to an existing download_log."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(download_log)")}
+    for name in ('interval', 'window_start', 'window_end'):
+        if name not in columns:
+            conn.execute(f"ALTER TABLE download_log ADD COLUMN {name} TEXT")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_download_log_window
+        ON download_log(symbol, interval, status, window_start)
+    """)
+    conn.commit()
+
+
+class BackfillPlanner:
+    """Plan and record windowed downloads against a stock database."""
+
+    def __init__(self, conn: sqlite3.Connection, table: str = 'stock_data', min_gap_weekdays: int = 2):
+        """
+        Initialize backfill planner.
+
+        Args:
+            conn: Connection to the stock database (writable for record())
+            table: Bars table with symbol and datetime columns
+            min_gap_weekdays: Missing weekdays between two bars that make a hole;
+                single missing weekdays are taken to be exchange holidays
+        """
+        self.conn = conn
+        self.table = table
+        self.min_gap_weekdays = min_gap_weekdays
+
+    def plan(
+        self,
+        symbol: str,
+        token: str,
+        interval: str,
+        start: datetime,
+        end: datetime
+    ) -> List[BackfillWindow]:
+        """
+        Windows still needed to cover [start, end] for one symbol.
+
+        Args:
+            symbol: Stock symbol
+            token: Instrument token
+            interval: Angel One interval name
+            start: First wanted bar time (exchange time, naive)
+            end: Last wanted bar time (exchange time, naive)
+
+        Returns:
+            Windows in chronological order, each within the per-request limit
+        """
+        windows = []
+        for lo, hi in self.missing_ranges(symbol, interval, start, end):
+            windows.extend(split_range(symbol, token, interval, lo, hi))
+        return windows
+
+    def plan_many(
+        self,
+        tokens: Mapping[str, str],
+        interval: str,
+        start: datetime,
+        end: datetime,
+        symbols: Optional[Iterable[str]] = None
+    ) -> List[BackfillWindow]:
+        """Windows for many symbols, oldest window of every symbol first."""
+        planned = [self.plan(s, tokens[s], interval, start, end) for s in (symbols or tokens) if tokens.get(s)]
+        # Interleave symbols so an interrupted run leaves every symbol partly done
+        windows = []
+        for depth in range(max((len(p) for p in planned), default=0)):
+            windows.extend(p[depth] for p in planned if depth < len(p))
+        return windows
+
+    def missing_ranges(self, symbol: str, interval: str, start: datetime, end: datetime) -> List[Range]:
+        """Parts of [start, end] neither stored nor recorded as completed."""
+        covered = self.completed_windows(symbol, interval) + self.stored_ranges(symbol, interval)
+        return _subtract([(start, end)], covered)
+
+    def stored_ranges(self, symbol: str, interval: str) -> List[Range]:
+        """Spans covered by stored bars, split at interior holes."""
+        times = self.stored_times(symbol)
+        if len(times) == 0:
+            return []
+        step = BAR_STEP.get(interval, BAR_STEP['ONE_DAY'])
+        days = times.normalize()
+        day_values = days.values.astype('datetime64[D]')
+        # Weekdays strictly between consecutive bar dates
+        gaps = np.busday_count(day_values[:-1] + 1, day_values[1:]) >= self.min_gap_weekdays
+
+        ranges = []
+        lo = times[0]
+        for k in np.flatnonzero(gaps):
+            # Cover up to the end of the last day before the hole
+            ranges.append((lo.to_pydatetime(), (days[k] + timedelta(days=1) - _MINUTE).to_pydatetime()))
+            lo = days[k + 1]
+        ranges.append((lo.to_pydatetime(), (times[-1] + step - _MINUTE).to_pydatetime()))
+        return ranges
+
+    def stored_times(self, symbol: str) -> pd.DatetimeIndex:
+        """Sorted bar times of a symbol in naive exchange time."""
+        rows = self.conn.execute(
+            f"SELECT datetime FROM {self.table} WHERE symbol = ? ORDER BY datetime", (symbol,)
+        ).fetchall()
+        return to_exchange_time([r[0] for r in rows])
+
+    def completed_windows(self, symbol: str, interval: str) -> List[Range]:
+        """Windows recorded as downloaded for a symbol and interval."""
+        try:
+            rows = self.conn.execute("""
+                SELECT window_start, window_end FROM download_log
+                WHERE symbol = ? AND interval = ? AND status = 'success' AND window_start IS NOT NULL
+            """, (symbol, interval)).fetchall()
+        except sqlite3.OperationalError:
+            # download_log predates window tracking
+            return []
+        return [(datetime.fromisoformat(a), datetime.fromisoformat(b)) for a, b in rows]
+
+    def record(
+        self,
+        window: BackfillWindow,
+        records: int,
+        error: Optional[str] = None,
+        now: Optional[datetime] = None
+    ):
+        """
+        Log a finished window in download_log.
+
+        A window reaching past now is only recorded up to now, so bars that
+        did not exist yet are requested again by the next run.
+
+        Args:
+            window: The window that was requested
+            records: Bars received
+            error: Error message for a failed window
+            now: Current exchange time (defaults to the clock)
+        """
+        now = now or pd.Timestamp.now(EXCHANGE_TZ).tz_localize(None).to_pydatetime()
+        window_end = min(window.end, now.replace(second=0, microsecond=0))
+        self.conn.execute("""
+            INSERT INTO download_log
+                (symbol, token, status, records_count, error_message, interval, window_start, window_end)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (window.symbol, window.token, 'failed' if error else 'success', records, error,
+              window.interval, window.start.isoformat(sep=' '), window_end.isoformat(sep=' ')))
+        self.conn.commit()
+
+
+def split_range(symbol: str, token: str, interval: str, start: datetime, end: datetime) -> List[BackfillWindow]:
+    """Cut [start, end] into windows no longer than one request may cover."""
+    span = timedelta(days=MAX_DAYS_PER_REQUEST.get(interval, MAX_DAYS_PER_REQUEST['ONE_DAY']))
+    windows = []
+    while start <= end:
+        window_end = min(end, start + span - _MINUTE)
+        windows.append(BackfillWindow(symbol, token, interval, start, window_end))
+        start = window_end + _MINUTE
+    return windows
+
+
+def to_exchange_time(values: List[str]) -> pd.DatetimeIndex:
+    """Parse stored datetime strings to naive exchange time."""
+    if not values:
+        return pd.DatetimeIndex([])
+    if any(_has_offset(v) for v in (values[0], values[-1])):
+        index = pd.to_datetime(values, format='ISO8601', utc=True)
+        return index.tz_convert(EXCHANGE_TZ).tz_localize(None)
+    return pd.DatetimeIndex(pd.to_datetime(values, format='ISO8601'))
+
+
+def _has_offset(value: str) -> bool:
+    tail = value[10:]
+    return tail.endswith('Z') or '+' in tail or tail.count('-') > 0
+
+
+def _subtract(ranges: List[Range], covered: List[Range]) -> List[Range]:
+    """Remove inclusive minute ranges in covered from ranges."""
+    result = []
+    for lo, hi in ranges:
+        pieces = [(lo, hi)]
+        for c_lo, c_hi in sorted(covered):
+            next_pieces = []
+            for p_lo, p_hi in pieces:
+                if c_hi < p_lo or c_lo > p_hi:
+                    next_pieces.append((p_lo, p_hi))
+                    continue
+                if c_lo > p_lo:
+                    next_pieces.append((p_lo, c_lo - _MINUTE))
+                if c_hi < p_hi:
+                    next_pieces.append((c_hi + _MINUTE, p_hi))
+            pieces = next_pieces
+        result.extend(pieces)
+    return result
@@ -0,0 +1,371 @@
+"""
+Bar Store - Memory-mapped per-symbol OHLCV column files.
+
+Each (symbol, interval) lives in one file laid out as a fixed header followed
+by six fixed-width columns, each `capacity` values long:
+
+    timestamp int64 (epoch ns) | open | high | low | close | volume (float64)
+
+Columns are read back as NumPy views of a single memory map, so strategies
+get contiguous arrays straight from the page cache with no SQL round trip or
+DataFrame construction. New bars are appended into the spare capacity at the
+end of each column; the file is only rewritten when that capacity runs out.
+
+bar_store_for(db_path) is the store kept next to a stock database. It mirrors
+that database's stock_data table: downloads rewrite a symbol's file once its
+windows are saved, and load_frames serves backtest reads from the files,
+refreshing any that no longer match the table.
+"""
+import logging
+import os
+import re
+import sqlite3
+import struct
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from model.bars import Bars
+from model.timestamps import epoch_ns
+from service.database_manager import read_ohlcv_panel
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b'TPBARS1\0'
+_VERSION = 1
+# magic, version, capacity, length, timezone name
+_HEADER = struct.Struct('<8sqqq64s')
+_HEADER_SIZE = 128
+COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+_DTYPES = (np.int64, np.float64, np.float64, np.float64, np.float64, np.float64)
+_MIN_CAPACITY = 256
+# Table mirrored by bar_store_for() stores
+DB_TABLE = 'stock_data'
+_MAX_SYMBOLS_PER_QUERY = 900
+_DATE_ONLY = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+@dataclass
+class BarSeries:
+    """Read-only column views of one stored symbol."""
+    symbol: str
+    interval: str
+    timestamps: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    tz: Optional[str] = None
+    _bars: Optional[Bars] = field(default=None, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def bars(self) -> Bars:
+        """OHLC view accepted by the strategies and PaperTradeAgent._simulate_exit."""
+        if self._bars is None:
+            self._bars = Bars(open=self.open, high=self.high, low=self.low, close=self.close)
+        return self._bars
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """Timestamps as a DatetimeIndex in the stored timezone."""
+        index = pd.DatetimeIndex(self.timestamps.view('datetime64[ns]'))
+        if self.tz:
+            index = index.tz_localize('UTC').tz_convert(self.tz)
+        return index
+
+    def to_frame(self) -> pd.DataFrame:
+        """Copy the columns into a DataFrame shaped like DatabaseManager.get_ohlcv_data."""
+        return pd.DataFrame({
+            'Open': np.array(self.open),
+            'High': np.array(self.high),
+            'Low': np.array(self.low),
+            'Close': np.array(self.close),
+            'Volume': np.array(self.volume),
+        }, index=self.index.rename('timestamp'))
+
+
+class BarStore:
+    """Directory of memory-mapped bar files, one per symbol and interval."""
+
+    def __init__(self, root: str = "resource/bars"):
+        """
+        Initialize bar store.
+
+        Args:
+            root: Directory holding <interval>/<symbol>.bars files
+        """
+        self.root = root
+
+    def path(self, symbol: str, interval: str = "ONE_DAY") -> str:
+        return os.path.join(self.root, interval, f"{symbol}.bars")
+
+    def exists(self, symbol: str, interval: str = "ONE_DAY") -> bool:
+        return os.path.isfile(self.path(symbol, interval))
+
+    def symbols(self, interval: str = "ONE_DAY") -> List[str]:
+        """List stored symbols for an interval."""
+        folder = os.path.join(self.root, interval)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(f[:-len('.bars')] for f in os.listdir(folder) if f.endswith('.bars'))
+
+    def read(self, symbol: str, interval: str = "ONE_DAY") -> BarSeries:
+        """
+        Memory-map a stored symbol.
+
+        Bars appended after this call are not visible; read again to see them.
+
+        Args:
+            symbol: Stock symbol
+            interval: Timeframe interval
+
+        Returns:
+            BarSeries whose arrays are read-only views of the file
+        """
+        path = self.path(symbol, interval)
+        raw = np.memmap(path, dtype=np.uint8, mode='r')
+        capacity, length, tz = _parse_header(bytes(raw[:_HEADER_SIZE]), path)
+        columns = [_column(raw, k, capacity, dtype)[:length] for k, dtype in enumerate(_DTYPES)]
+        return BarSeries(symbol, interval, *columns, tz=tz)
+
+    def read_many(self, symbols: List[str], interval: str = "ONE_DAY") -> Dict[str, BarSeries]:
+        """Memory-map every stored symbol in symbols; missing ones are skipped."""
+        return {s: self.read(s, interval) for s in symbols if self.exists(s, interval)}
+
+    def write(self, symbol: str, df: pd.DataFrame, interval: str = "ONE_DAY"):
+        """
+        Replace the stored bars of a symbol with df.
+
+        Args:
+            symbol: Stock symbol
+            df: DataFrame with DatetimeIndex and Open/High/Low/Close/Volume columns
+            interval: Timeframe interval
+        """
+        timestamps, values, tz = _frame_columns(df)
+        self._rewrite(symbol, interval, timestamps, values, tz, capacity=len(timestamps))
+        logger.info(f"Stored {len(timestamps)} bars for {symbol} ({interval})")
+
+    def append(self, symbol: str, df: pd.DataFrame, interval: str = "ONE_DAY") -> int:
+        """
+        Append bars newer than the last stored one.
+
+        Bars at or before the stored tail are ignored, so overlapping
+        downloads can be appended as-is. Creates the file when missing.
+
+        Args:
+            symbol: Stock symbol
+            df: DataFrame with DatetimeIndex and Open/High/Low/Close/Volume columns
+            interval: Timeframe interval
+
+        Returns:
+            Number of bars appended
+        """
+        if not self.exists(symbol, interval):
+            self.write(symbol, df, interval)
+            return len(df)
+
+        timestamps, values, tz = _frame_columns(df)
+        path = self.path(symbol, interval)
+        with open(path, 'r+b') as fh:
+            capacity, length, stored_tz = _parse_header(fh.read(_HEADER_SIZE), path)
+            if length:
+                fh.seek(_HEADER_SIZE + (length - 1) * 8)
+                last = struct.unpack('<q', fh.read(8))[0]
+                fresh = timestamps > last
+                timestamps = timestamps[fresh]
+                values = [v[fresh] for v in values]
+            count = len(timestamps)
+            if count == 0:
+                return 0
+
+            if length + count <= capacity:
+                # Fill the spare tail of every column, then publish the new length
+                for k, column in enumerate([timestamps] + values):
+                    fh.seek(_HEADER_SIZE + (k * capacity + length) * 8)
+                    fh.write(np.ascontiguousarray(column, dtype=_DTYPES[k]).tobytes())
+                fh.flush()
+                fh.seek(0)
+                fh.write(_pack_header(capacity, length + count, stored_tz))
+                return count
+
+        # Out of room: rewrite with doubled capacity
+        current = self.read(symbol, interval)
+        merged_ts = np.concatenate([current.timestamps, timestamps])
+        merged = [np.concatenate([getattr(current, name), v]) for name, v in zip(COLUMNS[1:], values)]
+        del current
+        self._rewrite(symbol, interval, merged_ts, merged, stored_tz or tz,
+                      capacity=max(2 * capacity, length + count))
+        return count
+
+    def import_panel(self, panel: Dict[str, pd.DataFrame], interval: str = "ONE_DAY"):
+        """
+        Store frames such as DatabaseManager.get_ohlcv_panel() returns.
+
+        Args:
+            panel: Dictionary mapping symbol to DataFrame
+            interval: Timeframe interval
+        """
+        for symbol, df in panel.items():
+            self.write(symbol, df, interval)
+
+    def sync_from_db(self, conn: sqlite3.Connection, symbols: List[str], interval: str = "ONE_DAY") -> List[str]:
+        """
+        Rewrite the stored bars of symbols from the stock_data table.
+
+        Args:
+            conn: Connection to the stock database
+            symbols: Symbols to copy
+            interval: Timeframe interval
+
+        Returns:
+            Symbols that had rows and were written
+        """
+        panel = read_ohlcv_panel(conn, symbols, table=DB_TABLE, time_column='datetime')
+        for symbol, df in panel.items():
+            self.write(symbol, df, interval)
+        return list(panel)
+
+    def load_frames(
+        self,
+        conn: sqlite3.Connection,
+        symbols: List[str],
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        interval: str = "ONE_DAY"
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Bars of the stock_data table, served from the memory-mapped files.
+
+        Returns what read_ohlcv_panel(conn, symbols, start, end, table='stock_data',
+        time_column='datetime', tz_naive=True) returns, except that Volume is
+        float. A file that is missing or whose row count or last bar differs
+        from the table is rewritten from it first. start and end are
+        'YYYY-MM-DD' days compared like the SQL text bounds: bars from start
+        on, before end (bars on the end day itself are excluded). Other bounds
+        are left to SQL.
+
+        Args:
+            conn: Connection to the stock database
+            symbols: Symbols to load
+            start: Inclusive lower day (optional)
+            end: Upper day (optional)
+            interval: Timeframe interval
+
+        Returns:
+            Dictionary mapping symbol to DataFrame, in the order requested;
+            symbols without rows are left out
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if any(b is not None and not _DATE_ONLY.match(str(b)) for b in (start, end)):
+            return read_ohlcv_panel(conn, symbols, start, end, table=DB_TABLE,
+                                    time_column='datetime', tz_naive=True)
+
+        stale = []
+        series = {}
+        for symbol, (count, last) in _table_extents(conn, symbols).items():
+            current = self.read(symbol, interval) if self.exists(symbol, interval) else None
+            if current is None or len(current) != count or not len(current) or current.timestamps[-1] != last:
+                stale.append(symbol)
+            else:
+                series[symbol] = current
+        if stale:
+            logger.info(f"Refreshing {len(stale)} bar file(s) from the database")
+            for symbol in self.sync_from_db(conn, stale, interval):
+                series[symbol] = self.read(symbol, interval)
+
+        lower = pd.Timestamp(start) if start is not None else None
+        upper = pd.Timestamp(end) if end is not None else None
+        frames = {}
+        for symbol in symbols:
+            if symbol not in series:
+                continue
+            df = series[symbol].to_frame()
+            index = df.index.tz_localize(None) if df.index.tz is not None else df.index
+            df.index = index.rename('datetime')
+            keep = np.ones(len(df), dtype=bool)
+            if lower is not None:
+                keep &= index >= lower
+            if upper is not None:
+                keep &= index < upper
+            if keep.any():
+                frames[symbol] = df if keep.all() else df[keep]
+        return frames
+
+    def delete(self, symbol: str, interval: str = "ONE_DAY"):
+        path = self.path(symbol, interval)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _rewrite(self, symbol, interval, timestamps, values, tz, capacity):
+        capacity = max(capacity, _MIN_CAPACITY)
+        path = self.path(symbol, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as fh:
+            fh.write(_pack_header(capacity, len(timestamps), tz))
+            for k, column in enumerate([timestamps] + list(values)):
+                fh.seek(_HEADER_SIZE + k * capacity * 8)
+                fh.write(np.ascontiguousarray(column, dtype=_DTYPES[k]).tobytes())
+            fh.truncate(_HEADER_SIZE + len(_DTYPES) * capacity * 8)
+        # Readers holding the old map keep their snapshot
+        os.replace(tmp_path, path)
+
+
+def _frame_columns(df: pd.DataFrame):
+    """Split a frame into (epoch-ns timestamps, [open, high, low, close, volume], tz name)."""
+    index = pd.DatetimeIndex(df.index)
+    tz = str(index.tz) if index.tz is not None else None
+    # asi8 is UTC for tz-aware indexes and wall time for naive ones
+    timestamps = index.as_unit('ns').asi8.astype(np.int64)
+    values = [df[col].to_numpy(dtype=float) for col in ('Open', 'High', 'Low', 'Close', 'Volume')]
+    if len(timestamps) > 1 and not (np.diff(timestamps) > 0).all():
+        order = np.argsort(timestamps, kind='stable')
+        keep = np.r_[np.diff(timestamps[order]) > 0, True]
+        order = order[keep]
+        timestamps = timestamps[order]
+        values = [v[order] for v in values]
+    return timestamps, values, tz
+
+
+def bar_store_for(db_path: str) -> BarStore:
+    """The bar store kept next to the stock database at db_path."""
+    return BarStore(os.path.join(os.path.dirname(os.path.abspath(db_path)), 'bars'))
+
+
+def _table_extents(conn: sqlite3.Connection, symbols: List[str]) -> Dict[str, tuple]:
+    """(row count, last bar as epoch ns) per symbol with rows in stock_data."""
+    extents = {}
+    for i in range(0, len(symbols), _MAX_SYMBOLS_PER_QUERY):
+        batch = symbols[i:i + _MAX_SYMBOLS_PER_QUERY]
+        rows = conn.execute(f"""
+            SELECT symbol, COUNT(*), MAX(datetime) FROM {DB_TABLE}
+            WHERE symbol IN ({', '.join('?' * len(batch))})
+            GROUP BY symbol
+        """, batch).fetchall()
+        for symbol, count, last in rows:
+            extents[symbol] = (count, epoch_ns(last))
+    return extents
+
+
+def _column(raw: np.ndarray, k: int, capacity: int, dtype) -> np.ndarray:
+    start = _HEADER_SIZE + k * capacity * 8
+    return raw[start:start + capacity * 8].view(dtype)
+
+
+def _pack_header(capacity: int, length: int, tz: Optional[str]) -> bytes:
+    header = _HEADER.pack(_MAGIC, _VERSION, capacity, length, (tz or '').encode()[:64])
+    return header.ljust(_HEADER_SIZE, b'\0')
+
+
+def _parse_header(data: bytes, path: str):
+    magic, version, capacity, length, tz = _HEADER.unpack(data[:_HEADER.size])
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"Not a bar store file: {path}")
+    tz = tz.rstrip(b'\0').decode() or None
+    return capacity, length, tz
@@ -0,0 +1,151 @@
+"""
+Connection Pool - Long-lived, thread-safe SQLite connections shared per database file.
+"""
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Tuple
+
+from service.sqlite_bulk import apply_write_pragmas
+
+logger = logging.getLogger(__name__)
+
+# Per-connection cache of prepared statements (sqlite3 default is 128)
+STATEMENT_CACHE_SIZE = 256
+
+# Settings that are safe on a read-only connection
+READ_PRAGMAS = (
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+)
+
+
+class ConnectionPool:
+    """
+    Hands every thread its own persistent connection to one database file.
+
+    SQLite connections must not be shared between threads that use them
+    concurrently, so each thread gets a dedicated connection that stays open
+    for the life of the pool. Reusing it keeps the parsed schema and the
+    prepared-statement cache warm across calls. Connections owned by
+    threads that have finished are closed the next time a thread connects.
+
+    A forked child does not reuse the connections it inherited: the first
+    call in a new process forgets them (without closing the parent's
+    handles) and opens its own.
+    """
+
+    def __init__(self, db_path: str, read_only: bool = False, timeout: float = 30.0):
+        """
+        Initialize the pool.
+
+        Args:
+            db_path: Path to SQLite database file
+            read_only: Open connections in read-only mode
+            timeout: Seconds to wait on a locked database
+        """
+        self.db_path = db_path
+        self.read_only = read_only
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._pid = os.getpid()
+
+    def connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use."""
+        self._check_pid()
+        thread = threading.current_thread()
+        conn = self._connections.get(thread)
+        if conn is not None:
+            return conn
+
+        conn = self._open()
+        with self._lock:
+            self._close_dead_threads()
+            self._connections[thread] = conn
+        return conn
+
+    def close_current(self):
+        """Close the calling thread's connection; it reconnects on its next call."""
+        self._check_pid()
+        with self._lock:
+            conn = self._connections.pop(threading.current_thread(), None)
+        if conn is not None:
+            conn.close()
+            logger.debug(f"Closed connection to {self.db_path}")
+
+    def close_all(self):
+        """Close every connection; threads reconnect on their next call."""
+        self._check_pid()
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for conn in connections:
+            conn.close()
+        if connections:
+            logger.debug(f"Closed {len(connections)} connection(s) to {self.db_path}")
+
+    def __len__(self) -> int:
+        self._check_pid()
+        return len(self._connections)
+
+    def _open(self) -> sqlite3.Connection:
+        # check_same_thread is off only so close_all() can close connections of
+        # other threads; each connection is still used by a single thread.
+        if self.read_only:
+            uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=self.timeout, check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+            for pragma in READ_PRAGMAS:
+                conn.execute(pragma)
+        else:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+            apply_write_pragmas(conn)
+        logger.debug(f"Opened {'read-only ' if self.read_only else ''}connection to {self.db_path}")
+        return conn
+
+    def _check_pid(self):
+        # After a fork the child's main thread is the parent's Thread object, so
+        # it would otherwise be handed the parent's connection
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._connections = {}
+            self._pid = os.getpid()
+
+    def _close_dead_threads(self):
+        for thread in [t for t in self._connections if not t.is_alive()]:
+            self._connections.pop(thread).close()
+
+
+_POOLS: Dict[Tuple[str, bool], ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(db_path: str, read_only: bool = False) -> ConnectionPool:
+    """
+    Return the process-wide pool for a database file.
+
+    Args:
+        db_path: Path to SQLite database file
+        read_only: Whether the pool hands out read-only connections
+
+    Returns:
+        Shared ConnectionPool
+    """
+    key = (os.path.abspath(db_path), read_only)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, read_only=read_only)
+            _POOLS[key] = pool
+        return pool
+
+
+def close_all_pools():
+    """Close the connections of every shared pool."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+    for pool in pools:
+        pool.close_all()
@@ -0,0 +1,384 @@
+"""
+Data Catalog - Persistent manifest of the CSV files and database symbols available for analysis.
+
+The catalog records symbol, path, interval, first/last date, row count and a
+content fingerprint for every CSV under resource/<folder> and every symbol in
+the stock database, so the UI can list and size data without parsing it.
+Entries are refreshed incrementally: a folder is only re-listed when its mtime
+changes, and a file is parsed the first time its details are asked for and
+again when its size or mtime changes.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from service.connection_pool import get_pool
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RESOURCE_DIR = os.path.join(PROJECT_ROOT, 'resource')
+DEFAULT_CATALOG_PATH = os.path.join(RESOURCE_DIR, '.cache', 'catalog.json')
+
+_CATALOG_VERSION = 2
+
+
+@dataclass
+class CatalogEntry:
+    """One CSV file or one database symbol."""
+    symbol: str
+    path: str
+    interval: str
+    first_date: Optional[str]
+    last_date: Optional[str]
+    rows: int
+    fingerprint: str
+    size: int = 0
+    mtime_ns: int = 0
+    # False until the file was parsed; only symbol and path are known before
+    scanned: bool = True
+
+
+class DataCatalog:
+    """Manifest of CSV files per resource folder and symbols per database."""
+
+    def __init__(self, catalog_path: str = DEFAULT_CATALOG_PATH, resource_dir: str = RESOURCE_DIR):
+        """
+        Initialize the catalog, loading the saved manifest if present.
+
+        Args:
+            catalog_path: JSON file the catalog is persisted to
+            resource_dir: Directory holding the CSV folders
+        """
+        self.catalog_path = catalog_path
+        self.resource_dir = resource_dir
+        self._lock = threading.RLock()
+        # folder -> file name -> entry
+        self._files: Dict[str, Dict[str, CatalogEntry]] = {}
+        self._folder_mtimes: Dict[str, int] = {}
+        # db path -> symbol -> entry
+        self._db: Dict[str, Dict[str, CatalogEntry]] = {}
+        self._db_signatures: Dict[str, List[int]] = {}
+        self._load()
+
+    # ── CSV files ─────────────────────────────────────────────────────────
+    def refresh(self, folder: str = 'data', force: bool = False) -> bool:
+        """
+        Bring the file list of one resource folder up to date.
+
+        The folder is only re-listed when its mtime changed (files added,
+        removed or renamed); otherwise this costs one stat. Files are not
+        parsed here: entry() scans a file the first time its details are
+        needed and again after it changed.
+
+        Args:
+            folder: Folder name under the resource directory
+            force: Re-list the folder and re-stat every file even if the
+                folder's mtime is unchanged
+
+        Returns:
+            True when any entry changed
+        """
+        folder_dir = os.path.join(self.resource_dir, folder)
+        with self._lock:
+            if not os.path.isdir(folder_dir):
+                changed = bool(self._files.pop(folder, None))
+                self._folder_mtimes.pop(folder, None)
+                if changed:
+                    self._save()
+                return changed
+
+            dir_mtime = os.stat(folder_dir).st_mtime_ns
+            if not force and folder in self._files and self._folder_mtimes.get(folder) == dir_mtime:
+                return False
+
+            entries = self._files.setdefault(folder, {})
+            names = {f for f in os.listdir(folder_dir) if f.lower().endswith('.csv')}
+            changed = False
+            for name in set(entries) - names:
+                del entries[name]
+                changed = True
+            for name in names:
+                path = os.path.join(folder_dir, name)
+                entry = entries.get(name)
+                if entry is not None and entry.path == path and not (force and _is_stale(entry)):
+                    continue
+                entries[name] = _unscanned(path, name)
+                changed = True
+
+            changed |= self._folder_mtimes.get(folder) != dir_mtime
+            self._folder_mtimes[folder] = dir_mtime
+            if changed:
+                self._save()
+            return changed
+
+    def files(self, folder: str = 'data') -> List[str]:
+        """CSV file names in a resource folder, sorted by name."""
+        self.refresh(folder)
+        return sorted(self._files.get(folder, {}))
+
+    def entry(self, file_name: str, folder: str = 'data') -> Optional[CatalogEntry]:
+        """Entry of a CSV file by exact name, scanning the file if it is new or changed."""
+        self.refresh(folder)
+        with self._lock:
+            entry, scanned = self._scanned(folder, file_name)
+            if scanned:
+                self._save()
+            return entry
+
+    def entries(self, folder: str = 'data', scan: bool = True) -> List[CatalogEntry]:
+        """
+        All entries of a resource folder, sorted by file name.
+
+        Args:
+            folder: Folder name under the resource directory
+            scan: Scan new and changed files; without it only symbol and
+                path are guaranteed
+        """
+        self.refresh(folder)
+        with self._lock:
+            folder_entries = self._files.get(folder, {})
+            if not scan:
+                return [folder_entries[name] for name in sorted(folder_entries)]
+            result, any_scanned = [], False
+            for name in sorted(folder_entries):
+                entry, scanned = self._scanned(folder, name)
+                result.append(entry)
+                any_scanned |= scanned
+            if any_scanned:
+                self._save()
+            return result
+
+    def rows(self, file_name: str, folder: str = 'data') -> int:
+        """Row count of a CSV file (0 when unknown)."""
+        entry = self.entry(file_name, folder)
+        return entry.rows if entry else 0
+
+    def resolve(self, file_name: str, folder: str = 'data') -> Optional[str]:
+        """
+        Path of the CSV whose name matches file_name.
+
+        An exact file name wins; otherwise the first file (by name) containing
+        file_name, case-insensitively.
+        """
+        self.refresh(folder)
+        folder_entries = self._files.get(folder, {})
+        if file_name in folder_entries:
+            return folder_entries[file_name].path
+        needle = file_name.lower()
+        for name in sorted(folder_entries):
+            if needle in name.lower():
+                return folder_entries[name].path
+        return None
+
+    def _scanned(self, folder: str, name: str):
+        """(entry, whether it was scanned now) for a listed file; call under the lock."""
+        entries = self._files.get(folder, {})
+        entry = entries.get(name)
+        if entry is None:
+            return None, False
+        try:
+            stat = os.stat(entry.path)
+        except FileNotFoundError:
+            return entry, False
+        if entry.scanned and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+            return entry, False
+        entry = entries[name] = _scan_csv(entry.path, name, stat)
+        return entry, True
+
+    # ── Database symbols ──────────────────────────────────────────────────
+    def refresh_db(self, db_path: str) -> bool:
+        """
+        Update the symbols recorded for a stock database with one aggregate query.
+
+        Args:
+            db_path: Path to a database with a stock_data table
+
+        Returns:
+            True when any entry changed
+        """
+        if not os.path.exists(db_path):
+            return False
+        key = os.path.abspath(db_path)
+        # Commits touch the database or its WAL file; skip the query when neither moved
+        signature = _file_signature(db_path) + _file_signature(db_path + '-wal')
+        if key in self._db and self._db_signatures.get(key) == signature:
+            return False
+        try:
+            conn = get_pool(db_path, read_only=True).connection()
+            rows = conn.execute("""
+                SELECT symbol, COUNT(*), MIN(datetime), MAX(datetime)
+                FROM stock_data
+                GROUP BY symbol
+            """).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error cataloguing {db_path}: {e}")
+            return False
+
+        fresh = {
+            symbol: CatalogEntry(
+                symbol=symbol,
+                path=key,
+                interval='ONE_DAY',
+                first_date=first,
+                last_date=last,
+                rows=count,
+                fingerprint=_fingerprint_text(f"{count}|{first}|{last}"),
+            )
+            for symbol, count, first, last in rows
+        }
+        with self._lock:
+            changed = self._db.get(key) != fresh
+            self._db[key] = fresh
+            self._db_signatures[key] = signature
+            self._save()
+            return changed
+
+    def db_symbols(self, db_path: str, min_rows: int = 0) -> List[str]:
+        """Symbols with at least min_rows rows in a stock database."""
+        self.refresh_db(db_path)
+        entries = self._db.get(os.path.abspath(db_path), {})
+        return sorted(s for s, e in entries.items() if e.rows >= min_rows)
+
+    def db_entry(self, db_path: str, symbol: str) -> Optional[CatalogEntry]:
+        return self._db.get(os.path.abspath(db_path), {}).get(symbol)
+
+    # ── Persistence ───────────────────────────────────────────────────────
+    def _load(self):
+        if not os.path.isfile(self.catalog_path):
+            return
+        try:
+            with open(self.catalog_path, 'r', encoding='utf-8') as fh:
+                data = json.load(fh)
+            if data.get('version') != _CATALOG_VERSION:
+                return
+            self._folder_mtimes = {k: int(v) for k, v in data.get('folder_mtimes', {}).items()}
+            self._files = {
+                folder: {name: CatalogEntry(**e) for name, e in entries.items()}
+                for folder, entries in data.get('files', {}).items()
+            }
+            self._db = {
+                db: {symbol: CatalogEntry(**e) for symbol, e in entries.items()}
+                for db, entries in data.get('db', {}).items()
+            }
+            self._db_signatures = data.get('db_signatures', {})
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable data catalog {self.catalog_path}: {e}")
+            self._files, self._folder_mtimes, self._db, self._db_signatures = {}, {}, {}, {}
+
+    def _save(self):
+        data = {
+            'version': _CATALOG_VERSION,
+            'folder_mtimes': self._folder_mtimes,
+            'files': {f: {n: asdict(e) for n, e in entries.items()} for f, entries in self._files.items()},
+            'db': {d: {s: asdict(e) for s, e in entries.items()} for d, entries in self._db.items()},
+            'db_signatures': self._db_signatures,
+        }
+        tmp_path = f"{self.catalog_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.catalog_path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(data, fh)
+            os.replace(tmp_path, self.catalog_path)
+        except OSError as e:
+            logger.warning(f"Could not save data catalog {self.catalog_path}: {e}")
+
+
+def _scan_csv(path: str, name: str, stat: os.stat_result) -> CatalogEntry:
+    """Parse a CSV once to record its symbol, dates and row count."""
+    from utility.file_util import get_security_name
+    from utility.utility import load_data
+
+    with open(path, 'rb') as fh:
+        fingerprint = hashlib.blake2b(fh.read(), digest_size=16).hexdigest()
+    try:
+        df = load_data(path)
+        index = df.index.dropna()
+        first = index.min().isoformat() if len(index) else None
+        last = index.max().isoformat() if len(index) else None
+        rows = len(df)
+        interval = _infer_interval(index)
+    except Exception as e:
+        logger.warning(f"Could not catalogue {path}: {e}")
+        first, last, rows, interval = None, None, 0, 'UNKNOWN'
+    return CatalogEntry(
+        symbol=get_security_name(name),
+        path=path,
+        interval=interval,
+        first_date=first,
+        last_date=last,
+        rows=rows,
+        fingerprint=fingerprint,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+    )
+
+
+def _unscanned(path: str, name: str) -> CatalogEntry:
+    """Entry of a listed file that has not been parsed yet."""
+    from utility.file_util import get_security_name
+
+    return CatalogEntry(symbol=get_security_name(name), path=path, interval='UNKNOWN', first_date=None,
+                        last_date=None, rows=0, fingerprint='', scanned=False)
+
+
+def _is_stale(entry: CatalogEntry) -> bool:
+    """True when a scanned file's size or mtime no longer match its entry."""
+    if not entry.scanned:
+        return False
+    try:
+        stat = os.stat(entry.path)
+    except FileNotFoundError:
+        return True
+    return entry.size != stat.st_size or entry.mtime_ns != stat.st_mtime_ns
+
+
+def _infer_interval(index: pd.DatetimeIndex) -> str:
+    """Name the bar interval from the median spacing of the index."""
+    if len(index) < 2:
+        return 'UNKNOWN'
+    step = pd.Series(index.sort_values()).diff().median()
+    if step >= pd.Timedelta(hours=20):
+        return 'ONE_DAY'
+    minutes = int(round(step / pd.Timedelta(minutes=1)))
+    return {1: 'ONE_MINUTE', 5: 'FIVE_MINUTE', 15: 'FIFTEEN_MINUTE',
+            30: 'THIRTY_MINUTE', 60: 'ONE_HOUR'}.get(minutes, f'{minutes}_MINUTE')
+
+
+def _file_signature(path: str) -> List[int]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return [0, 0]
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _fingerprint_text(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+_instance: Optional[DataCatalog] = None
+_instance_lock = threading.Lock()
+
+
+def get_catalog() -> DataCatalog:
+    """Get or create the process-wide DataCatalog."""
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = DataCatalog()
+        return _instance
+
+
+def reset_catalog():
+    """Drop the process-wide instance. Useful for testing."""
+    global _instance
+    with _instance_lock:
+        _instance = None
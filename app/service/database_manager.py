@@ -5,31 +5,133 @@ import logging
 import sqlite3
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Dict, Iterable, List, Optional
 
+import numpy as np
 import pandas as pd
 
+from model.timestamps import normalize_index
+from service.connection_pool import ConnectionPool, get_pool
+from service.sqlite_bulk import bulk_insert, ohlcv_rows, timestamp_strings
+
 logger = logging.getLogger(__name__)
 
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds
+_MAX_SYMBOLS_PER_QUERY = 900
+
+
+def read_ohlcv_panel(
+    conn: sqlite3.Connection,
+    symbols: Iterable[str],
+    start=None,
+    end=None,
+    table: str = "ohlcv_data",
+    time_column: str = "timestamp",
+    interval: Optional[str] = None,
+    tz_naive: bool = False
+) -> Dict[str, pd.DataFrame]:
+    """
+    Load OHLCV rows for many symbols with one scan and split them per symbol.
+    
+    Rows come back ordered by (symbol, time), so every symbol is a contiguous
+    block of a single panel frame. The returned frames are iloc slices of
+    that panel and share its memory; copy one before modifying it.
+    
+    Args:
+        conn: Open SQLite connection
+        symbols: Symbols to load
+        start: Inclusive lower bound on the time column (optional)
+        end: Inclusive upper bound on the time column (optional)
+        table: Table holding the bars
+        time_column: Name of the time column in that table
+        interval: Timeframe filter for tables with an interval column (optional)
+        tz_naive: Drop timezone information from the index
+    
+    Returns:
+        Dictionary mapping symbol to DataFrame (Open, High, Low, Close, Volume),
+        in the order requested; symbols without rows are left out
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+    
+    chunks = []
+    for i in range(0, len(symbols), _MAX_SYMBOLS_PER_QUERY):
+        batch = symbols[i:i + _MAX_SYMBOLS_PER_QUERY]
+        query = f"""
+            SELECT symbol, {time_column}, open, high, low, close, volume
+            FROM {table}
+            WHERE symbol IN ({', '.join('?' * len(batch))})
+        """
+        params = list(batch)
+        if interval is not None:
+            query += " AND interval = ?"
+            params.append(interval)
+        if start is not None:
+            query += f" AND {time_column} >= ?"
+            params.append(start)
+        if end is not None:
+            query += f" AND {time_column} <= ?"
+            params.append(end)
+        query += f" ORDER BY symbol, {time_column}"
+        chunks.append(pd.read_sql_query(query, conn, params=params))
+    
+    raw = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+    if raw.empty:
+        return {}
+    
+    # Symbols share trading dates, so parse each distinct time string once
+    codes, distinct = pd.factorize(raw[time_column])
+    index = normalize_index(distinct).rename(time_column).take(codes)
+    if tz_naive and index.tz is not None:
+        index = index.tz_localize(None)
+    panel = raw[['open', 'high', 'low', 'close', 'volume']]
+    panel.columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+    panel.index = index
+    
+    # Contiguous block boundaries per symbol
+    keys = raw['symbol'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    stops = np.r_[starts[1:], len(keys)]
+    blocks = {keys[a]: (a, b) for a, b in zip(starts, stops)}
+    
+    return {
+        symbol: panel.iloc[blocks[symbol][0]:blocks[symbol][1]]
+        for symbol in symbols if symbol in blocks
+    }
+
 
 class DatabaseManager:
     """Manage OHLCV data storage in SQLite database."""
     
-    def __init__(self, db_path: str = "market_data.db"):
+    def __init__(
+        self,
+        db_path: str = "market_data.db",
+        read_only: bool = False,
+        pool: Optional[ConnectionPool] = None
+    ):
         """
         Initialize database manager.
         
         Args:
             db_path: Path to SQLite database file
+            read_only: Only read from an existing database (no schema setup)
+            pool: Connection pool to use (defaults to the shared pool for db_path)
         """
         self.db_path = db_path
-        self.conn: Optional[sqlite3.Connection] = None
-        self._initialize_db()
+        self.read_only = read_only
+        self.pool = pool or get_pool(db_path, read_only=read_only)
+        if not read_only:
+            self._initialize_db()
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Persistent connection of the calling thread."""
+        return self.pool.connection()
     
     def _initialize_db(self):
         """Create database tables if they don't exist."""
         try:
-            self.conn = sqlite3.connect(self.db_path)
             cursor = self.conn.cursor()
             
             # Create stocks table
@@ -123,30 +225,22 @@ class DatabaseManager:
                 logger.warning(f"Empty DataFrame provided for {symbol}")
                 return
             
-            cursor = self.conn.cursor()
-            
-            # Prepare data for insertion
-            records = []
-            for timestamp, row in df.iterrows():
-                records.append((
-                    symbol,
-                    timestamp,
-                    float(row['Open']),
-                    float(row['High']),
-                    float(row['Low']),
-                    float(row['Close']),
-                    int(row['Volume']),
-                    interval
-                ))
+            # Build rows column by column instead of iterating over the frame
+            records = ohlcv_rows(
+                symbol,
+                timestamp_strings(df.index),
+                df,
+                ('Open', 'High', 'Low', 'Close', 'Volume'),
+                interval
+            )
             
-            # Insert or replace records
-            cursor.executemany("""
+            # Insert or replace records in a single transaction
+            bulk_insert(self.conn, """
                 INSERT OR REPLACE INTO ohlcv_data 
                 (symbol, timestamp, open, high, low, close, volume, interval)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """, records)
             
-            self.conn.commit()
             logger.info(f"Saved {len(records)} records for {symbol}")
             
         except Exception as e:
@@ -197,8 +291,8 @@ class DatabaseManager:
                 logger.warning(f"No data found for {symbol}")
                 return None
             
-            # Convert timestamp to datetime and set as index
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            # Convert timestamp to the canonical index (see model.timestamps) and set as index
+            df['timestamp'] = normalize_index(df['timestamp'])
             df.set_index('timestamp', inplace=True)
             
             # Rename columns to match expected format
@@ -211,6 +305,34 @@ class DatabaseManager:
             logger.error(f"Error retrieving data for {symbol}: {e}")
             return None
     
+    def get_ohlcv_panel(
+        self,
+        symbols: List[str],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        interval: str = "ONE_DAY"
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Retrieve OHLCV data for many symbols with a single query.
+        
+        Args:
+            symbols: Stock symbols
+            start: Start date (optional)
+            end: End date (optional)
+            interval: Timeframe interval
+        
+        Returns:
+            Dictionary mapping symbol to DataFrame; symbols without data are omitted
+        """
+        try:
+            panel = read_ohlcv_panel(self.conn, symbols, start, end, interval=interval)
+            logger.info(f"Retrieved {sum(len(df) for df in panel.values())} records "
+                        f"for {len(panel)}/{len(symbols)} symbols")
+            return panel
+        except Exception as e:
+            logger.error(f"Error retrieving panel data: {e}")
+            return {}
+    
     def get_all_symbols(self) -> List[str]:
         """
         Get list of all symbols in database.
@@ -326,7 +448,11 @@ class DatabaseManager:
             raise
     
     def close(self):
-        """Close database connection."""
-        if self.conn:
-            self.conn.close()
-            logger.info("Database connection closed")
+        """
+        Close this thread's pooled connection; later calls reconnect on demand.
+
+        The pool is shared by every DatabaseManager in the process, so other
+        threads keep their connections; close_all_pools() is for shutdown.
+        """
+        self.pool.close_current()
+        logger.info("Database connection closed")
@@ -0,0 +1,292 @@
+"""
+Download Engine - Concurrent Angel One historical candle downloads under a shared rate limit.
+
+Requests go through one TokenBucket tuned to the getCandleData quota
+(3 requests/second), with a bounded number of requests in flight. Rate-limit
+responses pause the bucket with exponential backoff and lower its rate; the
+rate recovers as requests succeed again. Finished downloads are yielded on
+the caller's thread as they complete, so database writes for one symbol
+overlap the requests of the next ones.
+
+The engine only needs an object with getCandleData(params) -> dict, so it runs
+against a SmartConnect session or a local fake in tests.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Angel One SmartAPI historical data limit
+CANDLE_REQUESTS_PER_SECOND = 3.0
+CANDLE_COLUMNS = ['DateTime', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class TokenBucket:
+    """Thread-safe token bucket with pause and adaptive rate."""
+
+    def __init__(
+        self,
+        rate: float = CANDLE_REQUESTS_PER_SECOND,
+        capacity: Optional[float] = None,
+        min_rate: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Initialize the bucket full.
+
+        Args:
+            rate: Tokens added per second (the sustained request rate)
+            capacity: Largest burst (defaults to rate, at least 1)
+            min_rate: Floor for throttle() (defaults to rate / 8)
+            clock: Monotonic time source
+            sleep: Sleep function
+        """
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.min_rate = min_rate if min_rate is not None else rate / 8
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it."""
+        while True:
+            with self._lock:
+                now = self._refill()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    delay = (1 - self._tokens) / self.rate
+            self._sleep(delay)
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for the next seconds and drop any saved burst."""
+        with self._lock:
+            now = self._refill()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+
+    def throttle(self, seconds: float):
+        """React to a rate-limit response: pause, then continue at half the rate."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+        self.pause(seconds)
+
+    def recover(self):
+        """Step the rate back towards base_rate after a successful request."""
+        with self._lock:
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
+    def _refill(self) -> float:
+        now = self._clock()
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+        return now
+
+
+@dataclass
+class CandleRequest:
+    """One getCandleData call."""
+    symbol: str
+    token: str
+    from_date: str
+    to_date: str
+    interval: str = 'ONE_DAY'
+    exchange: str = 'NSE'
+
+    def params(self) -> Dict[str, str]:
+        return {
+            "exchange": self.exchange,
+            "symboltoken": self.token,
+            "interval": self.interval,
+            "fromdate": self.from_date,
+            "todate": self.to_date
+        }
+
+
+@dataclass
+class CandleResult:
+    """Outcome of one CandleRequest after retries."""
+    request: CandleRequest
+    df: Optional[pd.DataFrame] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    rate_limited: int = 0
+
+    @property
+    def symbol(self) -> str:
+        return self.request.symbol
+
+    @property
+    def ok(self) -> bool:
+        return self.df is not None and not self.df.empty
+
+    @property
+    def answered(self) -> bool:
+        """The broker answered successfully, possibly with no bars."""
+        return self.df is not None
+
+
+@dataclass
+class DownloadStats:
+    """Totals of one DownloadEngine.run()."""
+    success_count: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)
+    rate_limit_count: int = 0
+    requests: int = 0
+    elapsed: float = 0.0
+
+
+class DownloadEngine:
+    """Fetch many CandleRequests concurrently through a shared TokenBucket."""
+
+    def __init__(
+        self,
+        client: Any,
+        limiter: Optional[TokenBucket] = None,
+        max_in_flight: int = 4,
+        max_retries: int = 4,
+        backoff: float = 1.0,
+        max_backoff: float = 30.0
+    ):
+        """
+        Initialize download engine.
+
+        Args:
+            client: Logged-in SmartConnect (or anything with getCandleData)
+            limiter: Shared rate limiter (defaults to the documented candle quota)
+            max_in_flight: Most requests outstanding at once
+            max_retries: Retries per request after a rate-limit response
+            backoff: First pause after a rate-limit response, in seconds
+            max_backoff: Longest pause
+        """
+        self.client = client
+        self.limiter = limiter or TokenBucket()
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def iter_results(self, requests: Iterable[CandleRequest]) -> Iterator[CandleResult]:
+        """
+        Yield results in completion order, on the calling thread.
+
+        At most max_in_flight requests run at a time. The next request is
+        submitted before each result is yielded, so work done by the caller
+        (saving to the database, updating progress) overlaps the downloads.
+        """
+        pending_requests = iter(requests)
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='candles') as executor:
+            in_flight = set()
+
+            def submit_next() -> bool:
+                request = next(pending_requests, None)
+                if request is None:
+                    return False
+                in_flight.add(executor.submit(self.fetch, request))
+                return True
+
+            for _ in range(self.max_in_flight):
+                if not submit_next():
+                    break
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.discard(future)
+                    submit_next()
+                    yield future.result()
+
+    def run(
+        self,
+        requests: Iterable[CandleRequest],
+        on_result: Optional[Callable[[CandleResult], None]] = None
+    ) -> DownloadStats:
+        """
+        Download everything, handing each result to on_result as it arrives.
+
+        Args:
+            requests: Requests to make
+            on_result: Called on this thread for every result (e.g. the DB write)
+
+        Returns:
+            DownloadStats for the run
+        """
+        stats = DownloadStats()
+        started = time.monotonic()
+        for result in self.iter_results(requests):
+            stats.requests += result.attempts
+            stats.rate_limit_count += result.rate_limited
+            if result.ok:
+                stats.success_count += 1
+            else:
+                stats.failed[result.symbol] = result.error or "No data available"
+            if on_result:
+                try:
+                    on_result(result)
+                except Exception as e:
+                    logger.error(f"Error handling download of {result.symbol}: {e}")
+                    stats.failed[result.symbol] = str(e)
+        stats.elapsed = time.monotonic() - started
+        return stats
+
+    def fetch(self, request: CandleRequest) -> CandleResult:
+        """Make one request, retrying with backoff while it is rate limited."""
+        result = CandleResult(request)
+        while True:
+            self.limiter.acquire()
+            result.attempts += 1
+            try:
+                response = self.client.getCandleData(request.params())
+            except Exception as e:
+                response = {'status': False, 'message': str(e)}
+
+            if response and response.get('status'):
+                self.limiter.recover()
+                result.df = pd.DataFrame(response.get('data') or [], columns=CANDLE_COLUMNS)
+                result.error = None if not result.df.empty else "No data available"
+                return result
+
+            message = (response.get('message') if response else None) or 'No response'
+            if not is_rate_limited(response) or result.rate_limited >= self.max_retries:
+                result.error = "Rate limit exceeded" if is_rate_limited(response) else message
+                return result
+
+            delay = min(self.max_backoff, self.backoff * 2 ** result.rate_limited)
+            result.rate_limited += 1
+            logger.warning(f"Rate limited on {request.symbol}; backing off {delay:.1f}s")
+            self.limiter.throttle(delay)
+
+
+def is_rate_limited(response: Optional[Dict]) -> bool:
+    """Whether a getCandleData response (or exception text) reports an exceeded rate."""
+    if not response:
+        return False
+    text = f"{response.get('message', '')} {response.get('errorcode', '')}".lower()
+    return 'rate' in text or 'too many' in text or '429' in text
+
+
+def candle_requests(
+    symbols: List[str],
+    tokens: Dict[str, str],
+    from_date: str,
+    to_date: str,
+    interval: str = 'ONE_DAY'
+) -> List[CandleRequest]:
+    """Build one request per symbol that has a token."""
+    return [CandleRequest(s, tokens[s], from_date, to_date, interval) for s in symbols if tokens.get(s)]
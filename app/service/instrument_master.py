@@ -0,0 +1,278 @@
+"""
+Instrument Master - Daily-cached Angel One scrip master with in-memory token lookups.
+
+OpenAPIScripMaster.json is tens of MB, so it is downloaded at most once per
+day and stored under resource/.cache as gzipped rows of the few fields the app
+uses. Lookups are answered from a dict keyed by (exch_seg, symbol,
+instrumenttype); derivative prefixes are resolved with a binary search over
+the sorted NFO symbols.
+
+If the scrip master cannot be downloaded, the last cached copy is used; with
+no copy at all lookups raise RuntimeError rather than reporting every symbol
+as unknown. TokenMap can fall back to a seed token table in that case.
+"""
+import bisect
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Mapping
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCRIP_MASTER_URL = "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json"
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CACHE_PATH = os.path.join(PROJECT_ROOT, 'resource', '.cache', 'instrument_master.json.gz')
+
+FIELDS = ('token', 'symbol', 'name', 'exch_seg', 'instrumenttype')
+_CACHE_VERSION = 1
+# After a failed download with no cached copy, wait this long before fetching again
+RETRY_AFTER_SECONDS = 300
+
+Row = Tuple[str, str, str, str, str]
+
+
+def _download_scrip_master() -> List[Dict]:
+    import requests
+
+    response = requests.get(SCRIP_MASTER_URL, timeout=60)
+    response.raise_for_status()
+    return response.json()
+
+
+class InstrumentMaster:
+    """Angel One instruments, refreshed once per day."""
+
+    def __init__(
+        self,
+        cache_path: str = DEFAULT_CACHE_PATH,
+        fetch: Callable[[], List[Dict]] = _download_scrip_master,
+        today: Callable[[], date] = date.today
+    ):
+        """
+        Initialize instrument master. Nothing is loaded until the first lookup.
+
+        Args:
+            cache_path: Gzipped JSON cache file
+            fetch: Returns the raw scrip master as a list of dicts
+            today: Current date, for the daily refresh
+        """
+        self.cache_path = cache_path
+        self._fetch = fetch
+        self._today = today
+        self._lock = threading.Lock()
+        self._loaded_for: Optional[str] = None
+        self._rows: List[Row] = []
+        self._index: Dict[Tuple[str, str, str], Row] = {}
+        self._nfo_symbols: List[str] = []
+        self._nfo_tokens: List[str] = []
+        self._failure: Optional[Tuple[float, Exception]] = None
+
+    # ── Lookups ───────────────────────────────────────────────────────────
+    def get(self, exch_seg: str, symbol: str, instrumenttype: str = '') -> Optional[Dict[str, str]]:
+        """Instrument for an exact (exch_seg, symbol, instrumenttype) key."""
+        row = self._ensure_loaded()._index.get((exch_seg, symbol, instrumenttype))
+        return dict(zip(FIELDS, row)) if row else None
+
+    def token(self, symbol: str, exch_seg: str = 'NSE') -> Optional[str]:
+        """
+        Token of an equity symbol.
+
+        Tries the symbol as an EQ instrument, then the '<symbol>-EQ' cash
+        segment listing, then the first NFO contract starting with the symbol.
+
+        Args:
+            symbol: Trading symbol such as 'INFY'
+            exch_seg: Exchange segment of the equity
+
+        Returns:
+            Token string or None if not found
+        """
+        self._ensure_loaded()
+        for key in ((exch_seg, symbol, 'EQ'), (exch_seg, f"{symbol}-EQ", ''), (exch_seg, symbol, '')):
+            row = self._index.get(key)
+            if row:
+                return row[0]
+        i = bisect.bisect_left(self._nfo_symbols, symbol)
+        if i < len(self._nfo_symbols) and self._nfo_symbols[i].startswith(symbol):
+            return self._nfo_tokens[i]
+        return None
+
+    def tokens(self, symbols: Iterable[str], exch_seg: str = 'NSE') -> Dict[str, str]:
+        """Tokens of many symbols; unresolved ones are left out."""
+        resolved = {s: self.token(s, exch_seg) for s in symbols}
+        return {s: t for s, t in resolved.items() if t}
+
+    def rows(self, exch_seg: Optional[str] = None) -> List[Dict[str, str]]:
+        """Instruments in scrip master order, optionally for one segment."""
+        self._ensure_loaded()
+        return [dict(zip(FIELDS, r)) for r in self._rows if exch_seg is None or r[3] == exch_seg]
+
+    def __len__(self) -> int:
+        return len(self._ensure_loaded()._rows)
+
+    # ── Loading ───────────────────────────────────────────────────────────
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Download the scrip master if the cache is not from today.
+
+        Returns:
+            True when a new copy was downloaded
+        """
+        with self._lock:
+            return self._refresh(force)
+
+    def _ensure_loaded(self) -> 'InstrumentMaster':
+        today = self._today().isoformat()
+        if self._loaded_for != today:
+            with self._lock:
+                if self._loaded_for != today:
+                    self._refresh(force=False)
+        return self
+
+    def _refresh(self, force: bool) -> bool:
+        today = self._today().isoformat()
+        cached = self._read_cache()
+        if cached and cached['date'] == today and not force:
+            self._build(cached['rows'], today)
+            return False
+
+        # Don't hit the network on every lookup while it is down; refresh(force=True) tries again
+        if self._failure and not force and time.monotonic() - self._failure[0] < RETRY_AFTER_SECONDS:
+            raise RuntimeError(f"Scrip master unavailable: {self._failure[1]}") from self._failure[1]
+
+        try:
+            instruments = self._fetch()
+        except Exception as e:
+            if cached:
+                logger.warning(f"Could not download scrip master ({e}); using copy from {cached['date']}")
+                self._build(cached['rows'], today)
+                return False
+            if self._rows:
+                logger.warning(f"Could not download scrip master ({e}); keeping the copy from {self._loaded_for}")
+                self._loaded_for = today
+                return False
+            self._failure = (time.monotonic(), e)
+            raise RuntimeError(f"Scrip master unavailable: {e}") from e
+
+        self._failure = None
+        rows = [[str(i.get(f) or '') for f in FIELDS] for i in instruments]
+        self._write_cache(rows, today)
+        self._build(rows, today)
+        logger.info(f"Cached {len(rows)} instruments for {today}")
+        return True
+
+    def _build(self, rows: List[List[str]], loaded_for: str):
+        self._rows = [tuple(r) for r in rows]
+        index = {}
+        for row in self._rows:
+            # First listing wins, as in a linear scan
+            index.setdefault((row[3], row[1], row[4]), row)
+        nfo = sorted((r[1], n, r[0]) for n, r in enumerate(self._rows) if r[3] == 'NFO')
+        self._index = index
+        self._nfo_symbols = [s for s, _, _ in nfo]
+        self._nfo_tokens = [t for _, _, t in nfo]
+        self._loaded_for = loaded_for
+
+    def _read_cache(self) -> Optional[Dict]:
+        if not os.path.isfile(self.cache_path):
+            return None
+        try:
+            with gzip.open(self.cache_path, 'rt', encoding='utf-8') as fh:
+                data = json.load(fh)
+            if data.get('version') != _CACHE_VERSION or data.get('fields') != list(FIELDS):
+                return None
+            return data
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable instrument cache {self.cache_path}: {e}")
+            return None
+
+    def _write_cache(self, rows: List[List[str]], for_date: str):
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as fh:
+                json.dump({'version': _CACHE_VERSION, 'date': for_date, 'fields': list(FIELDS), 'rows': rows},
+                          fh, separators=(',', ':'))
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not save instrument cache {self.cache_path}: {e}")
+
+
+class TokenMap(Mapping):
+    """
+    Read-only symbol -> token mapping for a fixed symbol universe, resolved through the instrument master.
+
+    Membership and iteration cover the universe; a symbol that neither the
+    master nor the fallback table resolves raises KeyError on lookup (so
+    .get() returns None).
+    """
+
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        master: Optional[InstrumentMaster] = None,
+        exch_seg: str = 'NSE',
+        fallback: Optional[Mapping] = None
+    ):
+        """
+        Args:
+            symbols: Symbol universe
+            master: Instrument master; the process-wide one by default
+            exch_seg: Exchange segment of the symbols
+            fallback: Seed symbol -> token table, used when the master is
+                unavailable or does not list a symbol
+        """
+        self._symbols = list(dict.fromkeys(symbols))
+        self._master = master
+        self._exch_seg = exch_seg
+        self._fallback = fallback or {}
+
+    def __getitem__(self, symbol: str) -> str:
+        if symbol not in self._symbols:
+            raise KeyError(symbol)
+        try:
+            token = (self._master or get_instrument_master()).token(symbol, self._exch_seg)
+        except RuntimeError as e:
+            if symbol not in self._fallback:
+                raise
+            logger.warning(f"Using seed token for {symbol}: {e}")
+            token = None
+        token = token or self._fallback.get(symbol)
+        if token is None:
+            raise KeyError(symbol)
+        return token
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._symbols)
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self._symbols
+
+
+_instance: Optional[InstrumentMaster] = None
+_instance_lock = threading.Lock()
+
+
+def get_instrument_master() -> InstrumentMaster:
+    """Get or create the process-wide InstrumentMaster."""
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = InstrumentMaster()
+        return _instance
+
+
+def reset_instrument_master():
+    """Drop the process-wide instance. Useful for testing."""
+    global _instance
+    with _instance_lock:
+        _instance = None
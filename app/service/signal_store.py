@@ -0,0 +1,340 @@
+"""
+Signal Store - Persistent cache of generated signals and box snapshots.
+
+Results of run_signal_pipeline are stored in SQLite keyed by
+(symbol, interval, data fingerprint, params hash):
+
+  * the data fingerprint hashes the bar timestamps and OHLC values, so any
+    new, removed or corrected bar produces a new key, and
+  * the params hash covers the SignalConfig and the source of the strategy
+    and signal modules, so changed settings or logic never hit old entries.
+
+Each symbol, interval and params keeps its max_runs most recently stored
+fingerprints (files of one symbol covering different date ranges do not
+evict each other); older ones are dropped when a new result is stored.
+
+Persistence is opt-in: get_signal_store() returns None unless a path was set
+with configure_signal_store() or the SIGNAL_STORE_PATH environment variable.
+
+Next to each result the primed strategy state is checkpointed, together with
+the fingerprint of the bars it has seen. A series that later gained bars
+whose prefix still matches that fingerprint resumes from the checkpoint and
+only the new bars go through the strategies.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import zlib
+from dataclasses import asdict, dataclass
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from model.bars import Bars
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_STORE_PATH = os.path.join(PROJECT_ROOT, 'resource', '.cache', 'signals.db')
+STORE_PATH_ENV = 'SIGNAL_STORE_PATH'
+# Stored fingerprints kept per (symbol, interval, params)
+DEFAULT_MAX_RUNS = 4
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Sources whose changes alter generated signals: the strategies, the signal
+# pipeline and every model/utility module they import
+_CODE_PATHS = ('strategy', os.path.join('agent', 'signal_generator.py'),
+               os.path.join('agent', 'signal_processor.py'), os.path.join('agent', 'signal_strength.py'),
+               os.path.join('model', 'bars.py'), os.path.join('model', 'box.py'),
+               os.path.join('model', 'box_table.py'), os.path.join('model', 'ledger.py'),
+               os.path.join('model', 'signal.py'), os.path.join('model', 'signal_batch.py'),
+               os.path.join('model', 'SignalType.py'), os.path.join('model', 'timestamps.py'),
+               os.path.join('model', 'trade.py'),
+               os.path.join('utility', 'streaming.py'), os.path.join('utility', 'utility.py'))
+_code_hash: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class SignalKey:
+    """Identity of one materialized signal run."""
+    symbol: str
+    interval: str
+    fingerprint: str
+    params_hash: str
+
+
+class SignalStore:
+    """SQLite table of pickled SignalResults."""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, max_runs: int = DEFAULT_MAX_RUNS):
+        """
+        Initialize signal store.
+
+        Args:
+            path: SQLite file holding the cache
+            max_runs: Fingerprints kept per symbol, interval and params
+        """
+        self.path = path
+        self.max_runs = max(1, int(max_runs))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._init_schema()
+
+    def __getstate__(self):
+        # Connections and locks stay with the process; workers reopen the file
+        return {'path': self.path, 'max_runs': self.max_runs}
+
+    def __setstate__(self, state):
+        self.path = state['path']
+        self.max_runs = state['max_runs']
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def key(self, df: Union[pd.DataFrame, Bars], symbol: str, config) -> SignalKey:
+        """Build the cache key of a run over df with config."""
+        return SignalKey(symbol, infer_interval(df), data_fingerprint(df), params_hash(config))
+
+    def get(self, key: SignalKey):
+        """
+        Stored SignalResult for key.
+
+        Returns:
+            SignalResult or None when missing or unreadable
+        """
+        try:
+            row = self._conn().execute("""
+                SELECT payload FROM signal_runs
+                WHERE symbol = ? AND interval = ? AND fingerprint = ? AND params_hash = ?
+            """, (key.symbol, key.interval, key.fingerprint, key.params_hash)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Signal store read failed: {e}")
+            return None
+        if row is None:
+            return None
+        try:
+            return pickle.loads(zlib.decompress(row[0]))
+        except Exception as e:
+            logger.warning(f"Dropping unreadable signal store entry for {key.symbol}: {e}")
+            return None
+
+    def put(self, key: SignalKey, result):
+        """Store result under key, dropping all but the newest max_runs of its series and params."""
+        payload = zlib.compress(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        conn = self._conn()
+        try:
+            with conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO signal_runs (symbol, interval, fingerprint, params_hash, signal_count, payload)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (key.symbol, key.interval, key.fingerprint, key.params_hash,
+                      len(result.signals), payload))
+                # rowid grows with every insert, so it orders the runs by age
+                conn.execute("""
+                    DELETE FROM signal_runs
+                    WHERE symbol = ? AND interval = ? AND params_hash = ? AND rowid NOT IN (
+                        SELECT rowid FROM signal_runs
+                        WHERE symbol = ? AND interval = ? AND params_hash = ?
+                        ORDER BY rowid DESC LIMIT ?
+                    )
+                """, (key.symbol, key.interval, key.params_hash,
+                      key.symbol, key.interval, key.params_hash, self.max_runs))
+        except sqlite3.Error as e:
+            logger.warning(f"Signal store write failed for {key.symbol}: {e}")
+
+    def get_checkpoint(self, key: SignalKey, df: Union[pd.DataFrame, Bars]):
+        """
+        Checkpointed strategy state whose bars are a strict prefix of df.
+
+        Returns:
+            StrategyState or None when there is none or the stored bars changed
+        """
+        try:
+            row = self._conn().execute("""
+                SELECT bars, fingerprint, payload FROM strategy_checkpoints
+                WHERE symbol = ? AND interval = ? AND params_hash = ?
+            """, (key.symbol, key.interval, key.params_hash)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Signal store read failed: {e}")
+            return None
+        if row is None:
+            return None
+        bars, fingerprint, payload = row
+        if bars >= len(df) or data_fingerprint(_head(df, bars)) != fingerprint:
+            return None
+        try:
+            return pickle.loads(zlib.decompress(payload))
+        except Exception as e:
+            logger.warning(f"Dropping unreadable checkpoint for {key.symbol}: {e}")
+            return None
+
+    def put_checkpoint(self, key: SignalKey, state):
+        """Store the strategy state after the bars fingerprinted in key."""
+        payload = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        try:
+            with self._conn() as conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO strategy_checkpoints
+                        (symbol, interval, params_hash, bars, fingerprint, payload)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (key.symbol, key.interval, key.params_hash, state.bars, key.fingerprint, payload))
+        except sqlite3.Error as e:
+            logger.warning(f"Checkpoint write failed for {key.symbol}: {e}")
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Drop stored runs and checkpoints of one symbol, or all of them."""
+        conn = self._conn()
+        with conn:
+            for table in ('signal_runs', 'strategy_checkpoints'):
+                if symbol is None:
+                    conn.execute(f"DELETE FROM {table}")
+                else:
+                    conn.execute(f"DELETE FROM {table} WHERE symbol = ?", (symbol,))
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM signal_runs").fetchone()[0]
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread and process; forked workers open their own
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock:
+            conn = self._conn()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS signal_runs (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    params_hash TEXT NOT NULL,
+                    signal_count INTEGER,
+                    payload BLOB NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (symbol, interval, fingerprint, params_hash)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS strategy_checkpoints (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    params_hash TEXT NOT NULL,
+                    bars INTEGER NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (symbol, interval, params_hash)
+                )
+            """)
+            conn.commit()
+
+
+def data_fingerprint(df: Union[pd.DataFrame, Bars]) -> str:
+    """Hash of bar timestamps and OHLC values."""
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(df, pd.DataFrame):
+        index = df.index
+        columns = [df[c].to_numpy(dtype=float) for c in ('Open', 'High', 'Low', 'Close')]
+    else:
+        index = df.index
+        columns = [np.asarray(c, dtype=float) for c in (df.open, df.high, df.low, df.close)]
+    if isinstance(index, pd.DatetimeIndex):
+        digest.update(str(index.tz).encode())
+        digest.update(np.ascontiguousarray(index.as_unit('ns').asi8).tobytes())
+    elif index is not None:
+        digest.update(pd.util.hash_pandas_object(pd.Index(index), index=False).to_numpy().tobytes())
+    for column in columns:
+        digest.update(np.ascontiguousarray(column).tobytes())
+    return digest.hexdigest()
+
+
+def _head(df: Union[pd.DataFrame, Bars], n: int) -> Union[pd.DataFrame, Bars]:
+    """First n bars of df."""
+    if isinstance(df, pd.DataFrame):
+        return df.iloc[:n]
+    return Bars(df.open[:n], df.high[:n], df.low[:n], df.close[:n],
+                df.index[:n] if df.index is not None else None)
+
+
+def params_hash(config) -> str:
+    """Hash of a SignalConfig together with the signal generation code."""
+    text = json.dumps(asdict(config), sort_keys=True, default=str)
+    return hashlib.blake2b(f"{text}|{_source_hash()}".encode(), digest_size=16).hexdigest()
+
+
+def infer_interval(df: Union[pd.DataFrame, Bars]) -> str:
+    """Interval label from the median bar spacing ('UNKNOWN' without a DatetimeIndex)."""
+    index = df.index
+    if not isinstance(index, pd.DatetimeIndex) or len(index) < 2:
+        return 'UNKNOWN'
+    step = pd.Timedelta(np.median(np.diff(index.as_unit('ns').asi8)), unit='ns')
+    if step >= pd.Timedelta(hours=20):
+        return 'ONE_DAY'
+    return f"{int(round(step / pd.Timedelta(minutes=1)))}_MINUTE"
+
+
+def _source_hash() -> str:
+    global _code_hash
+    if _code_hash is None:
+        digest = hashlib.blake2b(digest_size=16)
+        files = []
+        for rel in _CODE_PATHS:
+            path = os.path.join(_APP_DIR, rel)
+            if os.path.isdir(path):
+                files.extend(os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith('.py'))
+            elif os.path.isfile(path):
+                files.append(path)
+        for path in files:
+            with open(path, 'rb') as fh:
+                digest.update(fh.read())
+        _code_hash = digest.hexdigest()
+    return _code_hash
+
+
+_instance: Optional[SignalStore] = None
+_store_path: Optional[str] = None
+_instance_lock = threading.Lock()
+
+
+def configure_signal_store(path: Optional[str] = DEFAULT_STORE_PATH):
+    """Persist signals at path from now on; None falls back to SIGNAL_STORE_PATH."""
+    global _instance, _store_path
+    with _instance_lock:
+        _store_path = path
+        _instance = None
+
+
+def get_signal_store() -> Optional[SignalStore]:
+    """
+    Get or create the process-wide SignalStore.
+
+    Returns:
+        The store, or None when no path is configured (persistence is off)
+    """
+    global _instance
+    path = _store_path or os.environ.get(STORE_PATH_ENV)
+    with _instance_lock:
+        if not path:
+            return None
+        if _instance is None or _instance.path != path:
+            _instance = SignalStore(path)
+        return _instance
+
+
+def reset_signal_store():
+    """Drop the process-wide instance and configured path. Useful for testing."""
+    global _instance, _store_path
+    with _instance_lock:
+        _instance = None
+        _store_path = None
@@ -0,0 +1,132 @@
+"""
+SQLite Bulk - Columnar ingestion helpers shared by the OHLCV writers.
+"""
+import sqlite3
+from itertools import repeat
+from typing import Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Write-heavy settings: WAL lets readers continue while a load is running and
+# synchronous=NORMAL is crash-safe under WAL without an fsync per commit.
+WRITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+)
+
+
+def apply_write_pragmas(conn: sqlite3.Connection):
+    """
+    Configure a connection for bulk writes.
+
+    Args:
+        conn: Open SQLite connection
+    """
+    for pragma in WRITE_PRAGMAS:
+        conn.execute(pragma)
+
+
+def timestamp_strings(values: Iterable) -> List[str]:
+    """
+    Render timestamps as SQLite text ('YYYY-MM-DD HH:MM:SS[+HH:MM]').
+
+    Matches datetime.isoformat(' '), the form sqlite3 itself stores for
+    datetimes. Strings are passed through unchanged so values that already
+    come from the API keep their exact stored form.
+
+    Args:
+        values: Index, Series or list of datetimes and/or strings
+
+    Returns:
+        List of Python strings
+    """
+    if isinstance(values, (pd.DatetimeIndex, pd.Series)) and pd.api.types.is_datetime64_any_dtype(values):
+        return _format_datetimes(pd.DatetimeIndex(values))
+    return [v if isinstance(v, str) else pd.Timestamp(v).isoformat(' ') for v in values]
+
+
+def _format_datetimes(index: pd.DatetimeIndex) -> List[str]:
+    """Vectorized isoformat(' ') for whole-second timestamps."""
+    # The arithmetic below is on epoch nanoseconds
+    index = index.as_unit('ns')
+    if index.hasnans or (index.asi8 % 1_000_000_000).any():
+        return [ts.isoformat(' ') for ts in index]
+
+    wall = index.tz_localize(None) if index.tz is not None else index
+    text = np.datetime_as_string(wall.values.astype('datetime64[s]'), unit='s')
+    text = np.char.replace(text, 'T', ' ')
+    if index.tz is not None:
+        # UTC offset of every row; a handful of distinct values at most
+        offsets = (wall.asi8 - index.asi8) // 1_000_000_000
+        distinct, which = np.unique(offsets, return_inverse=True)
+        suffixes = np.array([_offset_text(int(sec)) for sec in distinct])
+        text = np.char.add(text, suffixes[which])
+    return text.tolist()
+
+
+def _offset_text(seconds: int) -> str:
+    sign = '+' if seconds >= 0 else '-'
+    hours, minutes = divmod(abs(seconds) // 60, 60)
+    return f"{sign}{hours:02d}:{minutes:02d}"
+
+
+def ohlcv_rows(
+    symbol: str,
+    timestamps: Sequence[str],
+    df: pd.DataFrame,
+    columns: Sequence[str],
+    *extra
+) -> List[tuple]:
+    """
+    Build executemany tuples (symbol, timestamp, open, high, low, close, volume, *extra).
+
+    Columns are converted once with tolist() so SQLite receives plain
+    Python floats and ints instead of NumPy scalars. A float volume column
+    is passed through; INTEGER column affinity stores whole values as ints.
+
+    Args:
+        symbol: Stock symbol written on every row
+        timestamps: One timestamp string per row
+        df: Source DataFrame
+        columns: Names of the open, high, low, close and volume columns
+        extra: Constant values appended to every row
+
+    Returns:
+        List of row tuples
+    """
+    open_col, high_col, low_col, close_col, volume_col = columns
+    prices = [df[col].to_numpy(dtype=float).tolist() for col in (open_col, high_col, low_col, close_col)]
+    volume = df[volume_col]
+    if pd.api.types.is_integer_dtype(volume):
+        volume = volume.to_numpy(dtype='int64').tolist()
+    else:
+        volume = volume.to_numpy(dtype=float).tolist()
+    parts = [repeat(symbol), timestamps, *prices, volume]
+    parts.extend(repeat(value) for value in extra)
+    return list(zip(*parts))
+
+
+def bulk_insert(conn: sqlite3.Connection, sql: str, rows: List[tuple]) -> int:
+    """
+    Insert rows with a single executemany inside one transaction.
+
+    Args:
+        conn: Open SQLite connection
+        sql: Parameterized INSERT statement
+        rows: Row tuples
+
+    Returns:
+        Number of rows written
+    """
+    if not rows:
+        return 0
+    try:
+        conn.executemany(sql, rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(rows)
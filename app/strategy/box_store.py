@@ -0,0 +1,146 @@
+"""
+Array-backed container for the live boxes of one FVG side.
+"""
+import math
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List
+
+import numpy as np
+
+from model.box import Box
+
+
+class BoxStore:
+    """
+    Live boxes kept in insertion order, mirrored into top/bottom arrays.
+
+    Tops and bottoms are also kept sorted so that broken, signal and nesting
+    checks become range queries instead of pairwise scans. Box prices are
+    read once on insertion and must not be mutated while the box is stored.
+    """
+
+    def __init__(self, boxes: Iterable[Box] = ()):
+        self.reset(boxes)
+
+    def reset(self, boxes: Iterable[Box] = ()):
+        """Replace the stored boxes."""
+        self._boxes: List[Box] = list(boxes)
+        self._top = np.array([b.top for b in self._boxes], dtype=float)
+        self._bottom = np.array([b.bottom for b in self._boxes], dtype=float)
+        # A freshly assigned list may contain nested boxes
+        self._nest_free = len(self._boxes) < 2
+        self._stale = True
+
+    def __len__(self) -> int:
+        return len(self._boxes)
+
+    @property
+    def boxes(self) -> List[Box]:
+        """Stored boxes in insertion order (a copy of the internal list)."""
+        return list(self._boxes)
+
+    def append(self, box: Box):
+        """Add a box at the end of the insertion order."""
+        self._boxes.append(box)
+        self._top = np.append(self._top, float(box.top))
+        self._bottom = np.append(self._bottom, float(box.bottom))
+        self._nest_free = False
+        self._stale = True
+
+    def get(self, pos: int) -> Box:
+        return self._boxes[pos]
+
+    def bottoms_above(self, price: float) -> List[int]:
+        """Positions of boxes with price < bottom, in insertion order."""
+        if self._stale:
+            self._reindex()
+        if not price < self._max_bottom:
+            return []
+        return np.flatnonzero(price < self._bottom).tolist()
+
+    def tops_below(self, price: float) -> List[int]:
+        """Positions of boxes with price > top, in insertion order."""
+        if self._stale:
+            self._reindex()
+        if not price > self._min_top:
+            return []
+        return np.flatnonzero(price > self._top).tolist()
+
+    def tops_in(self, lo: float, hi: float) -> List[int]:
+        """Positions of boxes with lo <= top < hi, in insertion order."""
+        if self._stale:
+            self._reindex()
+        if math.isnan(lo) or math.isnan(hi):
+            return []
+        i0 = bisect_left(self._top_keys, lo)
+        i1 = bisect_left(self._top_keys, hi)
+        if i1 <= i0:
+            return []
+        return sorted(self._top_order[i0:i1])
+
+    def bottoms_in(self, lo: float, hi: float) -> List[int]:
+        """Positions of boxes with lo < bottom <= hi, in insertion order."""
+        if self._stale:
+            self._reindex()
+        if math.isnan(lo) or math.isnan(hi):
+            return []
+        i0 = bisect_right(self._bottom_keys, lo)
+        i1 = bisect_right(self._bottom_keys, hi)
+        if i1 <= i0:
+            return []
+        return sorted(self._bottom_order[i0:i1])
+
+    def remove(self, positions: List[int]):
+        """Drop boxes at the given insertion positions."""
+        if not positions:
+            return
+        keep = np.ones(len(self._boxes), dtype=bool)
+        keep[positions] = False
+        self._boxes = [b for b, k in zip(self._boxes, keep) if k]
+        self._top = self._top[keep]
+        self._bottom = self._bottom[keep]
+        self._stale = True
+
+    def remove_nested(self):
+        """
+        Drop every box whose (bottom, top) range strictly contains another box's top.
+
+        All removals are decided against the full set, like the pairwise scan.
+        Once a set is nest-free, removing boxes cannot create a nesting, so the
+        query only runs again after an insertion.
+        """
+        if self._nest_free:
+            return
+        if self._stale:
+            self._reindex()
+        # Count other tops strictly inside (bottom, top); a box never counts itself
+        inside = (np.searchsorted(self._sorted_top, self._top, side='left')
+                  - np.searchsorted(self._sorted_top, self._bottom, side='right'))
+        nested = (inside > 0) & ~np.isnan(self._top) & ~np.isnan(self._bottom)
+        self.remove(np.flatnonzero(nested).tolist())
+        self._nest_free = True
+
+    def keep_last(self, count: int):
+        """Keep only the most recently inserted count boxes."""
+        excess = len(self._boxes) - max(count, 0)
+        if excess > 0:
+            self.remove(list(range(excess)))
+
+    def _reindex(self):
+        """Rebuild sorted views and extreme values after a change."""
+        self._stale = False
+        top_order = np.argsort(self._top, kind='stable')
+        bottom_order = np.argsort(self._bottom, kind='stable')
+        self._sorted_top = self._top[top_order]
+        self._sorted_bottom = self._bottom[bottom_order]
+        self._top_order = top_order.tolist()
+        self._bottom_order = bottom_order.tolist()
+        # Scalar queries bisect plain lists; NaN prices sort last and are excluded
+        self._top_keys = self._sorted_top[~np.isnan(self._sorted_top)].tolist()
+        self._bottom_keys = self._sorted_bottom[~np.isnan(self._sorted_bottom)].tolist()
+        if len(self._boxes):
+            self._max_bottom = float(np.fmax.reduce(self._bottom))
+            self._min_top = float(np.fmin.reduce(self._top))
+        else:
+            self._max_bottom = math.nan
+            self._min_top = math.nan
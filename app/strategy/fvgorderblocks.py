@@ -2,18 +2,36 @@
 # FVG Order Blocks [BigBeluga] (full logic)
 # -------------------------
 import math
-from typing import List
+from typing import Any, List, Optional, Union
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
-from pandas import DataFrame
 
+from model.bars import Bars, as_bars
 from model.box import Box, BoxType
 from model.signal import Signal
 from model.SignalType import SignalType
+from strategy.box_store import BoxStore
 from strategy.strategy import Strategy
-from utility.plot_utils import draw_candlesticks, draw_boxes, draw_signals, setup_chart_axes
-from utility.utility import atr_series, clamp
+from utility.plot_utils import draw_candlesticks, draw_boxes, draw_signals, draw_temp_boxes, setup_chart_axes
+from utility.streaming import BarBuffer, GrowableArray, RollingMax, RollingMean, ohlc_values
+from utility.utility import atr_array, clamp, rolling_max, shift_array
+
+
+class _FVGStream:
+    """Rolling state kept between FVGOrderBlocks.update() calls."""
+
+    def __init__(self, window_size: int):
+        self.bars = BarBuffer()
+        self.atr = GrowableArray()
+        self.filt_up = GrowableArray()
+        self.filt_dn = GrowableArray()
+        self.max_up = GrowableArray()
+        self.max_dn = GrowableArray()
+        self.atr_mean = RollingMean(200)
+        self.max_up_roll = RollingMax(window_size)
+        self.max_dn_roll = RollingMax(window_size)
 
 
 class FVGOrderBlocks(Strategy):
@@ -54,89 +72,214 @@ class FVGOrderBlocks(Strategy):
         self.bear_boxes: List[Box] = []
         self.temp_boxes: List[Box] = []
         self.signals: List[Signal] = []
+        self._stream: Optional[_FVGStream] = None
 
-    def run(self, df: pd.DataFrame):
-        """
-        df: DataFrame with columns ['Open','High','Low','Close'] indexed by date
-        After run, self.bull_boxes, self.bear_boxes and self.signals will be populated.
-        """
-        # Reset state for new run
+    def reset(self):
+        """Discard boxes, signals and any incremental state."""
         self.bull_boxes = []
         self.bear_boxes = []
         self.temp_boxes = []
         self.signals = []
+        self._stream = None
+
+    @property
+    def bull_boxes(self) -> List[Box]:
+        """Live bullish boxes in creation order."""
+        return self._bull_store.boxes
+
+    @bull_boxes.setter
+    def bull_boxes(self, boxes: List[Box]):
+        self._bull_store = BoxStore(boxes)
+
+    @property
+    def bear_boxes(self) -> List[Box]:
+        """Live bearish boxes in creation order."""
+        return self._bear_store.boxes
 
-        n = len(df)
+    @bear_boxes.setter
+    def bear_boxes(self, boxes: List[Box]):
+        self._bear_store = BoxStore(boxes)
+
+    def run(self, df: Union[pd.DataFrame, Bars]):
+        """
+        df: DataFrame with columns ['Open','High','Low','Close'] indexed by date (or Bars)
+        After run, self.bull_boxes, self.bear_boxes and self.signals will be populated.
+        """
+        # Reset state for new run
+        self.reset()
+
+        bars = as_bars(df)
+        n = len(bars)
         if n == 0:
             return
 
         # ATR replicating ta.atr(200)
-        atr = atr_series(df, period=200)
+        atr = atr_array(bars.high, bars.low, bars.close, period=200)
 
-        # Filters
-        filt_up = (df['Low'] - df['High'].shift(2)) / df['Low'] * 100
-        filt_dn = (df['Low'].shift(2) - df['High']) / df['Low'].shift(2) * 100
+        # Filters, rolling maxima and gap masks for every bar in one vectorized pass
+        high2 = shift_array(bars.high, 2)
+        low2 = shift_array(bars.low, 2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            filt_up = (bars.low - high2) / bars.low * 100
+            filt_dn = (low2 - bars.high) / low2 * 100
+
+        max_up = rolling_max(filt_up, self.window_size)
+        max_dn = rolling_max(filt_dn, self.window_size)
+
+        bull_gaps, bear_gaps = self._detect_gaps(bars, filt_up, filt_dn)
 
-        max_up = filt_up.rolling(self.window_size, min_periods=1).max()
-        max_dn = filt_dn.rolling(self.window_size, min_periods=1).max()
+        # Only bars inside the lookback window can open an imbalance
+        in_lookback = np.arange(n) > (n - 1 - self.lookback)
+        bull_gaps &= in_lookback
+        bear_gaps &= in_lookback
 
-        # Iterate bars in chronological order
+        # Iterate bars in chronological order; only box bookkeeping remains per bar
         for idx in range(n):
-            if (n - 1 - idx) < self.lookback:
-                isBull_gap, isBear_gap = self._detect_gaps(df, filt_up, filt_dn, idx)
-            else:
-                isBull_gap = False
-                isBear_gap = False
+            isBull_gap = bool(bull_gaps[idx])
+            isBear_gap = bool(bear_gaps[idx])
 
             # Bullish Imbalance
             if isBull_gap:
-                self._create_temp_bullish_box(df, filt_up, idx, n)
-                self._create_bullish_box(atr, df, filt_up, idx, max_up, n)
+                self._create_temp_bullish_box(bars, filt_up, idx, n)
+                self._create_bullish_box(atr, bars, filt_up, idx, max_up, n)
 
             # Bearish Imbalance
             if isBear_gap:
-                self._create_temp_bearish_box(df, filt_dn, idx, n)
-                self._create_bearish_box(atr, df, filt_dn, idx, max_dn, n)
+                self._create_temp_bearish_box(bars, filt_dn, idx, n)
+                self._create_bearish_box(atr, bars, filt_dn, idx, max_dn, n)
 
             # Handle broken levels & signals
-            self._process_bull_boxes(df, idx, isBull_gap)
+            self._process_bull_boxes(bars, idx, isBull_gap)
             self._remove_nested_bull_boxes()
-            self._process_bear_boxes(df, idx, isBear_gap)
+            self._process_bear_boxes(bars, idx, isBear_gap)
             self._remove_nested_bear_boxes()
             self._limit_box_count()
 
         # Extend boxes to the right
         self._extend_boxes(n)
 
-    def _detect_gaps(self, df: DataFrame, filt_up: pd.Series, filt_dn: pd.Series, idx: int) -> tuple:
-        """Detect bullish and bearish gaps at the given index."""
-        if idx >= 2:
-            isBull_gap = (
-                df['High'].shift(2).iat[idx] < df['Low'].iat[idx]
-                and df['High'].shift(2).iat[idx] < df['High'].shift(1).iat[idx]
-                and df['Low'].shift(2).iat[idx] < df['Low'].iat[idx]
-                and (filt_up.iat[idx] > self.filter_gap)
-            )
-            isBear_gap = (
-                df['Low'].shift(2).iat[idx] > df['High'].iat[idx]
-                and df['Low'].shift(2).iat[idx] > df['Low'].shift(1).iat[idx]
-                and df['High'].shift(2).iat[idx] > df['High'].iat[idx]
-                and (filt_dn.iat[idx] > self.filter_gap)
-            )
-        else:
-            isBull_gap = False
-            isBear_gap = False
+    def update(self, bar: Any) -> List[Signal]:
+        """
+        Process one new bar incrementally and return the signals it produced.
+
+        ATR, the filter maxima and the live boxes are carried between calls, so
+        each bar costs the same regardless of history. A streamed bar is always
+        the latest one and therefore inside the lookback window: after k updates
+        the state equals run() on the same k bars whenever k <= lookback.
+        The first update() after run() starts a new series.
+        """
+        if self._stream is None:
+            self.reset()
+            self._stream = _FVGStream(self.window_size)
+        st = self._stream
+
+        open_, high, low, close = ohlc_values(bar)
+        idx = len(st.bars)
+        n = idx + 1
+        prev_close = st.bars.close.values[idx - 1] if idx >= 1 else math.nan
+        st.bars.append(open_, high, low, close)
+        bars = st.bars.view()
+
+        # ATR
+        tr = _fmax(_fmax(high - low, abs(high - prev_close)), abs(low - prev_close))
+        st.atr.append(st.atr_mean.update(tr))
+
+        # Filters
+        high1, low1 = (bars.high[idx - 1], bars.low[idx - 1]) if idx >= 1 else (math.nan, math.nan)
+        high2, low2 = (bars.high[idx - 2], bars.low[idx - 2]) if idx >= 2 else (math.nan, math.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            filt_up = float(np.float64(low - high2) / np.float64(low) * 100)
+            filt_dn = float(np.float64(low2 - high) / np.float64(low2) * 100)
+        st.filt_up.append(filt_up)
+        st.filt_dn.append(filt_dn)
+        st.max_up.append(st.max_up_roll.update(filt_up))
+        st.max_dn.append(st.max_dn_roll.update(filt_dn))
+
+        isBull_gap = idx >= 2 and (high2 < low and high2 < high1 and low2 < low and filt_up > self.filter_gap)
+        isBear_gap = idx >= 2 and (low2 > high and low2 > low1 and high2 > high and filt_dn > self.filter_gap)
+
+        signals_before = len(self.signals)
+
+        if isBull_gap:
+            self._create_temp_bullish_box(bars, st.filt_up.values, idx, n)
+            self._create_bullish_box(st.atr.values, bars, st.filt_up.values, idx, st.max_up.values, n)
+
+        if isBear_gap:
+            self._create_temp_bearish_box(bars, st.filt_dn.values, idx, n)
+            self._create_bearish_box(st.atr.values, bars, st.filt_dn.values, idx, st.max_dn.values, n)
+
+        self._process_bull_boxes(bars, idx, isBull_gap)
+        self._remove_nested_bull_boxes()
+        self._process_bear_boxes(bars, idx, isBear_gap)
+        self._remove_nested_bear_boxes()
+        self._limit_box_count()
+
+        self._extend_boxes_incremental(n)
+        return self.signals[signals_before:]
+
+    def prime_updates(self, df: Union[pd.DataFrame, Bars]):
+        """
+        Rebuild the update() state after run(df).
+
+        The ATR mean and filter maxima are replayed over the series, since
+        their running sums depend on the whole history; boxes and signals
+        are already those of run().
+        """
+        bars = as_bars(df)
+        st = _FVGStream(self.window_size)
+        st.bars.extend(bars)
+
+        prev_close = shift_array(bars.close, 1)
+        tr = np.fmax(np.fmax(bars.high - bars.low, np.abs(bars.high - prev_close)), np.abs(bars.low - prev_close))
+        high2 = shift_array(bars.high, 2)
+        low2 = shift_array(bars.low, 2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            filt_up = (bars.low - high2) / bars.low * 100
+            filt_dn = (low2 - bars.high) / low2 * 100
+        st.filt_up.extend(filt_up)
+        st.filt_dn.extend(filt_dn)
+        for t, up, dn in zip(tr.tolist(), filt_up.tolist(), filt_dn.tolist()):
+            st.atr.append(st.atr_mean.update(t))
+            st.max_up.append(st.max_up_roll.update(up))
+            st.max_dn.append(st.max_dn_roll.update(dn))
+        self._stream = st
+
+    def supports_resume(self, n_bars: int) -> bool:
+        """Streamed bars always count as inside the lookback, so only up to lookback bars."""
+        return n_bars <= self.lookback
+
+    def _detect_gaps(self, bars: Bars, filt_up: np.ndarray, filt_dn: np.ndarray) -> tuple:
+        """Return boolean masks of bullish and bearish gaps for every bar."""
+        high1 = shift_array(bars.high, 1)
+        high2 = shift_array(bars.high, 2)
+        low1 = shift_array(bars.low, 1)
+        low2 = shift_array(bars.low, 2)
+
+        isBull_gap = (
+            (high2 < bars.low)
+            & (high2 < high1)
+            & (low2 < bars.low)
+            & (filt_up > self.filter_gap)
+        )
+        isBear_gap = (
+            (low2 > bars.high)
+            & (low2 > low1)
+            & (high2 > bars.high)
+            & (filt_dn > self.filter_gap)
+        )
+        isBull_gap[:2] = False
+        isBear_gap[:2] = False
         return isBull_gap, isBear_gap
 
-    def _create_temp_bullish_box(self, df: DataFrame, filt_up: pd.Series, idx: int, n: int):
+    def _create_temp_bullish_box(self, bars: Bars, filt_up: np.ndarray, idx: int, n: int):
         """Create temporary box for bullish imbalance."""
         if not self.show_imb:
             return
 
         left = idx - 1
         right = idx + 5
-        top_v = df['Low'].iat[idx]
-        bottom_v = df['High'].shift(2).iat[idx]
+        top_v = bars.low[idx]
+        bottom_v = bars.high[idx - 2]
         top_normal = max(top_v, bottom_v)
         bottom_normal = min(top_v, bottom_v)
 
@@ -146,23 +289,23 @@ class FVGOrderBlocks(Strategy):
             top=top_normal,
             bottom=bottom_normal,
             box_type=BoxType.TEMP_BULL,
-            percent=filt_up.iat[idx],
+            percent=filt_up[idx],
             alpha=0.12
         ))
 
-    def _create_bullish_box(self, atr: pd.Series, df: DataFrame, filt_up: pd.Series,
-                            idx: int, max_up: pd.Series, n: int):
+    def _create_bullish_box(self, atr: np.ndarray, bars: Bars, filt_up: np.ndarray,
+                            idx: int, max_up: np.ndarray, n: int):
         """Create permanent bullish box."""
-        if idx >= 2 and not math.isnan(atr.iat[idx]):
-            top_val = df['High'].shift(2).iat[idx]
-            bottom_val = top_val - atr.iat[idx]
-            percent_val = filt_up.iat[idx]
+        if idx >= 2 and not math.isnan(atr[idx]):
+            top_val = bars.high[idx - 2]
+            bottom_val = top_val - atr[idx]
+            percent_val = filt_up[idx]
             p_norm = percent_val / (
-                max_up.iat[idx] if (not math.isnan(max_up.iat[idx]) and max_up.iat[idx] != 0) else 1.0
+                max_up[idx] if (not math.isnan(max_up[idx]) and max_up[idx] != 0) else 1.0
             )
             alpha = clamp(0.15 + 0.5 * (p_norm if p_norm > 0 else 0), 0.06, 0.7)
 
-            self.bull_boxes.append(Box(
+            self._bull_store.append(Box(
                 left=idx - 1,
                 right=n - 1,
                 top=top_val,
@@ -176,15 +319,15 @@ class FVGOrderBlocks(Strategy):
                 border_width=1
             ))
 
-    def _create_temp_bearish_box(self, df: DataFrame, filt_dn: pd.Series, idx: int, n: int):
+    def _create_temp_bearish_box(self, bars: Bars, filt_dn: np.ndarray, idx: int, n: int):
         """Create temporary box for bearish imbalance."""
         if not self.show_imb:
             return
 
         left = idx - 1
         right = idx + 5
-        top_v = df['High'].iat[idx]
-        bottom_v = df['Low'].shift(2).iat[idx]
+        top_v = bars.high[idx]
+        bottom_v = bars.low[idx - 2]
         top_normal = max(top_v, bottom_v)
         bottom_normal = min(top_v, bottom_v)
 
@@ -194,23 +337,23 @@ class FVGOrderBlocks(Strategy):
             top=top_normal,
             bottom=bottom_normal,
             box_type=BoxType.TEMP_BEAR,
-            percent=filt_dn.iat[idx],
+            percent=filt_dn[idx],
             alpha=0.12
         ))
 
-    def _create_bearish_box(self, atr: pd.Series, df: DataFrame, filt_dn: pd.Series,
-                            idx: int, max_dn: pd.Series, n: int):
+    def _create_bearish_box(self, atr: np.ndarray, bars: Bars, filt_dn: np.ndarray,
+                            idx: int, max_dn: np.ndarray, n: int):
         """Create permanent bearish box."""
-        if idx >= 2 and not math.isnan(atr.iat[idx]):
-            top_val = df['Low'].shift(2).iat[idx] + atr.iat[idx]
-            bottom_val = df['Low'].shift(2).iat[idx]
-            percent_val = filt_dn.iat[idx]
+        if idx >= 2 and not math.isnan(atr[idx]):
+            top_val = bars.low[idx - 2] + atr[idx]
+            bottom_val = bars.low[idx - 2]
+            percent_val = filt_dn[idx]
             p_norm = percent_val / (
-                max_dn.iat[idx] if (not math.isnan(max_dn.iat[idx]) and max_dn.iat[idx] != 0) else 1.0
+                max_dn[idx] if (not math.isnan(max_dn[idx]) and max_dn[idx] != 0) else 1.0
             )
             alpha = clamp(0.15 + 0.5 * (p_norm if p_norm > 0 else 0), 0.06, 0.7)
 
-            self.bear_boxes.append(Box(
+            self._bear_store.append(Box(
                 left=idx - 1,
                 right=n - 1,
                 top=top_val,
@@ -224,108 +367,92 @@ class FVGOrderBlocks(Strategy):
                 border_width=1
             ))
 
-    def _process_bull_boxes(self, df: DataFrame, idx: int, isBull_gap: bool):
+    def _process_bull_boxes(self, df: Union[pd.DataFrame, Bars], idx: int, isBull_gap: bool):
         """Process bull boxes for broken detection and signals."""
-        to_delete = set()
-
-        for bi, box in enumerate(self.bull_boxes):
-            # Check if broken
-            if df['High'].iat[idx] < box.bottom:
-                box.border_width = 0
-                box.bg_color = "#E6E6E6"
-                box.broken = True
-                if not self.show_broken:
-                    to_delete.add(bi)
-
-            # Signal condition
-            if self.show_signal and idx >= 1:
-                if (df['Low'].iat[idx] > box.top >= df['Low'].shift(1).iat[idx] and not isBull_gap):
-                    self.signals.append(Signal(
-                        index=idx,
-                        price=df['Close'].iat[idx],
-                        date=None,
-                        type=SignalType.BUY,
-                        symbol="\ufe3d",
-                        color=self.col_bull,
-                        inside_fvg=True,
-                        inside_sonar=False,
-                        fvg_alpha=box.alpha,
-                        signalStrength=0,
-                        source_strategy=['FVGOrderBlocks']
-                    ))
+        bars = as_bars(df)
+        high = bars.high[idx]
+        low = bars.low[idx]
+        low_prev = bars.low[idx - 1] if idx >= 1 else math.nan
+        store = self._bull_store
+
+        # Broken: high < bottom
+        broken = store.bottoms_above(high)
+        for bi in broken:
+            box = store.get(bi)
+            box.border_width = 0
+            box.bg_color = "#E6E6E6"
+            box.broken = True
+
+        # Signal condition: low > top >= low_prev
+        if self.show_signal and idx >= 1 and not isBull_gap:
+            for bi in store.tops_in(low_prev, low):
+                self.signals.append(Signal(
+                    index=idx,
+                    price=bars.close[idx],
+                    date=None,
+                    type=SignalType.BUY,
+                    symbol="\ufe3d",
+                    color=self.col_bull,
+                    inside_fvg=True,
+                    inside_sonar=False,
+                    fvg_alpha=store.get(bi).alpha,
+                    signalStrength=0,
+                    source_strategy=['FVGOrderBlocks']
+                ))
 
         # Remove broken boxes
-        if to_delete:
-            self.bull_boxes = [b for i, b in enumerate(self.bull_boxes) if i not in to_delete]
+        if not self.show_broken:
+            store.remove(broken)
 
-    def _process_bear_boxes(self, df: DataFrame, idx: int, isBear_gap: bool):
+    def _process_bear_boxes(self, df: Union[pd.DataFrame, Bars], idx: int, isBear_gap: bool):
         """Process bear boxes for broken detection and signals."""
-        to_delete = set()
-
-        for bi, box in enumerate(self.bear_boxes):
-            # Check if broken
-            if df['Low'].iat[idx] > box.top:
-                box.border_width = 0
-                box.bg_color = "#E6E6E6"
-                box.broken = True
-                if not self.show_broken:
-                    to_delete.add(bi)
-
-            # Signal condition
-            if self.show_signal and idx >= 1:
-                if (df['High'].iat[idx] < box.bottom <= df['High'].shift(1).iat[idx] and not isBear_gap):
-                    self.signals.append(Signal(
-                        index=idx,
-                        price=df['Close'].iat[idx],
-                        date=None,
-                        type=SignalType.SELL,
-                        symbol="\ufe40",
-                        color=self.col_bear,
-                        inside_fvg=True,
-                        inside_sonar=False,
-                        fvg_alpha=box.alpha,
-                        signalStrength=0,
-                        source_strategy=['FVGOrderBlocks']
-                    ))
+        bars = as_bars(df)
+        high = bars.high[idx]
+        low = bars.low[idx]
+        high_prev = bars.high[idx - 1] if idx >= 1 else math.nan
+        store = self._bear_store
+
+        # Broken: low > top
+        broken = store.tops_below(low)
+        for bi in broken:
+            box = store.get(bi)
+            box.border_width = 0
+            box.bg_color = "#E6E6E6"
+            box.broken = True
+
+        # Signal condition: high < bottom <= high_prev
+        if self.show_signal and idx >= 1 and not isBear_gap:
+            for bi in store.bottoms_in(high, high_prev):
+                self.signals.append(Signal(
+                    index=idx,
+                    price=bars.close[idx],
+                    date=None,
+                    type=SignalType.SELL,
+                    symbol="\ufe40",
+                    color=self.col_bear,
+                    inside_fvg=True,
+                    inside_sonar=False,
+                    fvg_alpha=store.get(bi).alpha,
+                    signalStrength=0,
+                    source_strategy=['FVGOrderBlocks']
+                ))
 
         # Remove broken boxes
-        if to_delete:
-            self.bear_boxes = [b for i, b in enumerate(self.bear_boxes) if i not in to_delete]
+        if not self.show_broken:
+            store.remove(broken)
 
     def _remove_nested_bull_boxes(self):
         """Remove nested bull boxes."""
-        remove_indices = set()
-        for i_outer, box in enumerate(self.bull_boxes):
-            for i_inner, box1 in enumerate(self.bull_boxes):
-                if i_outer == i_inner:
-                    continue
-                if (box1.top < box.top) and (box1.top > box.bottom):
-                    remove_indices.add(i_outer)
-                    break
-
-        if remove_indices:
-            self.bull_boxes = [b for i, b in enumerate(self.bull_boxes) if i not in remove_indices]
+        self._bull_store.remove_nested()
 
     def _remove_nested_bear_boxes(self):
         """Remove nested bear boxes."""
-        remove_indices = set()
-        for i_outer, box in enumerate(self.bear_boxes):
-            for i_inner, box1 in enumerate(self.bear_boxes):
-                if i_outer == i_inner:
-                    continue
-                if (box1.top < box.top) and (box1.top > box.bottom):
-                    remove_indices.add(i_outer)
-                    break
-
-        if remove_indices:
-            self.bear_boxes = [b for i, b in enumerate(self.bear_boxes) if i not in remove_indices]
+        self._bear_store.remove_nested()
 
     def _limit_box_count(self):
         """Limit the number of boxes to box_amount."""
-        while len(self.bull_boxes) >= self.box_amount:
-            self.bull_boxes.pop(0)
-        while len(self.bear_boxes) >= self.box_amount:
-            self.bear_boxes.pop(0)
+        self._bull_store.keep_last(self.box_amount - 1)
+        self._bear_store.keep_last(self.box_amount - 1)
 
     def _extend_boxes(self, n: int):
         """Extend boxes to the right edge."""
@@ -337,6 +464,19 @@ class FVGOrderBlocks(Strategy):
         for t in self.temp_boxes:
             t.right = min(t.right, n - 1)
 
+    def _extend_boxes_incremental(self, n: int):
+        """Same right edges as _extend_boxes, for the bars seen so far."""
+        right_ext = n - 1 + 15
+        for b in self._bull_store.boxes:
+            b.right = right_ext
+        for b in self._bear_store.boxes:
+            b.right = right_ext
+        # Temp boxes span left..left+6; only the most recent ones are still growing
+        for t in reversed(self.temp_boxes):
+            if t.right >= t.left + 6:
+                break
+            t.right = min(t.left + 6, n - 1)
+
     def get_signals(self) -> List[Signal]:
         """Return the list of signals generated by the strategy."""
         return self.signals
@@ -356,40 +496,19 @@ class FVGOrderBlocks(Strategy):
         draw_boxes(ax, self.bear_boxes, dates)
 
         # Draw temp boxes with light color
-        for t in self.temp_boxes:
-            if t.left < 0 or t.right < 0:
-                continue
-            from matplotlib.patches import Rectangle
-            import matplotlib.dates as mdates
-            left = mdates.date2num(dates[max(0, t.left)])
-            right = mdates.date2num(dates[min(len(dates) - 1, t.right)])
-            rect = Rectangle(
-                (left, t.bottom),
-                right - left,
-                t.top - t.bottom,
-                facecolor=(0.7, 0.7, 0.95, t.alpha),
-                edgecolor='none',
-                zorder=0
-            )
-            ax.add_patch(rect)
-            if t.percent is not None:
-                try:
-                    pct_text = f"{t.percent:.2f}%"
-                    ax.text(
-                        left + (right - left) * 0.02,
-                        (t.top + t.bottom) / 2,
-                        pct_text,
-                        verticalalignment='center',
-                        horizontalalignment='left',
-                        fontsize=8,
-                        color='black',
-                        zorder=2
-                    )
-                except:
-                    pass
+        draw_temp_boxes(ax, self.temp_boxes, dates)
 
         # Draw signals
         draw_signals(ax, self.signals, dates, self.col_bull, self.col_bear)
 
         # Setup axes
-        setup_chart_axes(ax, title)
\ No newline at end of file
+        setup_chart_axes(ax, title)
+
+
+def _fmax(a: float, b: float) -> float:
+    """max() that ignores NaN like np.fmax."""
+    if a != a:
+        return b
+    if b != b:
+        return a
+    return a if a >= b else b
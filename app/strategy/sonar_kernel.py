@@ -0,0 +1,112 @@
+"""
+Array kernels for SonarlaplaceOrderBlocks.
+
+The per-bar reference loop in the strategy is equivalent to a handful of
+array passes: crossover events, the first green/red candle behind each
+event, the bar at which each order block gets mitigated, and the bars on
+which a live block raises an alert. The mitigation scan is compiled with
+numba when it is installed and falls back to chunked NumPy otherwise.
+"""
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional
+    njit = None
+
+HAS_NUMBA = njit is not None
+
+
+def cross_events(pc: np.ndarray, sens: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return (crossunder, crossover) masks of pc against -sens / +sens.
+
+    A bar only qualifies when both it and the previous bar have a value.
+    """
+    n = len(pc)
+    under = np.zeros(n, dtype=bool)
+    over = np.zeros(n, dtype=bool)
+    if n < 2:
+        return under, over
+    prev = pc[:-1]
+    cur = pc[1:]
+    valid = ~np.isnan(prev) & ~np.isnan(cur)
+    under[1:] = valid & (prev >= -sens) & (cur < -sens)
+    over[1:] = valid & (prev <= sens) & (cur > sens)
+    return under, over
+
+
+def first_candle_before(candle_mask: np.ndarray, idxs: np.ndarray,
+                        min_offset: int = 4, max_offset: int = 15) -> np.ndarray:
+    """
+    For every bar in idxs, the nearest bar idx - off (min_offset <= off <= max_offset)
+    where candle_mask is set, or -1 when there is none.
+    """
+    out = np.full(len(idxs), -1, dtype=np.int64)
+    # Walk offsets from far to near so the nearest match wins
+    for off in range(max_offset, min_offset - 1, -1):
+        cand = idxs - off
+        ok = cand >= 0
+        hit = np.zeros(len(idxs), dtype=bool)
+        hit[ok] = candle_mask[cand[ok]]
+        out[hit] = cand[hit]
+    return out
+
+
+def _first_crossing_numpy(values: np.ndarray, start: int, level: float, above: bool) -> int:
+    """Chunked search with doubling windows; NaN never crosses."""
+    n = len(values)
+    pos = start
+    width = 64
+    while pos < n:
+        end = min(n, pos + width)
+        seg = values[pos:end]
+        hit = (seg > level) if above else (seg < level)
+        if hit.any():
+            return pos + int(hit.argmax())
+        pos = end
+        width *= 2
+    return n
+
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _first_crossing_numba(values, start, level, above):
+        n = values.shape[0]
+        for i in range(start, n):
+            v = values[i]
+            if above:
+                if v > level:
+                    return i
+            elif v < level:
+                return i
+        return n
+
+
+def first_crossing(values: np.ndarray, start: int, level: float, above: bool) -> int:
+    """
+    First index >= start where values crosses level (strictly above or below).
+
+    Returns len(values) when the level is never crossed.
+    """
+    if HAS_NUMBA:
+        return int(_first_crossing_numba(values, start, float(level), above))
+    return _first_crossing_numpy(values, start, level, above)
+
+
+def expand_ranges(starts: np.ndarray, stops: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flatten half-open ranges [start, stop) into (owner, position) arrays.
+
+    owner[k] is the range number that produced position[k].
+    """
+    lengths = np.maximum(stops - starts, 0)
+    total = int(lengths.sum())
+    owner = np.repeat(np.arange(len(starts)), lengths)
+    if total == 0:
+        return owner, np.empty(0, dtype=np.int64)
+    first = np.cumsum(lengths) - lengths
+    positions = np.arange(total) - first[owner] + starts[owner]
+    return owner, positions
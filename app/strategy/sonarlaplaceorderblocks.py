@@ -1,16 +1,32 @@
 # -------------------------
 # Sonarlab - Order Blocks (full logic)
 # -------------------------
-from typing import List
+from typing import Any, List, Optional, Union
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from model.bars import Bars, as_bars
 from model.box import Box, BoxType
 from model.signal import Signal
 from model.SignalType import SignalType
+from strategy.sonar_kernel import cross_events, expand_ranges, first_candle_before, first_crossing
 from strategy.strategy import Strategy
 from utility.plot_utils import draw_candlesticks, draw_boxes, draw_signals, setup_chart_axes
+from utility.streaming import BarBuffer, GrowableArray, ohlc_values
+from utility.utility import shift_array
+
+
+class _SonarStream:
+    """Per-bar state kept between SonarlaplaceOrderBlocks.update() calls."""
+
+    def __init__(self):
+        self.bars = BarBuffer()
+        self.pc = GrowableArray()
+        self.bull_mitigation = GrowableArray()
+        self.bear_mitigation = GrowableArray()
+        self.ob_created = False
+        self.ob_created_bull = False
 
 
 class SonarlaplaceOrderBlocks(Strategy):
@@ -27,6 +43,9 @@ class SonarlaplaceOrderBlocks(Strategy):
      - For creation, ensure gap from previously created OBs: cross_index - cross_index[1] > 5
      - loops offsets 4..15 to find first RED/GREEN candle to place OB
      - cleanup and alert rules replicated exactly
+
+    With use_kernel=True (default) run() uses the array kernels in
+    strategy.sonar_kernel; use_kernel=False keeps the bar-by-bar reference loop.
     """
 
     def __init__(self,
@@ -37,7 +56,8 @@ class SonarlaplaceOrderBlocks(Strategy):
                  col_bearish: str = "#4760bb",
                  col_bearish_ob: str = "#506CD3",
                  buy_alert: bool = True,
-                 sell_alert: bool = True):
+                 sell_alert: bool = True,
+                 use_kernel: bool = True):
         self.sensitivity = sensitivity
         self.sens = sensitivity / 100.0
         self.OBMitigationType = OBMitigationType
@@ -47,33 +67,47 @@ class SonarlaplaceOrderBlocks(Strategy):
         self.col_bearish_ob = col_bearish_ob
         self.buy_alert = buy_alert
         self.sell_alert = sell_alert
+        self.use_kernel = use_kernel
 
         # Storage
         self.long_boxes: List[Box] = []
         self.short_boxes: List[Box] = []
         self.signals: List[Signal] = []
+        self._stream: Optional[_SonarStream] = None
 
-    def run(self, df: pd.DataFrame):
-        """Run the strategy on the given DataFrame."""
-        # Reset state for new run
+    def reset(self):
+        """Discard boxes, signals and any incremental state."""
         self.long_boxes = []
         self.short_boxes = []
         self.signals = []
+        self._stream = None
+
+    def run(self, df: Union[pd.DataFrame, Bars]):
+        """Run the strategy on the given DataFrame (or Bars)."""
+        # Reset state for new run
+        self.reset()
 
         n = len(df)
         if n == 0:
             return
 
-        # pc series
-        pc = (df['Open'] - df['Open'].shift(4)) / df['Open'].shift(4) * 100
+        bars = as_bars(df)
+        if self.use_kernel:
+            self._run_kernel(bars)
+            return
+
+        # pc array
+        open4 = shift_array(bars.open, 4)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pc = (bars.open - open4) / open4 * 100
 
-        # mitigation as series
+        # mitigation arrays
         if self.OBMitigationType == "Close":
-            OBBullMitigation = df['Close'].shift(1)
-            OBBearMitigation = df['Close'].shift(1)
+            OBBullMitigation = shift_array(bars.close, 1)
+            OBBearMitigation = OBBullMitigation
         else:
-            OBBullMitigation = df['Low']
-            OBBearMitigation = df['High']
+            OBBullMitigation = bars.low
+            OBBearMitigation = bars.high
 
         # State variables
         ob_created = False
@@ -81,28 +115,232 @@ class SonarlaplaceOrderBlocks(Strategy):
 
         # Iterate bars
         for idx in range(n):
-            # Detect crossovers
-            if idx >= 1:
-                ob_created, ob_created_bull = self._detect_crosses(pc, idx, ob_created, ob_created_bull)
+            ob_created, ob_created_bull = self._step(bars, idx, n, pc, OBBearMitigation, OBBullMitigation,
+                                                     ob_created, ob_created_bull)
+
+    def _step(self, bars: Bars, idx: int, n: int, pc: np.ndarray,
+              OBBearMitigation: np.ndarray, OBBullMitigation: np.ndarray,
+              ob_created: bool, ob_created_bull: bool) -> tuple:
+        """Process bar idx of the reference loop; returns the updated creation flags."""
+        # Detect crossovers
+        if idx >= 1:
+            ob_created, ob_created_bull = self._detect_crosses(pc, idx, ob_created, ob_created_bull)
+
+        # Bearish OB Creation
+        if ob_created:
+            ob_created = self._create_bearish_ob(bars, idx, n)
+
+        # Bullish OB Creation
+        if ob_created_bull:
+            ob_created_bull = self._create_bullish_ob(bars, idx, n)
+
+        # Bearish OB cleanup & alerts
+        self._process_bearish_obs(bars, idx, OBBearMitigation)
 
-            # Bearish OB Creation
-            if ob_created:
-                ob_created = self._create_bearish_ob(df, idx, n)
+        # Bullish OB cleanup & alerts
+        self._process_bullish_obs(bars, idx, OBBullMitigation)
+
+        return ob_created, ob_created_bull
+
+    def update(self, bar: Any) -> List[Signal]:
+        """
+        Process one new bar incrementally and return the signals it produced.
+
+        Runs the same per-bar step as the reference loop, so after k updates the
+        boxes and signals equal run() on those k bars. Only the live OBs and the
+        last 16 bars are touched. The first update() after run() starts a new series.
+        """
+        if self._stream is None:
+            self.reset()
+            self._stream = _SonarStream()
+        st = self._stream
+
+        open_, high, low, close = ohlc_values(bar)
+        idx = len(st.bars)
+        n = idx + 1
+        prev_close = st.bars.close.values[idx - 1] if idx >= 1 else np.nan
+        open4 = st.bars.open.values[idx - 4] if idx >= 4 else np.nan
+        st.bars.append(open_, high, low, close)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            st.pc.append((np.float64(open_) - open4) / np.float64(open4) * 100)
+        if self.OBMitigationType == "Close":
+            st.bull_mitigation.append(prev_close)
+            st.bear_mitigation.append(prev_close)
+        else:
+            st.bull_mitigation.append(low)
+            st.bear_mitigation.append(high)
+
+        signals_before = len(self.signals)
+        st.ob_created, st.ob_created_bull = self._step(
+            st.bars.view(), idx, n, st.pc.values, st.bear_mitigation.values, st.bull_mitigation.values,
+            st.ob_created, st.ob_created_bull)
+
+        # Boxes span to the last bar seen
+        for b in self.short_boxes:
+            b.right = n - 1
+        for b in self.long_boxes:
+            b.right = n - 1
+        return self.signals[signals_before:]
+
+    def prime_updates(self, df: Union[pd.DataFrame, Bars]):
+        """
+        Rebuild the update() state after run(df).
+
+        The creation flags are always cleared by the end of a bar, so only the
+        bar, pc and mitigation columns need restoring.
+        """
+        bars = as_bars(df)
+        st = _SonarStream()
+        st.bars.extend(bars)
+        open4 = shift_array(bars.open, 4)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            st.pc.extend((bars.open - open4) / open4 * 100)
+        if self.OBMitigationType == "Close":
+            prev_close = shift_array(bars.close, 1)
+            st.bull_mitigation.extend(prev_close)
+            st.bear_mitigation.extend(prev_close)
+        else:
+            st.bull_mitigation.extend(bars.low)
+            st.bear_mitigation.extend(bars.high)
+        self._stream = st
+
+    def supports_resume(self, n_bars: int) -> bool:
+        return True
+
+    def _run_kernel(self, bars: Bars):
+        """Array implementation of the bar loop in run(); produces the same boxes and signals."""
+        n = len(bars)
+
+        # pc array
+        open4 = shift_array(bars.open, 4)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pc = (bars.open - open4) / open4 * 100
+
+        # mitigation arrays
+        if self.OBMitigationType == "Close":
+            bull_mitigation = shift_array(bars.close, 1)
+            bear_mitigation = bull_mitigation
+        else:
+            bull_mitigation = bars.low
+            bear_mitigation = bars.high
+
+        # Crossunder creates a bearish OB, crossover a bullish one
+        bear_events, bull_events = cross_events(pc, self.sens)
+        event_idxs = np.flatnonzero(bear_events | bull_events)
+        green_at = first_candle_before(bars.close > bars.open, event_idxs)
+        red_at = first_candle_before(bars.close < bars.open, event_idxs)
+
+        # Place OBs event by event. Each OB is alive from its creation bar until
+        # the bar it gets mitigated, which is all the spacing rule needs to know.
+        created, removed, anchor, is_bear = [], [], [], []
+        for k, idx in enumerate(event_idxs.tolist()):
+            for bear_side in (True, False):
+                if not (bear_events[idx] if bear_side else bull_events[idx]):
+                    continue
+                if self._spacing_blocked(idx, created, removed):
+                    continue
+                bar_idx = int(green_at[k] if bear_side else red_at[k])
+                if bar_idx < 0:
+                    continue
+                if bear_side:
+                    end = first_crossing(bear_mitigation, idx, bars.high[bar_idx], above=True)
+                else:
+                    end = first_crossing(bull_mitigation, idx, bars.low[bar_idx], above=False)
+                created.append(idx)
+                removed.append(end)
+                anchor.append(bar_idx)
+                is_bear.append(bear_side)
+
+        if not created:
+            return
 
-            # Bullish OB Creation
-            if ob_created_bull:
-                ob_created_bull = self._create_bullish_ob(df, idx, n)
+        created = np.asarray(created, dtype=np.int64)
+        removed = np.asarray(removed, dtype=np.int64)
+        anchor = np.asarray(anchor, dtype=np.int64)
+        is_bear = np.asarray(is_bear, dtype=bool)
 
-            # Bearish OB cleanup & alerts
-            self._process_bearish_obs(df, idx, OBBearMitigation)
+        self._emit_kernel_alerts(bars, created, removed, anchor, is_bear)
 
-            # Bullish OB cleanup & alerts
-            self._process_bullish_obs(df, idx, OBBullMitigation)
+        # OBs never mitigated remain, in creation order
+        for c, a, bear_side in zip(created[removed == n].tolist(), anchor[removed == n].tolist(),
+                                   is_bear[removed == n].tolist()):
+            box = Box(
+                left=a,
+                right=n - 1,
+                top=bars.high[a],
+                bottom=bars.low[a],
+                box_type=BoxType.BEARISH if bear_side else BoxType.BULLISH,
+                bg_color=self.col_bearish_ob if bear_side else self.col_bullish_ob,
+                border_color=self.col_bearish if bear_side else self.col_bullish,
+                created_at=c
+            )
+            (self.short_boxes if bear_side else self.long_boxes).append(box)
+
+    @staticmethod
+    def _spacing_blocked(idx: int, created: List[int], removed: List[int]) -> bool:
+        """True if an OB created within the last 5 bars is still alive at idx."""
+        for j in range(len(created) - 1, -1, -1):
+            if idx - created[j] > 5:
+                break
+            if removed[j] >= idx:
+                return True
+        return False
+
+    def _emit_kernel_alerts(self, bars: Bars, created: np.ndarray, removed: np.ndarray,
+                            anchor: np.ndarray, is_bear: np.ndarray):
+        """Build alert signals for every bar each OB is alive, in reference-loop order."""
+        owners, positions = expand_ranges(created, removed)
+        owner_bear = is_bear[owners]
+        hit = np.where(
+            owner_bear,
+            bars.high[positions] > bars.low[anchor[owners]],
+            bars.low[positions] < bars.high[anchor[owners]]
+        )
+        if not self.sell_alert:
+            hit &= ~owner_bear
+        if not self.buy_alert:
+            hit &= owner_bear
+        owners = owners[hit]
+        positions = positions[hit]
+        owner_bear = owner_bear[hit]
+
+        # Per bar: bearish OBs before bullish ones, newest OB first within a side
+        order = np.lexsort((-owners, ~owner_bear, positions))
+        for idx, bear_side in zip(positions[order].tolist(), owner_bear[order].tolist()):
+            if bear_side:
+                self.signals.append(Signal(
+                    index=idx,
+                    price=bars.close[idx],
+                    date=None,
+                    type=SignalType.SELL,
+                    symbol="\u2193",
+                    color="#C21919",
+                    inside_fvg=False,
+                    inside_sonar=True,
+                    fvg_alpha=None,
+                    signalStrength=0,
+                    source_strategy=['SonarlaplaceOrderBlocks']
+                ))
+            else:
+                self.signals.append(Signal(
+                    index=idx,
+                    price=bars.close[idx],
+                    date=None,
+                    type=SignalType.BUY,
+                    symbol="\u2191",
+                    color="#167F52",
+                    inside_fvg=False,
+                    inside_sonar=True,
+                    fvg_alpha=None,
+                    signalStrength=0,
+                    source_strategy=['SonarlaplaceOrderBlocks']
+                ))
 
-    def _detect_crosses(self, pc: pd.Series, idx: int, ob_created: bool, ob_created_bull: bool) -> tuple:
+    def _detect_crosses(self, pc: np.ndarray, idx: int, ob_created: bool, ob_created_bull: bool) -> tuple:
         """Detect crossover and crossunder events."""
-        prev_pc = pc.iat[idx - 1] if not np.isnan(pc.iat[idx - 1]) else None
-        cur_pc = pc.iat[idx] if not np.isnan(pc.iat[idx]) else None
+        prev_pc = pc[idx - 1] if not np.isnan(pc[idx - 1]) else None
+        cur_pc = pc[idx] if not np.isnan(pc[idx]) else None
 
         if prev_pc is not None and cur_pc is not None:
             # crossunder: previous >= -sens and current < -sens
@@ -128,7 +366,7 @@ class SonarlaplaceOrderBlocks(Strategy):
 
         return last_created_idx
 
-    def _create_bearish_ob(self, df: pd.DataFrame, idx: int, n: int) -> bool:
+    def _create_bearish_ob(self, bars: Bars, idx: int, n: int) -> bool:
         """Create bearish order block if conditions are met."""
         last_created_idx = self._get_last_created_idx()
 
@@ -141,7 +379,7 @@ class SonarlaplaceOrderBlocks(Strategy):
         for off in range(4, 16):
             bar_idx = idx - off
             if bar_idx >= 0:
-                if df['Close'].iat[bar_idx] > df['Open'].iat[bar_idx]:
+                if bars.close[bar_idx] > bars.open[bar_idx]:
                     last_green_idx = bar_idx
                     break
 
@@ -149,8 +387,8 @@ class SonarlaplaceOrderBlocks(Strategy):
             self.short_boxes.append(Box(
                 left=last_green_idx,
                 right=n - 1,
-                top=df['High'].iat[last_green_idx],
-                bottom=df['Low'].iat[last_green_idx],
+                top=bars.high[last_green_idx],
+                bottom=bars.low[last_green_idx],
                 box_type=BoxType.BEARISH,
                 bg_color=self.col_bearish_ob,
                 border_color=self.col_bearish,
@@ -159,7 +397,7 @@ class SonarlaplaceOrderBlocks(Strategy):
 
         return False  # Reset flag
 
-    def _create_bullish_ob(self, df: pd.DataFrame, idx: int, n: int) -> bool:
+    def _create_bullish_ob(self, bars: Bars, idx: int, n: int) -> bool:
         """Create bullish order block if conditions are met."""
         last_created_idx = self._get_last_created_idx()
 
@@ -172,7 +410,7 @@ class SonarlaplaceOrderBlocks(Strategy):
         for off in range(4, 16):
             bar_idx = idx - off
             if bar_idx >= 0:
-                if df['Close'].iat[bar_idx] < df['Open'].iat[bar_idx]:
+                if bars.close[bar_idx] < bars.open[bar_idx]:
                     last_red_idx = bar_idx
                     break
 
@@ -180,8 +418,8 @@ class SonarlaplaceOrderBlocks(Strategy):
             self.long_boxes.append(Box(
                 left=last_red_idx,
                 right=n - 1,
-                top=df['High'].iat[last_red_idx],
-                bottom=df['Low'].iat[last_red_idx],
+                top=bars.high[last_red_idx],
+                bottom=bars.low[last_red_idx],
                 box_type=BoxType.BULLISH,
                 bg_color=self.col_bullish_ob,
                 border_color=self.col_bullish,
@@ -190,26 +428,29 @@ class SonarlaplaceOrderBlocks(Strategy):
 
         return False  # Reset flag
 
-    def _process_bearish_obs(self, df: pd.DataFrame, idx: int, OBBearMitigation: pd.Series):
+    def _process_bearish_obs(self, df: Union[pd.DataFrame, Bars], idx: int,
+                             OBBearMitigation: Union[pd.Series, np.ndarray]):
         """Process bearish OBs for cleanup and alerts."""
         if len(self.short_boxes) == 0:
             return
+        bars = as_bars(df)
+        OBBearMitigation = np.asarray(OBBearMitigation)
 
         # Iterate backwards
         for j in range(len(self.short_boxes) - 1, -1, -1):
             sbox = self.short_boxes[j]
 
             # Check if mitigated
-            val = OBBearMitigation.iat[idx] if idx < len(OBBearMitigation) else None
+            val = OBBearMitigation[idx] if idx < len(OBBearMitigation) else None
             if val is not None and not np.isnan(val) and val > sbox.top:
                 self.short_boxes.pop(j)
                 continue
 
             # Alerts
-            if df['High'].iat[idx] > sbox.bottom and self.sell_alert:
+            if bars.high[idx] > sbox.bottom and self.sell_alert:
                 self.signals.append(Signal(
                     index=idx,
-                    price=df['Close'].iat[idx],
+                    price=bars.close[idx],
                     date=None,
                     type=SignalType.SELL,
                     symbol="\u2193",
@@ -221,26 +462,29 @@ class SonarlaplaceOrderBlocks(Strategy):
                     source_strategy=['SonarlaplaceOrderBlocks']
                 ))
 
-    def _process_bullish_obs(self, df: pd.DataFrame, idx: int, OBBullMitigation: pd.Series):
+    def _process_bullish_obs(self, df: Union[pd.DataFrame, Bars], idx: int,
+                             OBBullMitigation: Union[pd.Series, np.ndarray]):
         """Process bullish OBs for cleanup and alerts."""
         if len(self.long_boxes) == 0:
             return
+        bars = as_bars(df)
+        OBBullMitigation = np.asarray(OBBullMitigation)
 
         # Iterate backwards
         for j in range(len(self.long_boxes) - 1, -1, -1):
             lbox = self.long_boxes[j]
 
             # Check if mitigated
-            val = OBBullMitigation.iat[idx] if idx < len(OBBullMitigation) else None
+            val = OBBullMitigation[idx] if idx < len(OBBullMitigation) else None
             if val is not None and not np.isnan(val) and val < lbox.bottom:
                 self.long_boxes.pop(j)
                 continue
 
             # Alerts
-            if df['Low'].iat[idx] < lbox.top and self.buy_alert:
+            if bars.low[idx] < lbox.top and self.buy_alert:
                 self.signals.append(Signal(
                     index=idx,
-                    price=df['Close'].iat[idx],
+                    price=bars.close[idx],
                     date=None,
                     type=SignalType.BUY,
                     symbol="\u2191",
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, List
 
 import pandas as pd
 
@@ -18,6 +18,37 @@ class Strategy(ABC):
         """Return the list of signals generated by the strategy."""
         pass
 
+    @abstractmethod
+    def update(self, bar: Any) -> List[Signal]:
+        """
+        Feed the next bar and return only the signals it produced.
+
+        bar is a mapping/Series with Open, High, Low, Close (or an OHLC tuple).
+        State is carried between calls; run() discards it and starts over.
+        """
+        pass
+
+    @abstractmethod
+    def prime_updates(self, df: pd.DataFrame):
+        """
+        Rebuild the update() state right after run(df), so the series can be
+        continued bar by bar instead of rerunning the full history.
+        """
+        pass
+
+    def supports_resume(self, n_bars: int) -> bool:
+        """
+        Whether update() up to n_bars bars reproduces run() on those bars.
+
+        Callers only resume a series through prime_updates()/update() when
+        this is True; otherwise they rerun the full history.
+        """
+        return False
+
+    def on_bar(self, bar: Any) -> List[Signal]:
+        """Event-style alias of update()."""
+        return self.update(bar)
+
     @abstractmethod
     def plot(self, df: pd.DataFrame, title: str = "Strategy Plot", ax=None):
         """Plot the strategy results."""
@@ -2,9 +2,7 @@
 Backtest UI component for running strategy backtests.
 """
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Tuple, Optional, Any
-import sqlite3
 from datetime import datetime, timedelta
 
 import pandas as pd
@@ -13,10 +11,14 @@ import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
 from model.signal import Signal
+from service.connection_pool import get_pool
+from service.data_catalog import get_catalog
+from service.bar_store import bar_store_for
 from model import SignalType, Box
 from utility.utility import load_data, atr_series
 from utility.file_util import get_security_name
 from agent.signal_generator import get_signal_generator
+from agent.parallel_signals import default_worker_count, generate_for_csv_groups, generate_for_db_symbols
 from ui.signal_utils import filter_buy_signals, format_trades_dates, format_numeric_columns
 from ui.common import set_force_close_at_end, get_force_close_at_end
 from ui.optimizer import BacktestOptimizer
@@ -36,17 +38,8 @@ def load_symbols_from_db(db_path=None):
     if db_path is None:
         db_path = _DEFAULT_DB_PATH
     try:
-        conn = sqlite3.connect(db_path)
-        query = """
-            SELECT DISTINCT symbol, COUNT(*) as count
-            FROM stock_data
-            GROUP BY symbol
-            HAVING count >= 100
-            ORDER BY symbol
-        """
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        return df['symbol'].tolist()
+        # Symbols with at least 100 rows, from the data catalog
+        return get_catalog().db_symbols(db_path, min_rows=100)
     except Exception as e:
         st.error(f"Error loading symbols from database: {e}")
         return []
@@ -54,43 +47,26 @@ def load_symbols_from_db(db_path=None):
 
 def load_data_from_db(symbol, db_path=None, start_date=None, end_date=None):
     """Load OHLCV data for a symbol from database."""
+    frames = load_panel_from_db([symbol], db_path, start_date, end_date)
+    return frames.get(symbol, pd.DataFrame())
+
+
+def load_panel_from_db(symbols, db_path=None, start_date=None, end_date=None):
+    """Load OHLCV data for many symbols, served from the database's bar store."""
     if db_path is None:
         db_path = _DEFAULT_DB_PATH
     try:
-        conn = sqlite3.connect(db_path)
-        
-        query = """
-            SELECT datetime, open, high, low, close, volume
-            FROM stock_data
-            WHERE symbol = ?
-        """
-        params = [symbol]
-        
-        if start_date:
-            query += " AND datetime >= ?"
-            params.append(start_date.strftime('%Y-%m-%d'))
-        
-        if end_date:
-            query += " AND datetime <= ?"
-            params.append(end_date.strftime('%Y-%m-%d'))
-        
-        query += " ORDER BY datetime"
-        
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
-        
-        if not df.empty:
-            df['datetime'] = pd.to_datetime(df['datetime'])
-            # Remove timezone info to avoid comparison issues
-            if hasattr(df['datetime'].dt, 'tz') and df['datetime'].dt.tz is not None:
-                df['datetime'] = df['datetime'].dt.tz_localize(None)
-            df.set_index('datetime', inplace=True)
-            df.columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-        
-        return df
+        conn = get_pool(db_path, read_only=True).connection()
+        # Exchange wall clock without timezone info, to avoid comparison issues
+        return bar_store_for(db_path).load_frames(
+            conn,
+            symbols,
+            start=start_date.strftime('%Y-%m-%d') if start_date else None,
+            end=end_date.strftime('%Y-%m-%d') if end_date else None
+        )
     except Exception as e:
-        st.error(f"Error loading data for {symbol}: {e}")
-        return pd.DataFrame()
+        st.error(f"Error loading data from database: {e}")
+        return {}
 
 
 def render_backtest(CSV_FILES, TradeAgent, allocation_params, min_signal_strength: int = 1):
@@ -106,6 +82,18 @@ def render_backtest(CSV_FILES, TradeAgent, allocation_params, min_signal_strengt
         _render_csv_backtest(CSV_FILES, TradeAgent, allocation_params, min_signal_strength)
 
 
+def _worker_count_input() -> int:
+    """Number of worker processes for loading data and generating signals."""
+    return int(st.number_input(
+        "Worker processes",
+        min_value=1,
+        max_value=os.cpu_count() or 1,
+        value=default_worker_count(),
+        step=1,
+        help="1 runs signal generation in the app process"
+    ))
+
+
 def _render_database_backtest(TradeAgent, allocation_params, min_signal_strength: int):
     """Render database-based backtest UI."""
     db_path = st.text_input("Database Path", value=_DEFAULT_DB_PATH)
@@ -151,10 +139,11 @@ def _render_database_backtest(TradeAgent, allocation_params, min_signal_strength
         # Checkbox to toggle forced close
         force_close = st.checkbox("Force close open positions at end of data", value=get_force_close_at_end())
         set_force_close_at_end(bool(force_close))
+        max_workers = _worker_count_input()
         
         if st.button("Run Backtest"):
             with st.spinner(f"Running backtest on {len(selected_symbols)} symbols..."):
-                results = _run_database_backtest(selected_symbols, db_path, start_date, end_date, TradeAgent, allocation_params, min_signal_strength)
+                results = _run_database_backtest(selected_symbols, db_path, start_date, end_date, TradeAgent, allocation_params, min_signal_strength, max_workers)
                 if results:
                     summary, trades_df, portfolio, data_dict = results
                     st.session_state['backtest_results'] = {
@@ -220,17 +209,13 @@ def _render_optimizer_ui(TradeAgent, allocation_params, selected_symbols, db_pat
 
 def _run_optimizer(selected_symbols, db_path, start_date, end_date, TradeAgent, param_ranges):
     """Run backtest optimizer."""
-    # Load data for all symbols
-    data_dict = {}
+    # Load data for all symbols in one query
     progress_bar = st.progress(0)
     status_text = st.empty()
     
-    for i, symbol in enumerate(selected_symbols):
-        status_text.text(f"Loading data: {symbol} ({i+1}/{len(selected_symbols)})")
-        df = load_data_from_db(symbol, db_path, start_date, end_date)
-        if not df.empty:
-            data_dict[symbol] = df
-        progress_bar.progress((i + 1) / len(selected_symbols))
+    status_text.text(f"Loading data for {len(selected_symbols)} symbols...")
+    data_dict = load_panel_from_db(selected_symbols, db_path, start_date, end_date)
+    progress_bar.progress(1.0)
     
     if not data_dict:
         st.error("No data loaded for selected symbols")
@@ -295,41 +280,49 @@ def _run_optimizer(selected_symbols, db_path, start_date, end_date, TradeAgent,
     )
 
 
-def _run_database_backtest(selected_symbols, db_path, start_date, end_date, TradeAgent, allocation_params, min_signal_strength: int) -> Optional[Tuple[Any, pd.DataFrame, Any, dict]]:
+def _run_database_backtest(selected_symbols, db_path, start_date, end_date, TradeAgent, allocation_params, min_signal_strength: int,
+                           max_workers: Optional[int] = None) -> Optional[Tuple[Any, pd.DataFrame, Any, dict]]:
     """Run backtest using database data."""
-    # Load data for all symbols
-    data_dict = {}
+    # Load and generate in worker processes, one panel query per chunk of symbols
+    sg = get_signal_generator()
     progress_bar = st.progress(0)
     status_text = st.empty()
-    
-    for i, symbol in enumerate(selected_symbols):
-        status_text.text(f"Loading data: {symbol} ({i+1}/{len(selected_symbols)})")
-        df = load_data_from_db(symbol, db_path, start_date, end_date)
-        if not df.empty:
-            data_dict[symbol] = df
-        progress_bar.progress((i + 1) / len(selected_symbols))
-    
+
+    status_text.text(f"Loading data and generating signals for {len(selected_symbols)} symbols...")
+
+    def _progress(done, total):
+        progress_bar.progress(done / total if total else 1.0)
+        status_text.text(f"Generating signals: {done}/{total} symbols")
+
+    try:
+        results = generate_for_db_symbols(
+            selected_symbols,
+            db_path or _DEFAULT_DB_PATH,
+            start=start_date.strftime('%Y-%m-%d') if start_date else None,
+            end=end_date.strftime('%Y-%m-%d') if end_date else None,
+            config=sg.config,
+            max_workers=max_workers,
+            progress=_progress,
+            store_path=sg.store.path if sg.store else None
+        )
+    except Exception as e:
+        st.error(f"Error loading data from database: {e}")
+        results = []
+
+    progress_bar.empty()
+    status_text.empty()
+
+    data_dict = {r.symbol: r.df for r in results if r.df is not None}
     if not data_dict:
         st.error("No data loaded for selected symbols")
         return None
-    
-    status_text.text("Generating signals...")
-    
-    # Generate signals
-    sg = get_signal_generator()
+
     all_signals = []
-    
-    for i, (symbol, df) in enumerate(data_dict.items()):
-        status_text.text(f"Generating signals: {symbol} ({i+1}/{len(data_dict)})")
-        try:
-            signals = sg.generate_from_file(df, symbol)
-            all_signals.extend(signals)
-        except Exception as e:
-            st.warning(f"Error generating signals for {symbol}: {e}")
-    
-    progress_bar.empty()
-    status_text.empty()
-    
+    for r in results:
+        for warning in r.warnings:
+            st.warning(warning)
+        all_signals.extend(r.signals)
+
     if not all_signals:
         st.info("No signals generated")
         return None
@@ -390,10 +383,12 @@ def _render_csv_backtest(CSV_FILES, TradeAgent, allocation_params, min_signal_st
     for sec in selected_secs:
         filtered_files.extend(file_to_security.get(sec, []))
 
+    max_workers = _worker_count_input()
+
     if st.button("Run Backtest"):
         with st.spinner("Running backtest..."):
             # pass filtered_files (if none selected, fall back to original CSV_FILES)
-            results = _run_backtest(filtered_files or CSV_FILES, TradeAgent, allocation_params, min_signal_strength)
+            results = _run_backtest(filtered_files or CSV_FILES, TradeAgent, allocation_params, min_signal_strength, max_workers)
             if results:
                 summary, trades_df, portfolio, data_dict = results
                 st.session_state['backtest_results'] = {
@@ -414,7 +409,8 @@ def _render_csv_backtest(CSV_FILES, TradeAgent, allocation_params, min_signal_st
         )
 
 
-def _run_backtest(CSV_FILES: List[str], TradeAgent, allocation_params: dict, min_signal_strength: int) -> Optional[Tuple[Any, pd.DataFrame, Any, dict]]:
+def _run_backtest(CSV_FILES: List[str], TradeAgent, allocation_params: dict, min_signal_strength: int,
+                  max_workers: Optional[int] = None) -> Optional[Tuple[Any, pd.DataFrame, Any, dict]]:
     """Execute the backtest logic."""
     if not CSV_FILES:
         st.error("No CSV files provided.")
@@ -424,7 +420,7 @@ def _run_backtest(CSV_FILES: List[str], TradeAgent, allocation_params: dict, min
     sg = get_signal_generator()
 
     # Process files and generate signals
-    results = _process_files_parallel(CSV_FILES, sg)
+    results = _process_files_parallel(CSV_FILES, sg, max_workers)
 
     if not results:
         st.error("No valid data was loaded.")
@@ -466,39 +462,15 @@ def _run_backtest(CSV_FILES: List[str], TradeAgent, allocation_params: dict, min
 
 def _process_files_parallel(
         csv_files: List[str],
-        sg
+        sg,
+        max_workers: Optional[int] = None
 ) -> List[Tuple[str, pd.DataFrame, List[Signal]]]:
-    """Process CSV files in parallel for better performance.
+    """Load and generate signals for CSV files in worker processes.
 
-    New behavior:
-    - Load each CSV file into a DataFrame
     - Group files by security name extracted from filename
-    - Sort each group's files by start date and concatenate into a single DataFrame per security
-    - Run the provided SignalGenerator `sg` on each merged DataFrame and return list of (security_name, merged_df, signals)
+    - In each worker, load a group's files, sort them by start date and concatenate into a single DataFrame
+    - Run the signal pipeline with `sg.config` on each merged DataFrame and return list of (security_name, merged_df, signals)
     """
-    # First load all dataframes (in parallel) into a list of (file_name, df)
-    loaded = []
-    with ThreadPoolExecutor(max_workers=min(len(csv_files) or 1, 4)) as executor:
-        future_to_file = {executor.submit(load_data, file_name, 'backtest_data'): file_name for file_name in csv_files}
-        for future in as_completed(future_to_file):
-            fname = future_to_file[future]
-            try:
-                df = future.result()
-                if df is None or df.empty:
-                    logger = None
-                    # Use streamlit warning if available
-                    try:
-                        st.warning(f"No data in file: {fname}")
-                    except Exception:
-                        pass
-                    continue
-                loaded.append((fname, df))
-            except Exception as e:
-                try:
-                    st.warning(f"Failed to load {fname}: {e}")
-                except Exception:
-                    pass
-
     # Helper to extract security name
     def _extract_security(fname: str) -> str:
         try:
@@ -509,38 +481,42 @@ def _process_files_parallel(
             pass
         return fname.rsplit('.', 1)[0] if isinstance(fname, str) else str(fname)
 
-    # Group by security and sort each group's dfs by start date
+    # Security comes from the data catalog; files it does not know fall back to the file name
+    try:
+        catalog_entries = {os.path.basename(e.path): e for e in get_catalog().entries('backtest_data', scan=False)}
+    except Exception:
+        catalog_entries = {}
+
     grouped: dict = {}
-    for fname, df in loaded:
-        sec = _extract_security(fname)
-        start = pd.to_datetime(df.index.min()) if hasattr(df, 'index') and len(df.index) > 0 else pd.NaT
-        grouped.setdefault(sec, []).append((fname, df, start))
+    for fname in csv_files:
+        entry = catalog_entries.get(fname)
+        sec = entry.symbol if entry is not None else _extract_security(fname)
+        grouped.setdefault(sec, []).append(fname)
 
-    merged_results: List[Tuple[str, pd.DataFrame, List[Signal]]] = []
-    for sec in sorted(grouped.keys()):
-        entries = grouped[sec]
-        entries.sort(key=lambda x: (pd.NaT if pd.isna(x[2]) else x[2]))
-        # Concatenate the dataframes for this security, in chronological order
-        dfs = [e[1] for e in entries]
-        try:
-            merged_df = pd.concat(dfs).sort_index()
-            # drop duplicate indices keeping first occurrence
-            merged_df = merged_df[~merged_df.index.duplicated(keep='first')]
-        except Exception:
-            # fallback: take first df
-            merged_df = dfs[0]
+    progress_bar = st.progress(0)
 
-        # Run signal generator on merged dataframe
-        try:
-            signals = sg.generate_from_file(merged_df, sec) or []
-        except Exception as e:
+    def _progress(done, total):
+        progress_bar.progress(done / total if total else 1.0)
+
+    results = generate_for_csv_groups(
+        grouped,
+        'backtest_data',
+        config=sg.config,
+        max_workers=max_workers,
+        progress=_progress,
+        store_path=sg.store.path if sg.store else None
+    )
+    progress_bar.empty()
+
+    merged_results: List[Tuple[str, pd.DataFrame, List[Signal]]] = []
+    for r in results:
+        for warning in r.warnings:
             try:
-                st.warning(f"Signal generation failed for {sec}: {e}")
+                st.warning(warning)
             except Exception:
                 pass
-            signals = []
-
-        merged_results.append((sec, merged_df, signals))
+        if r.df is not None:
+            merged_results.append((r.symbol, r.df, r.signals))
 
     return merged_results
 
@@ -604,25 +580,14 @@ def _execute_all_trades(
             ta.trades.append(trade)
 
     # Process any remaining pending exits (for positions that close after last signal)
-    # Use a far future date to ensure all exits are processed
-    # Get timezone from data if available to avoid comparison errors
-    try:
-        sample_df = next(iter(file_dataframes.values()))
-        if hasattr(sample_df.index, 'tz') and sample_df.index.tz is not None:
-            max_timestamp = pd.Timestamp.max.tz_localize(sample_df.index.tz)
-        else:
-            max_timestamp = pd.Timestamp.max
-    except:
-        max_timestamp = pd.Timestamp.max
-    
-    ta._process_pending_exits(max_timestamp)
+    ta._process_pending_exits(None)
 
     # If force-close is enabled, force-close any remaining open positions using per-security dataframes
     try:
         if get_force_close_at_end():
             ta.force_close_open_positions(file_dataframes)
             # finalize forced closes
-            ta._process_pending_exits(max_timestamp)
+            ta._process_pending_exits(None)
     except Exception:
         pass
 
@@ -896,7 +861,7 @@ def _display_results(summary, trades_df: pd.DataFrame, portfolio=None, data_dict
                             atr_full = next(iter(atr_cache.values()), None)
                         if atr_full is not None:
                             atr_slice = atr_full.iloc[start_idx:end_idx + 1]
-                            ax_atr.plot([mdates.date2num(d) for d in df_slice.index], atr_slice.values, color='#6a51a3', linewidth=1.2)
+                            ax_atr.plot(mdates.date2num(df_slice.index), atr_slice.values, color='#6a51a3', linewidth=1.2)
                         ax_atr.set_ylabel("ATR(14)")
                         ax_atr.grid(True, linestyle='--', linewidth=0.5, alpha=0.4)
 
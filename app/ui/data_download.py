@@ -2,14 +2,18 @@
 Data Download UI component - Download/update stock data into SQLite database.
 """
 import os
-import sqlite3
-import time
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 
 import pandas as pd
 import streamlit as st
 
+from service.connection_pool import get_pool
+from service.backfill_planner import BackfillPlanner, BackfillWindow, to_exchange_time
+from service.bar_store import bar_store_for
+from service.download_engine import CandleRequest, CandleResult, DownloadEngine, TokenBucket
+from utility.file_util import merge_bars_into_csv
+
 # ── Database path (relative to working directory, i.e. app/) ──────────────
 DB_PATH = os.path.join(
     os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
@@ -19,7 +23,7 @@ DB_PATH = os.path.join(
 
 # ── Token map (reuse from download_stocks) ────────────────────────────────
 def _get_stock_tokens() -> Dict[str, str]:
-    """Import and return the stock_tokens dict from download_stocks module."""
+    """Import and return the stock_tokens mapping (symbol -> token) from download_stocks module."""
     try:
         from utility.download_stocks import stock_tokens
         return stock_tokens
@@ -32,7 +36,7 @@ def _get_db_summary(db_path: str) -> pd.DataFrame:
     if not os.path.exists(db_path):
         return pd.DataFrame(columns=["symbol", "records", "earliest", "latest"])
     try:
-        conn = sqlite3.connect(db_path)
+        conn = get_pool(db_path, read_only=True).connection()
         df = pd.read_sql_query(
             """
             SELECT symbol,
@@ -45,24 +49,20 @@ def _get_db_summary(db_path: str) -> pd.DataFrame:
             """,
             conn,
         )
-        conn.close()
         return df
     except Exception:
         return pd.DataFrame(columns=["symbol", "records", "earliest", "latest"])
 
 
-def _get_last_date_for_symbol(db_path: str, symbol: str) -> Optional[str]:
-    """Return the latest datetime string stored for *symbol*, or None."""
+def _get_first_date_for_symbol(db_path: str, symbol: str) -> Optional[str]:
+    """Return the earliest datetime string stored for *symbol*, or None."""
     if not os.path.exists(db_path):
         return None
     try:
-        conn = sqlite3.connect(db_path)
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT MAX(datetime) FROM stock_data WHERE symbol = ?", (symbol,)
-        )
-        row = cur.fetchone()
-        conn.close()
+        conn = get_pool(db_path, read_only=True).connection()
+        row = conn.execute(
+            "SELECT MIN(datetime) FROM stock_data WHERE symbol = ?", (symbol,)
+        ).fetchone()
         return row[0] if row and row[0] else None
     except Exception:
         return None
@@ -144,11 +144,19 @@ def render_data_download():
 
     save_csv = st.checkbox("Also save to CSV files (resource/data/)", value=False)
 
-    delay = st.slider(
-        "Delay between API requests (seconds)",
-        min_value=0.5, max_value=5.0, value=1.5, step=0.5,
-        help="Increase if you hit rate-limit errors.",
-    )
+    col_rate, col_flight = st.columns(2)
+    with col_rate:
+        rate = st.slider(
+            "Max API requests per second",
+            min_value=0.5, max_value=3.0, value=3.0, step=0.5,
+            help="Shared limit for all concurrent requests. Lower it if you hit rate-limit errors.",
+        )
+    with col_flight:
+        max_in_flight = st.slider(
+            "Concurrent requests",
+            min_value=1, max_value=8, value=4, step=1,
+            help="Requests kept in flight at once while earlier results are saved.",
+        )
 
     # ── Trigger download ──────────────────────────────────────────────────
     if st.button("🚀 Start Download", type="primary", use_container_width=True):
@@ -163,7 +171,8 @@ def render_data_download():
             from_date=from_date,
             to_date=to_date,
             save_csv=save_csv,
-            delay=delay,
+            rate=rate,
+            max_in_flight=max_in_flight,
             update_mode=(mode == "Update existing stocks to today"),
         )
 
@@ -178,17 +187,16 @@ def _run_download(
     from_date,
     to_date,
     save_csv: bool,
-    delay: float,
+    rate: float,
+    max_in_flight: int,
     update_mode: bool,
 ):
     """Execute the download inside Streamlit, showing live progress."""
+    import utility.download_stocks as download_stocks
     from utility.download_stocks import (
         login,
-        historical_data,
         create_database,
         save_to_database,
-        log_download,
-        granularity_map,
     )
 
     # Ensure DB exists
@@ -218,75 +226,105 @@ def _run_download(
     success_count = 0
     fail_count = 0
     skip_count = 0
-    total = len(symbols)
 
     results_log: List[Dict] = []
-
-    for idx, symbol in enumerate(symbols):
+    # Writes happen on this thread; the pooled connection is reused across symbols
+    conn = get_pool(db_path).connection()
+    planner = BackfillPlanner(conn)
+    bar_store = bar_store_for(db_path)
+    windows: List[BackfillWindow] = []
+    five_years_ago = (datetime.now() - timedelta(days=365 * 5)).replace(hour=9, minute=15, second=0, microsecond=0)
+    sym_to = datetime.combine(to_date, datetime.min.time()).replace(hour=15, minute=30)
+
+    # Plan the missing windows of every symbol
+    for symbol in symbols:
         token = stock_tokens.get(symbol)
         if not token:
             results_log.append({"symbol": symbol, "status": "⚠️ skipped", "detail": "Token not found"})
             skip_count += 1
-            progress_bar.progress((idx + 1) / total)
             continue
 
-        # Determine from_date for this symbol
+        # Update mode keeps each symbol's history start; holes and the tail are filled
         if update_mode or from_date is None:
-            last = _get_last_date_for_symbol(db_path, symbol)
-            if last:
-                sym_from = pd.to_datetime(last) + timedelta(days=1)
-                sym_from = sym_from.to_pydatetime()
-            else:
-                sym_from = datetime.now() - timedelta(days=365 * 5)
+            first = _get_first_date_for_symbol(db_path, symbol)
+            sym_from = to_exchange_time([first])[0].to_pydatetime() if first else five_years_ago
         else:
-            sym_from = datetime.combine(from_date, datetime.min.time())
-
-        sym_to = datetime.combine(to_date, datetime.min.time()).replace(hour=15, minute=30)
-        sym_from = sym_from.replace(hour=9, minute=15, second=0, microsecond=0)
+            sym_from = datetime.combine(from_date, datetime.min.time()).replace(hour=9, minute=15)
 
-        # Skip if already up to date
-        if sym_from.date() >= sym_to.date():
-            results_log.append({"symbol": symbol, "status": "✅ up-to-date", "detail": f"Last date: {sym_from.date() - timedelta(days=1)}"})
+        planned = planner.plan(symbol, token, interval, sym_from, sym_to)
+        if not planned:
+            results_log.append({"symbol": symbol, "status": "✅ up-to-date", "detail": f"Through {sym_to.date()}"})
             skip_count += 1
-            progress_bar.progress((idx + 1) / total)
             continue
-
-        from_str = sym_from.strftime("%Y-%m-%d %H:%M")
-        to_str = sym_to.strftime("%Y-%m-%d %H:%M")
-
-        status_area.info(f"⬇️ [{idx+1}/{total}] Downloading **{symbol}** ({from_str[:10]} → {to_str[:10]}) …")
-
-        try:
-            df, error = historical_data("NSE", token, from_str, to_str, interval)
-
-            if df is not None and not df.empty:
-                save_to_database(df, symbol, db_path)
-                log_download(symbol, token, "success", len(df), None, db_path)
-                if save_csv:
-                    csv_path = os.path.join(csv_dir, f"{symbol}_1_day_5_years.csv")
-                    df.to_csv(csv_path, index=False)
-                results_log.append({"symbol": symbol, "status": "✅ success", "detail": f"{len(df)} records"})
-                success_count += 1
-            else:
-                err = error or "No data"
-                log_download(symbol, token, "failed", 0, err, db_path)
-                results_log.append({"symbol": symbol, "status": "❌ failed", "detail": err})
+        windows.extend(planned)
+
+    window_of = {}
+    requests: List[CandleRequest] = []
+    remaining: Dict[str, int] = {}
+    for window in windows:
+        request = window.request()
+        window_of[id(request)] = window
+        requests.append(request)
+        remaining[window.symbol] = remaining.get(window.symbol, 0) + 1
+    failed_symbols = set()
+    csv_frames: Dict[str, List[pd.DataFrame]] = {}
+    done = 0
+    status_area.info(f"⬇️ {len(requests)} request windows planned for {len(remaining)} stocks …")
+
+    def _handle(result: CandleResult):
+        nonlocal done, success_count, fail_count
+        done += 1
+        window = window_of[id(result.request)]
+        symbol, df = result.symbol, result.df
+        span = f"{result.request.from_date[:10]} → {result.request.to_date[:10]}"
+        if result.ok:
+            save_to_database(df, symbol, db_path, conn)
+            planner.record(window, len(df))
+            if save_csv:
+                csv_frames.setdefault(symbol, []).append(df)
+            results_log.append({"symbol": symbol, "status": "✅ success", "detail": f"{span}: {len(df)} records"})
+        elif result.answered:
+            # No bars in this window; recorded so it is not requested again
+            planner.record(window, 0)
+            results_log.append({"symbol": symbol, "status": "✅ empty", "detail": f"{span}: no data"})
+        else:
+            err = result.error or "No data"
+            planner.record(window, 0, err)
+            results_log.append({"symbol": symbol, "status": "❌ failed", "detail": f"{span}: {err}"})
+            failed_symbols.add(symbol)
+
+        remaining[symbol] -= 1
+        if remaining[symbol] == 0:
+            if symbol in failed_symbols:
                 fail_count += 1
-        except Exception as exc:
-            log_download(symbol, token, "failed", 0, str(exc), db_path)
-            results_log.append({"symbol": symbol, "status": "❌ error", "detail": str(exc)})
+            else:
+                success_count += 1
+            # Refresh the memory-mapped copy backtests read
+            try:
+                bar_store.sync_from_db(conn, [symbol])
+            except Exception as e:
+                results_log.append({"symbol": symbol, "status": "⚠️ bar store", "detail": str(e)})
+            if save_csv and csv_frames.get(symbol):
+                merge_bars_into_csv(os.path.join(csv_dir, f"{symbol}_1_day_5_years.csv"), csv_frames.pop(symbol))
+        status_area.info(f"⬇️ [{done}/{len(requests)}] Downloaded **{symbol}** ({span})")
+        progress_bar.progress(done / len(requests))
+
+    engine = DownloadEngine(download_stocks.obj, TokenBucket(rate), max_in_flight=max_in_flight)
+    stats = engine.run(requests, _handle)
+    for symbol, err in stats.failed.items():
+        # Failures raised while saving a result
+        if remaining.get(symbol):
+            results_log.append({"symbol": symbol, "status": "❌ error", "detail": err})
             fail_count += 1
 
-        progress_bar.progress((idx + 1) / total)
-
-        if idx < total - 1:
-            time.sleep(delay)
-
     # ── Summary ───────────────────────────────────────────────────────────
     progress_bar.progress(1.0)
     status_area.empty()
 
-    st.success(f"Download complete — ✅ {success_count} succeeded, ❌ {fail_count} failed, ⏭️ {skip_count} skipped.")
+    st.success(
+        f"Download complete — ✅ {success_count} succeeded, ❌ {fail_count} failed, ⏭️ {skip_count} skipped "
+        f"in {stats.elapsed:.0f}s ({stats.rate_limit_count} rate-limit retries)."
+    )
 
     if results_log:
         with st.expander("Download details", expanded=True):
@@ -10,6 +10,21 @@ import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Per-process optimizer for pool workers, installed once by _init_worker
+# (together with its signal cache) so each task only ships its parameter dict.
+_worker_optimizer: Optional['BacktestOptimizer'] = None
+
+
+def _init_worker(optimizer: 'BacktestOptimizer'):
+    """ProcessPoolExecutor initializer: receive the optimizer and its cached signals once."""
+    global _worker_optimizer
+    _worker_optimizer = optimizer
+
+
+def _run_in_worker(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one parameter combination inside a pool worker."""
+    return _worker_optimizer._run_single_backtest(params, _worker_optimizer._signal_cache)
+
 
 class BacktestOptimizer:
     """Optimize backtest parameters to maximize profit."""
@@ -35,6 +50,7 @@ class BacktestOptimizer:
         self.trade_agent_class = trade_agent_class
         self.signal_generator = signal_generator
         self.results = []
+        self._signal_cache: Optional[list] = None
     
     def optimize(
         self,
@@ -67,16 +83,28 @@ class BacktestOptimizer:
         
         logger.info(f"Testing {len(combinations)} parameter combinations")
         
+        # Signals do not depend on the agent parameters: generate them once
+        # and share them with every combination.
+        try:
+            self._signal_cache = self._generate_all_signals()
+        except Exception as e:
+            logger.error(f"Error generating signals, falling back to per-combination generation: {e}")
+            self._signal_cache = None
+        
         # Run backtests for each combination
         results = []
         
         if max_workers > 1:
-            # Parallel execution
-            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # Parallel execution; workers receive the cached signals once
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(self,)
+            ) as executor:
                 futures = {}
                 for combo in combinations:
                     params = dict(zip(param_names, combo))
-                    future = executor.submit(self._run_single_backtest, params)
+                    future = executor.submit(_run_in_worker, params)
                     futures[future] = params
                 
                 for i, future in enumerate(as_completed(futures)):
@@ -92,7 +120,7 @@ class BacktestOptimizer:
             for i, combo in enumerate(combinations):
                 params = dict(zip(param_names, combo))
                 try:
-                    result = self._run_single_backtest(params)
+                    result = self._run_single_backtest(params, self._signal_cache)
                     results.append(result)
                     logger.info(f"[{i+1}/{len(combinations)}] Completed: {params}")
                 except Exception as e:
@@ -110,12 +138,33 @@ class BacktestOptimizer:
         
         return results_df
     
-    def _run_single_backtest(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    def _generate_all_signals(self) -> list:
+        """
+        Generate signals for every symbol, sorted by date.
+        
+        Returns:
+            List of signals across all symbols
+        """
+        all_signals = []
+        for symbol, df in self.data_dict.items():
+            signals = self.signal_generator.generate_signals(df, symbol)
+            all_signals.extend(signals)
+        
+        logger.info(f"Generated {len(all_signals)} signals for {len(self.data_dict)} symbols")
+        
+        # Sort signals by date
+        return sorted(
+            all_signals,
+            key=lambda s: s.date if s.date is not None else pd.Timestamp.min
+        )
+    
+    def _run_single_backtest(self, params: Dict[str, Any], signals: Optional[list] = None) -> Dict[str, Any]:
         """
         Run a single backtest with given parameters.
         
         Args:
             params: Dictionary of parameters for TradeAgent
+            signals: Precomputed, date-sorted signals; generated here when omitted
         
         Returns:
             Dictionary with backtest results and metrics
@@ -135,17 +184,8 @@ class BacktestOptimizer:
             
             trade_agent = self.trade_agent_class(**agent_params)
             
-            # Generate signals for all symbols
-            all_signals = []
-            for symbol, df in self.data_dict.items():
-                signals = self.signal_generator.generate_signals(df, symbol)
-                all_signals.extend(signals)
-            
-            # Sort signals by date
-            all_signals = sorted(
-                all_signals,
-                key=lambda s: s.date if s.date is not None else pd.Timestamp.min
-            )
+            # Signals are shared between combinations; agents only read them
+            all_signals = list(signals) if signals is not None else self._generate_all_signals()
             
             # Execute trades (use first DataFrame as reference)
             first_df = list(self.data_dict.values())[0]
@@ -203,38 +243,41 @@ class BacktestOptimizer:
             pnl_col = 'pnl' if 'pnl' in trades_df.columns else 'PnL'
             cash_after_col = 'cash_after' if 'cash_after' in trades_df.columns else 'Cash_After'
             
-            # Win/Loss metrics
+            # Win/Loss metrics on the PnL column's array; filtering whole frames would copy every column
             if pnl_col in trades_df.columns:
-                completed_trades = trades_df[trades_df[pnl_col] != 0]
+                pnl = trades_df[pnl_col].to_numpy(dtype=float)
+                completed_pnl = pnl[pnl != 0]
             else:
-                completed_trades = trades_df
+                pnl = completed_pnl = np.empty(0)
             
-            if len(completed_trades) > 0 and pnl_col in trades_df.columns:
-                winning_trades = completed_trades[completed_trades[pnl_col] > 0]
-                losing_trades = completed_trades[completed_trades[pnl_col] < 0]
+            if len(completed_pnl) > 0:
+                winning_pnl = completed_pnl[completed_pnl > 0]
+                losing_pnl = completed_pnl[completed_pnl < 0]
                 
-                metrics['winning_trades'] = len(winning_trades)
-                metrics['losing_trades'] = len(losing_trades)
+                metrics['winning_trades'] = len(winning_pnl)
+                metrics['losing_trades'] = len(losing_pnl)
                 metrics['win_rate'] = (
-                    len(winning_trades) / len(completed_trades) * 100
-                    if len(completed_trades) > 0 else 0
+                    len(winning_pnl) / len(completed_pnl) * 100
+                    if len(completed_pnl) > 0 else 0
                 )
                 
                 # Profit factor
-                total_wins = winning_trades[pnl_col].sum() if len(winning_trades) > 0 else 0
-                total_losses = abs(losing_trades[pnl_col].sum()) if len(losing_trades) > 0 else 0
+                total_wins = winning_pnl.sum() if len(winning_pnl) > 0 else 0
+                total_losses = abs(losing_pnl.sum()) if len(losing_pnl) > 0 else 0
                 metrics['profit_factor'] = (
                     total_wins / total_losses if total_losses > 0 else float('inf')
                 )
                 
                 # Average trade metrics
                 metrics['avg_win'] = (
-                    winning_trades[pnl_col].mean() if len(winning_trades) > 0 else 0
+                    winning_pnl.mean() if len(winning_pnl) > 0 else 0
                 )
                 metrics['avg_loss'] = (
-                    losing_trades[pnl_col].mean() if len(losing_trades) > 0 else 0
+                    losing_pnl.mean() if len(losing_pnl) > 0 else 0
                 )
-                metrics['avg_trade'] = completed_trades[pnl_col].mean()
+                # Skip missing PnL like Series.mean
+                valid_pnl = completed_pnl[~np.isnan(completed_pnl)]
+                metrics['avg_trade'] = valid_pnl.mean() if len(valid_pnl) > 0 else np.nan
                 
                 # Expectancy
                 if metrics['win_rate'] > 0:
@@ -252,7 +295,7 @@ class BacktestOptimizer:
                 
                 # Calculate drawdown
                 if cash_after_col in trades_df.columns:
-                    equity_curve = trades_df[cash_after_col].values
+                    equity_curve = trades_df[cash_after_col].to_numpy()
                     drawdown = self._calculate_drawdown(equity_curve)
                     metrics['max_drawdown'] = drawdown['max_drawdown']
                     metrics['max_drawdown_pct'] = drawdown['max_drawdown_pct']
@@ -262,7 +305,7 @@ class BacktestOptimizer:
                 
                 # Sharpe ratio (simplified - assuming daily returns)
                 if pnl_col in trades_df.columns and len(trades_df) > 1:
-                    returns = trades_df[pnl_col].values
+                    returns = pnl
                     if len(returns) > 0 and returns.std() > 0:
                         metrics['sharpe_ratio'] = (
                             returns.mean() / returns.std() * np.sqrt(252)
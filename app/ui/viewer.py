@@ -8,6 +8,7 @@ from ui.common import normalize_signals_to_df, get_force_close_at_end
 from utility.utility import load_data, atr_series
 from ui.signal_utils import filter_buy_signals, format_trades_dates
 from utility.file_util import get_security_name
+from service.data_catalog import get_catalog
 from utility.plot_utils import draw_candlesticks, draw_boxes, draw_signals, setup_chart_axes
 
 
@@ -97,9 +98,9 @@ def render_viewer(CSV_FILES, SignalGenerator, TradeAgent, fvg_plotter_fn, alloca
         st.info("No CSV files found in resource/data. Place CSVs under resource/data and reload.")
         return
 
-    # compute rows using provided load_data to avoid direct file path operations
+    # row count comes from the data catalog, so the file is only parsed on "Run Simulation"
     try:
-        rows = len(load_data(file_name))
+        rows = get_catalog().rows(file_name, 'data')
     except Exception:
         rows = 0
 
@@ -264,7 +265,7 @@ def render_viewer(CSV_FILES, SignalGenerator, TradeAgent, fvg_plotter_fn, alloca
                             setup_chart_axes(ax_price, title=f"Trade {trade_num} ({trade_side})")
 
                             atr_slice = atr_full.iloc[start_idx:end_idx + 1]
-                            ax_atr.plot([mdates.date2num(d) for d in df_slice.index], atr_slice.values, color='#6a51a3', linewidth=1.2)
+                            ax_atr.plot(mdates.date2num(df_slice.index), atr_slice.values, color='#6a51a3', linewidth=1.2)
                             ax_atr.set_ylabel("ATR(14)")
                             ax_atr.grid(True, linestyle='--', linewidth=0.5, alpha=0.4)
 
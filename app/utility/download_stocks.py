@@ -1,13 +1,25 @@
 import os
 import re
-import time
+import sys
 import sqlite3
 from datetime import datetime, timedelta
+from pathlib import Path
 from dotenv import load_dotenv
 from SmartApi import SmartConnect
 import pandas as pd
 import pyotp
 
+# Add app directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from service.connection_pool import get_pool
+from service.backfill_planner import BackfillPlanner, ensure_window_columns, split_range
+from service.bar_store import bar_store_for
+from service.download_engine import CANDLE_REQUESTS_PER_SECOND, DownloadEngine, TokenBucket
+from service.instrument_master import TokenMap
+from service.sqlite_bulk import apply_write_pragmas, bulk_insert, ohlcv_rows, timestamp_strings
+from utility.file_util import merge_bars_into_csv
+
 # Load environment variables
 load_dotenv()
 
@@ -98,6 +110,8 @@ def create_database(db_path='resource/stock_data.db'):
     """Create SQLite database and tables"""
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
     conn = sqlite3.connect(db_path)
+    # WAL is persistent, so every later connection to this file benefits
+    apply_write_pragmas(conn)
     cursor = conn.cursor()
     
     # Create table for stock data
@@ -125,56 +139,59 @@ def create_database(db_path='resource/stock_data.db'):
             status TEXT,
             records_count INTEGER,
             error_message TEXT,
-            download_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            download_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            interval TEXT,
+            window_start TEXT,
+            window_end TEXT
         )
     ''')
     
     # Create indexes
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_symbol_datetime ON stock_data(symbol, datetime)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_download_log_symbol ON download_log(symbol, download_date)')
+    # Older databases get the window columns added
+    ensure_window_columns(conn)
     
     conn.commit()
     conn.close()
     print(f"✓ Database created/verified at {db_path}")
 
-def save_to_database(df, symbol, db_path='resource/stock_data.db'):
-    """Save dataframe to SQLite database"""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Add symbol column
-    df_copy = df.copy()
-    df_copy['symbol'] = symbol
-    
-    # Rename columns to match database schema
-    df_copy.columns = ['datetime', 'open', 'high', 'low', 'close', 'volume', 'symbol']
+def save_to_database(df, symbol, db_path='resource/stock_data.db', conn=None):
+    """Save dataframe to SQLite database in a single bulk transaction"""
+    if conn is None:
+        conn = get_pool(db_path).connection()
+    
+    # Columns are positional: datetime, open, high, low, close, volume
+    datetime_col, open_col, high_col, low_col, close_col, volume_col = df.columns
+    rows = ohlcv_rows(
+        symbol,
+        timestamp_strings(df[datetime_col]),
+        df,
+        (open_col, high_col, low_col, close_col, volume_col)
+    )
     
     # Insert or replace data
-    for _, row in df_copy.iterrows():
-        cursor.execute('''
-            INSERT OR REPLACE INTO stock_data (symbol, datetime, open, high, low, close, volume)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (row['symbol'], row['datetime'], row['open'], row['high'], row['low'], row['close'], row['volume']))
-    
-    conn.commit()
-    conn.close()
+    bulk_insert(conn, '''
+        INSERT OR REPLACE INTO stock_data (symbol, datetime, open, high, low, close, volume)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
 
-def log_download(symbol, token, status, records_count, error_message, db_path='resource/stock_data.db'):
-    """Log download attempt"""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+def log_download(symbol, token, status, records_count, error_message, db_path='resource/stock_data.db', conn=None):
+    """Log download attempt on the pooled (or given) connection"""
+    if conn is None:
+        conn = get_pool(db_path).connection()
     
-    cursor.execute('''
+    conn.execute('''
         INSERT INTO download_log (symbol, token, status, records_count, error_message)
         VALUES (?, ?, ?, ?, ?)
     ''', (symbol, token, status, records_count, error_message))
-    
     conn.commit()
-    conn.close()
 
 
-# Extended stock symbols with their Angel One tokens
-stock_tokens = {
+# Stock universe with the Angel One tokens it was set up with; tokens are resolved
+# through the daily-cached instrument master, and these are the fallback when it
+# is unavailable
+STOCK_TOKENS = {
     # Banking & Financial Services
     'HDFCBANK': '1333',
     'ICICIBANK': '4963',
@@ -312,6 +329,9 @@ stock_tokens = {
     'NBCC': '31415',
 }
 
+
+stock_tokens = TokenMap(STOCK_TOKENS, fallback=STOCK_TOKENS)
+
 def extract_stock_symbols(filename):
     """Extract stock symbols from stock_list.txt"""
     symbols = []
@@ -475,8 +495,13 @@ def extract_stock_symbols(filename):
         print(f"Error reading stock_list.txt: {e}")
         return []
 
-def download_stock_data(symbols, granularity='1 day', period='5 years', save_to_db=True, save_to_csv=True, delay_between_requests=1.0):
-    """Download stock data for given symbols"""
+def download_stock_data(symbols, granularity='1 day', period='5 years', save_to_db=True, save_to_csv=True,
+                        requests_per_second=CANDLE_REQUESTS_PER_SECOND, max_in_flight=4):
+    """Download stock data for given symbols, several requests at a time under the API rate limit.
+    
+    With save_to_db, only windows missing from the database (and not logged as
+    done by an earlier run) are requested, so an interrupted run resumes.
+    """
     if not symbols:
         print("No valid stock symbols found!")
         return
@@ -487,7 +512,7 @@ def download_stock_data(symbols, granularity='1 day', period='5 years', save_to_
     print(f"Period: {period}")
     print(f"Save to DB: {save_to_db}")
     print(f"Save to CSV: {save_to_csv}")
-    print(f"Delay between requests: {delay_between_requests}s")
+    print(f"Rate limit: {requests_per_second} requests/s, {max_in_flight} in flight")
     
     # Create database if saving to DB
     db_path = 'resource/stock_data.db'
@@ -499,6 +524,9 @@ def download_stock_data(symbols, granularity='1 day', period='5 years', save_to_
         print("Failed to login. Please check your credentials in .env file.")
         return
     
+    # One pooled connection for all writes and log entries of this run
+    conn = get_pool(db_path).connection() if save_to_db else None
+    
     # Get date range
     now = datetime.now()
     if period == '1 month':
@@ -516,9 +544,6 @@ def download_stock_data(symbols, granularity='1 day', period='5 years', save_to_
     from_date = from_date.replace(hour=9, minute=15, second=0, microsecond=0)
     to_date = to_date.replace(hour=15, minute=30, second=0, microsecond=0)
     
-    from_date_str = from_date.strftime('%Y-%m-%d %H:%M')
-    to_date_str = to_date.strftime('%Y-%m-%d %H:%M')
-    
     interval = granularity_map.get(granularity, 'ONE_DAY')
     
     # Create output directory for CSV
@@ -526,69 +551,83 @@ def download_stock_data(symbols, granularity='1 day', period='5 years', save_to_
     if save_to_csv:
         os.makedirs(output_dir, exist_ok=True)
     
-    success_count = 0
     failed_stocks = {}
-    rate_limit_count = 0
     
-    # Download data for each symbol
-    for i, symbol in enumerate(symbols, 1):
-        print(f"\n[{i}/{len(symbols)}] Downloading {symbol}...")
-        
-        token = stock_tokens.get(symbol)
-        if not token:
+    for symbol in symbols:
+        if not stock_tokens.get(symbol):
             error_msg = "Token not found"
-            print(f"  ⚠ {error_msg}")
+            print(f"  ⚠ {symbol}: {error_msg}")
             failed_stocks[symbol] = error_msg
             if save_to_db:
-                log_download(symbol, None, 'failed', 0, error_msg, db_path)
-            continue
-        
-        # Add delay to avoid rate limiting
-        if i > 1:
-            time.sleep(delay_between_requests)
-        
-        try:
-            df, error = historical_data("NSE", token, from_date_str, to_date_str, interval)
-            
-            if df is not None and not df.empty:
-                # Save to database
-                if save_to_db:
-                    try:
-                        save_to_database(df, symbol, db_path)
-                        log_download(symbol, token, 'success', len(df), None, db_path)
-                    except Exception as db_error:
-                        print(f"  ⚠ DB save error: {db_error}")
-                
-                # Save to CSV
-                if save_to_csv:
-                    filename = f"{output_dir}/{symbol}_{granularity.replace(' ', '_')}_{period.replace(' ', '_')}.csv"
-                    df.to_csv(filename, index=False)
-                    print(f"  ✓ Downloaded {len(df)} records (CSV: {filename})")
-                else:
-                    print(f"  ✓ Downloaded {len(df)} records (saved to DB)")
-                
-                success_count += 1
-            else:
-                # Categorize the error
-                if error and 'rate' in error.lower():
-                    rate_limit_count += 1
-                    error_msg = "Rate limit exceeded"
-                else:
-                    error_msg = error or "No data available"
-                
-                print(f"  ✗ {error_msg}")
-                failed_stocks[symbol] = error_msg
-                
-                if save_to_db:
-                    log_download(symbol, token, 'failed', 0, error_msg, db_path)
-                    
-        except Exception as e:
-            error_msg = str(e)
-            print(f"  ✗ Error: {error_msg}")
-            failed_stocks[symbol] = error_msg
-            
+                log_download(symbol, None, 'failed', 0, error_msg, db_path, conn)
+    
+    # Split what is missing into API-sized windows
+    planner = BackfillPlanner(conn) if save_to_db else None
+    if planner:
+        windows = planner.plan_many(stock_tokens, interval, from_date, to_date, symbols)
+    else:
+        windows = [w for s in symbols if stock_tokens.get(s)
+                   for w in split_range(s, stock_tokens[s], interval, from_date, to_date)]
+    print(f"\nPlanned {len(windows)} request windows")
+    
+    window_of = {}
+    requests = []
+    remaining = {}
+    for window in windows:
+        request = window.request()
+        window_of[id(request)] = window
+        requests.append(request)
+        remaining[window.symbol] = remaining.get(window.symbol, 0) + 1
+    csv_frames = {}
+    bar_store = bar_store_for(db_path) if save_to_db else None
+    engine = DownloadEngine(obj, TokenBucket(requests_per_second), max_in_flight=max_in_flight)
+    done = 0
+    
+    def handle(result):
+        # Runs on this thread while the engine keeps the next requests in flight
+        nonlocal done
+        done += 1
+        window = window_of[id(result.request)]
+        symbol, df = result.symbol, result.df
+        print(f"\n[{done}/{len(requests)}] {symbol} {result.request.from_date[:10]} → {result.request.to_date[:10]}")
+        if result.ok:
+            if save_to_db:
+                try:
+                    save_to_database(df, symbol, db_path, conn)
+                    planner.record(window, len(df))
+                except Exception as db_error:
+                    print(f"  ⚠ DB save error: {db_error}")
+            if save_to_csv:
+                csv_frames.setdefault(symbol, []).append(df)
+            print(f"  ✓ Downloaded {len(df)} records")
+        elif result.answered:
+            # Nothing traded in this window; remember it so it is not asked again
+            print("  - No data in window")
             if save_to_db:
-                log_download(symbol, token, 'failed', 0, error_msg, db_path)
+                planner.record(window, 0)
+        else:
+            print(f"  ✗ {result.error}")
+            if save_to_db:
+                planner.record(window, 0, result.error)
+        
+        remaining[symbol] -= 1
+        if bar_store and remaining[symbol] == 0:
+            # Refresh the memory-mapped copy backtests read
+            try:
+                bar_store.sync_from_db(conn, [symbol])
+            except Exception as store_error:
+                print(f"  ⚠ Bar store update error: {store_error}")
+        if save_to_csv and remaining[symbol] == 0 and csv_frames.get(symbol):
+            filename = f"{output_dir}/{symbol}_{granularity.replace(' ', '_')}_{period.replace(' ', '_')}.csv"
+            merged = merge_bars_into_csv(filename, csv_frames.pop(symbol))
+            print(f"  ✓ {symbol}: {len(merged)} records (CSV: {filename})")
+    
+    stats = engine.run(requests, handle)
+    for symbol, error in stats.failed.items():
+        if error != "No data available":
+            failed_stocks[symbol] = error
+    success_count = len({w.symbol for w in windows} - set(failed_stocks))
+    rate_limit_count = stats.rate_limit_count
     
     # Summary
     print(f"\n{'='*60}")
@@ -597,6 +636,7 @@ def download_stock_data(symbols, granularity='1 day', period='5 years', save_to_
     print(f"  Successful: {success_count}")
     print(f"  Failed: {len(failed_stocks)}")
     print(f"  Rate limit errors: {rate_limit_count}")
+    print(f"  Elapsed: {stats.elapsed:.1f}s")
     
     if failed_stocks:
         print(f"\nFailed stocks by reason:")
@@ -625,12 +665,10 @@ if __name__ == "__main__":
         print(", ".join(sorted(stock_tokens.keys())))
     else:
         # Download data at 1 day granularity for 5 years
-        # Increased delay to avoid rate limiting
         download_stock_data(
             symbols, 
             granularity='1 day', 
             period='5 years',
             save_to_db=True,
-            save_to_csv=True,
-            delay_between_requests=2.0  # 2 second delay between requests
+            save_to_csv=True
         )
@@ -1,5 +1,6 @@
 import os
 import pandas as pd
+from model.timestamps import normalize_index
 from utility.utility import load_data
 
 
@@ -37,7 +38,7 @@ def read_csv_into_df(csv_input: str) -> pd.DataFrame:
 
     # parse Date
     if 'Date' in df.columns:
-        df['Date'] = pd.to_datetime(df['Date'])
+        df['Date'] = normalize_index(df['Date'])
         df = df.set_index('Date')
 
     return df
@@ -85,3 +86,25 @@ def normalize_ohlc_columns(df: pd.DataFrame) -> pd.DataFrame:
             raise ValueError(f"Required column '{col}' not found in CSV")
 
     return df
+
+
+def merge_bars_into_csv(path: str, frames: list) -> pd.DataFrame:
+    """
+    Merge downloaded bar frames into the CSV at path and rewrite it.
+
+    Downloads only fetch the windows still missing, so the rows already in
+    the file are kept. Rows are matched on the first (timestamp) column; a
+    downloaded bar replaces the stored one for the same time.
+
+    Returns:
+        The merged frame that was written
+    """
+    parts = list(frames)
+    if os.path.isfile(path):
+        parts.insert(0, pd.read_csv(path))
+    merged = pd.concat(parts, ignore_index=True)
+    key = pd.to_datetime(merged[merged.columns[0]], utc=True, format='mixed')
+    keep = ~key.duplicated(keep='last')
+    merged = merged[keep.to_numpy()].iloc[key[keep].argsort(kind='stable')]
+    merged.to_csv(path, index=False)
+    return merged
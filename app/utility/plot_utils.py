@@ -4,7 +4,9 @@ Common plotting utilities for strategies.
 from typing import List
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from matplotlib.collections import LineCollection, PolyCollection
 from matplotlib.patches import Rectangle
+import numpy as np
 import pandas as pd
 
 from model.box import Box
@@ -13,30 +15,36 @@ from utility.utility import hex_to_rgba
 
 
 def draw_candlesticks(ax, df: pd.DataFrame, bull_color: str = '#167F52', bear_color: str = '#C21919'):
-    """Draw candlestick chart on the given axis."""
-    dates = list(df.index)
+    """Draw candlestick chart on the given axis.
+
+    All wicks go into one LineCollection and all bodies into one
+    PolyCollection, so the artist count does not grow with the bar count.
+    """
+    if len(df) == 0:
+        return
+    x = _date_nums(df.index)
+    o = df['Open'].to_numpy(dtype=float)
+    h = df['High'].to_numpy(dtype=float)
+    l = df['Low'].to_numpy(dtype=float)
+    c = df['Close'].to_numpy(dtype=float)
+    colors = np.where(c >= o, bull_color, bear_color)
     candle_width = 0.6
 
-    for i, dt in enumerate(dates):
-        o = df['Open'].iat[i]
-        h = df['High'].iat[i]
-        l = df['Low'].iat[i]
-        c = df['Close'].iat[i]
-        color = bull_color if c >= o else bear_color
-
-        # wick
-        ax.plot([mdates.date2num(dt), mdates.date2num(dt)], [l, h], color=color, linewidth=0.7)
-        # body
-        rect = Rectangle(
-            (mdates.date2num(dt) - candle_width / 2, min(o, c)),
-            candle_width,
-            max(abs(c - o), 0.0001),
-            facecolor=color,
-            edgecolor=color,
-            linewidth=0.5,
-            zorder=2
-        )
-        ax.add_patch(rect)
+    # wicks
+    wicks = np.stack([np.column_stack([x, l]), np.column_stack([x, h])], axis=1)
+    ax.add_collection(LineCollection(wicks, colors=colors, linewidths=0.7, zorder=2))
+
+    # bodies
+    bottom = np.minimum(o, c)
+    height = np.maximum(np.abs(c - o), 0.0001)
+    ax.add_collection(PolyCollection(
+        _rect_verts(x - candle_width / 2, x + candle_width / 2, bottom, bottom + height),
+        facecolors=colors,
+        edgecolors=colors,
+        linewidths=0.5,
+        zorder=2
+    ))
+    ax.autoscale_view()
 
 
 def draw_box(ax, box: Box, dates: List, default_alpha: float = 0.25):
@@ -83,26 +91,125 @@ def draw_box(ax, box: Box, dates: List, default_alpha: float = 0.25):
 
 
 def draw_boxes(ax, boxes: List[Box], dates: List, default_alpha: float = 0.25):
-    """Draw multiple boxes on the given axis."""
+    """Draw multiple boxes on the given axis as one PolyCollection."""
+    if not boxes or not len(dates):
+        return
+    x = _date_nums(dates)
+    last = len(dates) - 1
+    lefts, rights, faces, edges, widths = [], [], [], [], []
     for box in boxes:
-        draw_box(ax, box, dates, default_alpha)
+        lefts.append(x[0] if box.left < 0 or box.left > last else x[box.left])
+        rights.append(x[min(box.right, last)])
+        alpha = box.alpha if box.alpha else default_alpha
+        faces.append(hex_to_rgba(box.bg_color, alpha))
+        edges.append(hex_to_rgba(box.border_color, 1.0 if box.border_width > 0 else 0.0))
+        widths.append(box.border_width)
+
+    bottoms = np.array([b.bottom for b in boxes], dtype=float)
+    tops = np.array([b.top for b in boxes], dtype=float)
+    ax.add_collection(PolyCollection(
+        _rect_verts(np.array(lefts), np.array(rights), bottoms, tops),
+        facecolors=faces,
+        edgecolors=edges,
+        linewidths=widths,
+        zorder=1
+    ))
+    ax.autoscale_view()
+
+    # Percent labels are the only per-box artists
+    for box, left, right in zip(boxes, lefts, rights):
+        _draw_percent(ax, box, right - (right - left) * 0.02, 'right', zorder=3)
+
+
+def draw_temp_boxes(ax, boxes: List[Box], dates: List, color=(0.7, 0.7, 0.95)):
+    """Draw unconfirmed boxes in a light color, without borders, as one PolyCollection."""
+    boxes = [b for b in boxes if b.left >= 0 and b.right >= 0]
+    if not boxes or not len(dates):
+        return
+    x = _date_nums(dates)
+    last = len(dates) - 1
+    lefts = x[[min(last, b.left) for b in boxes]]
+    rights = x[[min(last, b.right) for b in boxes]]
+    bottoms = np.array([b.bottom for b in boxes], dtype=float)
+    tops = np.array([b.top for b in boxes], dtype=float)
+    ax.add_collection(PolyCollection(
+        _rect_verts(lefts, rights, bottoms, tops),
+        facecolors=[(*color, b.alpha) for b in boxes],
+        edgecolors='none',
+        zorder=0
+    ))
+    ax.autoscale_view()
+
+    for box, left, right in zip(boxes, lefts.tolist(), rights.tolist()):
+        _draw_percent(ax, box, left + (right - left) * 0.02, 'left', zorder=2)
 
 
 def draw_signals(ax, signals: List[Signal], dates: List, bull_color: str = '#167F52', bear_color: str = '#C21919'):
-    """Draw signal markers on the given axis."""
+    """Draw signal markers on the given axis.
+
+    Signals without a symbol are arrows, drawn as one scatter per direction;
+    signals labelled with their symbol stay text.
+    """
+    if not signals or not len(dates):
+        return
+    x = _date_nums(dates)
+    arrows = {True: ([], [], []), False: ([], [], [])}
     for s in signals:
         if s.index < 0 or s.index >= len(dates):
             continue
 
-        x = mdates.date2num(dates[int(s.index)])
+        xi = x[int(s.index)]
         y = s.price
 
         # Determine symbol and color
         is_bull = s.type.value == 'buy' if hasattr(s.type, 'value') else 'bull' in str(s.type).lower()
-        sym = s.symbol if s.symbol else ('↑' if is_bull else '↓')
         col = s.color if s.color else (bull_color if is_bull else bear_color)
 
-        ax.text(x, y, sym, fontsize=12, fontweight='bold', ha='center', va='center', color=col, zorder=4)
+        if s.symbol:
+            ax.text(xi, y, s.symbol, fontsize=12, fontweight='bold', ha='center', va='center', color=col, zorder=4)
+        else:
+            xs, ys, cols = arrows[is_bull]
+            xs.append(xi)
+            ys.append(y)
+            cols.append(col)
+
+    for is_bull, (xs, ys, cols) in arrows.items():
+        if xs:
+            ax.scatter(xs, ys, c=cols, marker='^' if is_bull else 'v', s=60, zorder=4)
+
+
+def _date_nums(dates) -> np.ndarray:
+    """Matplotlib date numbers of all dates in one conversion."""
+    return np.asarray(mdates.date2num(pd.DatetimeIndex(dates)), dtype=float)
+
+
+def _rect_verts(left: np.ndarray, right: np.ndarray, bottom: np.ndarray, top: np.ndarray) -> np.ndarray:
+    """Corner vertices (n, 4, 2) of axis-aligned rectangles."""
+    return np.stack([
+        np.column_stack([left, bottom]),
+        np.column_stack([right, bottom]),
+        np.column_stack([right, top]),
+        np.column_stack([left, top]),
+    ], axis=1)
+
+
+def _draw_percent(ax, box: Box, x: float, ha: str, zorder: int):
+    """Percent label in the vertical middle of a box, when it has one."""
+    if box.percent is None:
+        return
+    try:
+        ax.text(
+            x,
+            (box.top + box.bottom) / 2,
+            f"{box.percent:.2f}%",
+            verticalalignment='center',
+            horizontalalignment=ha,
+            fontsize=8,
+            color='black',
+            zorder=zorder
+        )
+    except (TypeError, ValueError):
+        pass
 
 
 def setup_chart_axes(ax, title: str, ylabel: str = "Price"):
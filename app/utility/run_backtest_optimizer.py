@@ -21,7 +21,9 @@ import pandas as pd
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from service.angel_data_downloader import AngelDataDownloader
+from service.connection_pool import close_all_pools
 from service.database_manager import DatabaseManager
+from service.signal_store import DEFAULT_STORE_PATH, configure_signal_store, get_signal_store
 from ui.optimizer import BacktestOptimizer
 from agent.paper_trade_agent import PaperTradeAgent
 from agent.signal_generator import SignalGenerator
@@ -155,13 +157,7 @@ def load_data_from_db(db_manager: DatabaseManager, symbols: list = None, max_sym
     
     logger.info(f"Loading data for {len(symbols)} symbols...")
     
-    data_dict = {}
-    for i, symbol in enumerate(symbols):
-        df = db_manager.get_ohlcv_data(symbol)
-        if df is not None and not df.empty:
-            data_dict[symbol] = df
-            if (i + 1) % 10 == 0:
-                logger.info(f"Loaded {i + 1}/{len(symbols)} symbols")
+    data_dict = db_manager.get_ohlcv_panel(symbols)
     
     logger.info(f"Successfully loaded data for {len(data_dict)} symbols")
     return data_dict
@@ -194,7 +190,7 @@ def run_optimization(data_dict: dict, param_ranges: dict = None):
     logger.info(f"Parameter ranges: {param_ranges}")
     
     # Initialize components
-    signal_generator = SignalGenerator()
+    signal_generator = SignalGenerator(store=get_signal_store())
     
     # Create optimizer
     optimizer = BacktestOptimizer(
@@ -276,8 +272,12 @@ def main():
     parser.add_argument('--db-path', type=str, default='market_data.db', help='Database file path')
     parser.add_argument('--force-refresh', action='store_true', help='Force re-download of data')
     parser.add_argument('--skip-download', action='store_true', help='Skip data download step')
+    parser.add_argument('--signal-cache', nargs='?', const=DEFAULT_STORE_PATH, default=None,
+                        help='Persist generated signals in this SQLite file (default: resource/.cache/signals.db)')
     
     args = parser.parse_args()
+    if args.signal_cache:
+        configure_signal_store(args.signal_cache)
     
     try:
         logger.info("Starting Backtest Optimization Pipeline")
@@ -323,8 +323,8 @@ def main():
         logger.error(f"Error: {e}", exc_info=True)
         sys.exit(1)
     finally:
-        if 'db_manager' in locals():
-            db_manager.close()
+        # Process shutdown: close the connections of worker threads too
+        close_all_pools()
 
 
 if __name__ == '__main__':
@@ -19,6 +19,7 @@ from ui.optimizer import BacktestOptimizer
 from agent.paper_trade_agent import PaperTradeAgent
 from agent.signal_generator import SignalGenerator
 from strategy.fvgorderblocks import FVGOrderBlocks
+from service.database_manager import read_ohlcv_panel
 
 # Configure logging
 logging.basicConfig(
@@ -65,28 +66,8 @@ def load_stock_data_from_db(db_path: str = 'resource/stock_data.db', max_symbols
     
     logger.info(f"Loading data for {len(symbols)} symbols...")
     
-    data_dict = {}
-    for i, symbol in enumerate(symbols):
-        query = """
-            SELECT datetime, open, high, low, close, volume
-            FROM stock_data
-            WHERE symbol = ?
-            ORDER BY datetime
-        """
-        df = pd.read_sql_query(query, conn, params=[symbol])
-        
-        if not df.empty:
-            # Convert datetime to pandas datetime and set as index
-            df['datetime'] = pd.to_datetime(df['datetime'])
-            df.set_index('datetime', inplace=True)
-            
-            # Rename columns to match expected format (capitalize first letter)
-            df.columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-            
-            data_dict[symbol] = df
-            
-            if (i + 1) % 20 == 0:
-                logger.info(f"Loaded {i + 1}/{len(symbols)} symbols")
+    # One scan ordered by (symbol, datetime) instead of a query per symbol
+    data_dict = read_ohlcv_panel(conn, symbols, table='stock_data', time_column='datetime')
     
     conn.close()
     
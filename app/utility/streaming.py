@@ -0,0 +1,188 @@
+"""
+Building blocks for feeding strategies one bar at a time.
+
+RollingMean and RollingMax reproduce pandas' fixed-window
+``rolling(window, min_periods=1).mean()/.max()`` bit for bit, so a
+strategy updated bar by bar ends up with the same values as a batch run.
+"""
+import math
+from collections import deque
+from typing import Any, Tuple
+
+import numpy as np
+
+from model.bars import Bars
+
+
+class GrowableArray:
+    """Append-only float array with amortized O(1) appends."""
+
+    def __init__(self, capacity: int = 256, dtype=float):
+        self._data = np.empty(max(capacity, 1), dtype=dtype)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, value):
+        if self._size == len(self._data):
+            grown = np.empty(len(self._data) * 2, dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size] = value
+        self._size += 1
+
+    def extend(self, values: np.ndarray):
+        """Append many values at once."""
+        values = np.asarray(values, dtype=self._data.dtype)
+        size = self._size + len(values)
+        if size > len(self._data):
+            grown = np.empty(max(size, len(self._data) * 2), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:size] = values
+        self._size = size
+
+    @property
+    def values(self) -> np.ndarray:
+        """View of the filled part of the buffer."""
+        return self._data[:self._size]
+
+
+class BarBuffer:
+    """Growable OHLC columns exposed as a Bars view."""
+
+    def __init__(self, capacity: int = 256):
+        self.open = GrowableArray(capacity)
+        self.high = GrowableArray(capacity)
+        self.low = GrowableArray(capacity)
+        self.close = GrowableArray(capacity)
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def append(self, open_: float, high: float, low: float, close: float):
+        self.open.append(open_)
+        self.high.append(high)
+        self.low.append(low)
+        self.close.append(close)
+
+    def extend(self, bars: Bars):
+        """Append all bars of a Bars series."""
+        self.open.extend(bars.open)
+        self.high.extend(bars.high)
+        self.low.extend(bars.low)
+        self.close.extend(bars.close)
+
+    def view(self) -> Bars:
+        return Bars(open=self.open.values, high=self.high.values,
+                    low=self.low.values, close=self.close.values)
+
+
+class RollingMean:
+    """
+    Incremental equivalent of ``Series.rolling(window, min_periods=1).mean()``.
+
+    Mirrors pandas' roll_mean: Kahan-compensated add/remove sums, the
+    consecutive-equal-value shortcut and the sign clamps, with inf treated as NaN.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = deque()
+        self._nobs = 0
+        self._neg_ct = 0
+        self._sum = 0.0
+        self._comp_add = 0.0
+        self._comp_remove = 0.0
+        self._same_count = 0
+        self._prev = math.nan
+        self._started = False
+
+    def update(self, value: float) -> float:
+        """Add the next value and return the mean of the current window."""
+        value = float(value)
+        if math.isinf(value):
+            value = math.nan
+
+        if not self._started:
+            self._prev = value
+            self._started = True
+
+        self._values.append(value)
+        if len(self._values) > self.window:
+            self._remove(self._values.popleft())
+        self._add(value)
+        return self._mean()
+
+    def _add(self, val: float):
+        if val == val:
+            self._nobs += 1
+            y = val - self._comp_add
+            t = self._sum + y
+            self._comp_add = t - self._sum - y
+            self._sum = t
+            if math.copysign(1.0, val) < 0:
+                self._neg_ct += 1
+            if val == self._prev:
+                self._same_count += 1
+            else:
+                self._same_count = 1
+            self._prev = val
+
+    def _remove(self, val: float):
+        if val == val:
+            self._nobs -= 1
+            y = -val - self._comp_remove
+            t = self._sum + y
+            self._comp_remove = t - self._sum - y
+            self._sum = t
+            if math.copysign(1.0, val) < 0:
+                self._neg_ct -= 1
+
+    def _mean(self) -> float:
+        if self._nobs <= 0:
+            return math.nan
+        result = self._sum / self._nobs
+        if self._same_count >= self._nobs:
+            result = self._prev
+        elif self._neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self._neg_ct == self._nobs and result > 0:
+            result = 0.0
+        return result
+
+
+class RollingMax:
+    """Incremental ``Series.rolling(window, min_periods=1).max()`` (NaN and inf skipped)."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._count = 0
+        self._deque = deque()  # (position, value) with decreasing values
+
+    def update(self, value: float) -> float:
+        """Add the next value and return the max of the current window."""
+        pos = self._count
+        self._count += 1
+        value = float(value)
+        if not (math.isnan(value) or math.isinf(value)):
+            while self._deque and self._deque[-1][1] <= value:
+                self._deque.pop()
+            self._deque.append((pos, value))
+        while self._deque and self._deque[0][0] <= pos - self.window:
+            self._deque.popleft()
+        return self._deque[0][1] if self._deque else math.nan
+
+
+def ohlc_values(bar: Any) -> Tuple[float, float, float, float]:
+    """
+    Extract (open, high, low, close) from a bar.
+
+    Accepts a mapping or Series with Open/High/Low/Close keys, or a 4-tuple.
+    """
+    if isinstance(bar, (tuple, list, np.ndarray)):
+        open_, high, low, close = bar
+    else:
+        open_, high, low, close = bar['Open'], bar['High'], bar['Low'], bar['Close']
+    return float(open_), float(high), float(low), float(close)
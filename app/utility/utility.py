@@ -1,19 +1,53 @@
+import logging
 import os
 
+import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional; load_data then parses the CSV every time
+    pa = None
+
+from model.timestamps import normalize_index
+
+logger = logging.getLogger(__name__)
+
+# Normalized frames are cached as Arrow IPC files in this folder next to the CSV
+CACHE_DIR_NAME = '.cache'
+# Bump when the normalization in _parse_ohlc_csv changes to invalidate old caches
+_CACHE_VERSION = '2'
+
 
 def atr_series(df: pd.DataFrame, period: int = 14) -> pd.Series:
     """Wilder-style ATR approximation: rolling mean of true range for period."""
-    high = df['High']
-    low = df['Low']
-    close = df['Close']
-    prev_close = close.shift(1)
-    tr1 = high - low
-    tr2 = (high - prev_close).abs()
-    tr3 = (low - prev_close).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    return tr.rolling(period, min_periods=1).mean()
+    atr = atr_array(df['High'].to_numpy(dtype=float),
+                    df['Low'].to_numpy(dtype=float),
+                    df['Close'].to_numpy(dtype=float),
+                    period=period)
+    return pd.Series(atr, index=df.index)
+
+
+def atr_array(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Array version of atr_series; NaN-skipping max of the three true range legs."""
+    prev_close = shift_array(close, 1)
+    tr = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+    return pd.Series(tr).rolling(period, min_periods=1).mean().to_numpy()
+
+
+def shift_array(values: np.ndarray, periods: int) -> np.ndarray:
+    """Shift a float array forward by periods, filling the head with NaN (like Series.shift)."""
+    n = len(values)
+    out = np.empty(n, dtype=float)
+    periods = min(max(periods, 0), n)
+    out[:periods] = np.nan
+    out[periods:] = values[:n - periods]
+    return out
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """Rolling max over window with min_periods=1, matching pandas semantics."""
+    return pd.Series(values).rolling(window, min_periods=1).max().to_numpy()
 
 
 def hex_to_rgba(hex_color: str, alpha: float = 1.0):
@@ -81,11 +115,15 @@ def _clean_numeric_series(s: pd.Series) -> pd.Series:
         return pd.to_numeric(s, errors='coerce')
 
 
-def load_data(file_name: str, folder: str = 'data') -> pd.DataFrame:
+def load_data(file_name: str, folder: str = 'data', use_cache: bool = True) -> pd.DataFrame:
     """
     Load OHLC data from a CSV file in resource/<folder> whose name contains the filter string.
     If file_name is an absolute/relative path to an existing file, it will be loaded directly.
     Returns a DataFrame with Date index and columns Open/High/Low/Close as numeric types.
+
+    The normalized frame is cached as an Arrow file in a .cache folder next to
+    the CSV, keyed by the CSV's path, mtime and size; later loads read the
+    cache instead of parsing the CSV again. Pass use_cache=False to bypass it.
     """
     # If a path is provided, use it directly
     if os.path.isfile(file_name):
@@ -97,12 +135,24 @@ def load_data(file_name: str, folder: str = 'data') -> pd.DataFrame:
         if not os.path.isdir(data_dir):
             raise FileNotFoundError(f"Resource folder not found: {data_dir}")
 
-        candidates = [f for f in os.listdir(data_dir) if file_name.lower() in f.lower() and f.lower().endswith('.csv')]
-        if not candidates:
+        # the data catalog matches names without listing the folder on every call
+        from service.data_catalog import get_catalog
+        file_path = get_catalog().resolve(file_name, folder)
+        if file_path is None:
             raise FileNotFoundError(f"No CSV file found in {data_dir} containing '{file_name}'")
-        # pick first candidate
-        file_path = os.path.join(data_dir, candidates[0])
 
+    if not use_cache or pa is None:
+        return _parse_ohlc_csv(file_path)
+
+    df = _read_cache(file_path)
+    if df is None:
+        df = _parse_ohlc_csv(file_path)
+        _write_cache(file_path, df)
+    return df
+
+
+def _parse_ohlc_csv(file_path: str) -> pd.DataFrame:
+    """Read a CSV and normalize it to a Date-indexed frame with numeric Open/High/Low/Close."""
     # Read CSV
     df = pd.read_csv(file_path, dtype=str)
 
@@ -130,11 +180,8 @@ def load_data(file_name: str, folder: str = 'data') -> pd.DataFrame:
     for col in ['Open', 'High', 'Low', 'Close']:
         df[col] = _clean_numeric_series(df[col])
 
-    # Parse Date and set index
-    try:
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    except Exception:
-        df['Date'] = pd.to_datetime(df['Date'], infer_datetime_format=True, errors='coerce')
+    # Parse Date to the canonical nanosecond index (see model.timestamps) and set index
+    df['Date'] = normalize_index(df['Date'])
 
     if df['Date'].isna().all():
         raise ValueError(f"Date column could not be parsed in file: {file_path}")
@@ -143,4 +190,61 @@ def load_data(file_name: str, folder: str = 'data') -> pd.DataFrame:
     # Sort by date ascending
     df = df.sort_index()
 
-    return df
\ No newline at end of file
+    return df
+
+def _cache_path(file_path: str) -> str:
+    folder, name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(folder, CACHE_DIR_NAME, name + '.arrow')
+
+
+def _cache_key(file_path: str) -> dict:
+    """Schema metadata identifying the exact CSV a cache was built from."""
+    stat = os.stat(file_path)
+    return {
+        b'source_path': os.path.abspath(file_path).encode(),
+        b'source_mtime_ns': str(stat.st_mtime_ns).encode(),
+        b'source_size': str(stat.st_size).encode(),
+        b'cache_version': _CACHE_VERSION.encode(),
+    }
+
+
+def _read_cache(file_path: str):
+    """Return the cached frame for file_path, or None when missing or stale."""
+    path = _cache_path(file_path)
+    if not os.path.isfile(path):
+        return None
+    try:
+        # The frame is copied out of Arrow (string columns and the NaN fix-up
+        # below need pandas-owned data), so a plain read is all that's needed
+        with pa.OSFile(path, 'rb') as source:
+            table = pa.ipc.open_file(source).read_all()
+            metadata = table.schema.metadata or {}
+            if any(metadata.get(k) != v for k, v in _cache_key(file_path).items()):
+                return None
+            df = table.to_pandas()
+    except Exception as e:
+        logger.debug(f"Ignoring unreadable cache {path}: {e}")
+        return None
+    # Arrow has no NaN for strings; restore the NaN that read_csv(dtype=str) gives
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].fillna(np.nan)
+    return df
+
+
+def _write_cache(file_path: str, df: pd.DataFrame):
+    """Write df as an Arrow file next to file_path; failures only disable caching."""
+    path = _cache_path(file_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        table = pa.Table.from_pandas(df)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **_cache_key(file_path)})
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        # Atomic swap so concurrent readers never see a partial file
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.debug(f"Could not cache {file_path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,81 @@
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from app.service.backfill_planner import BackfillPlanner, ensure_window_columns, split_range
+
+
+def make_db(bars):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE stock_data (symbol TEXT, datetime TEXT, open REAL, high REAL, '
+                 'low REAL, close REAL, volume INTEGER)')
+    # download_log as created before window tracking
+    conn.execute('CREATE TABLE download_log (id INTEGER PRIMARY KEY AUTOINCREMENT, symbol TEXT NOT NULL, '
+                 'token TEXT, status TEXT, records_count INTEGER, error_message TEXT, '
+                 'download_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP)')
+    ensure_window_columns(conn)
+    conn.executemany('INSERT INTO stock_data VALUES (?, ?, 1, 1, 1, 1, 1)',
+                     [(s, ts.isoformat()) for s, ts in bars])
+    return conn
+
+
+def business_days(start, end):
+    return [ts.tz_localize('Asia/Kolkata') for ts in pd.bdate_range(start, end)]
+
+
+def test_holes_and_tail_are_planned_but_holidays_are_not():
+    days = business_days('2024-01-01', '2024-03-29')
+    holiday = pd.Timestamp('2024-01-26', tz='Asia/Kolkata')
+    hole = set(business_days('2024-02-12', '2024-02-16'))
+    stored = [d for d in days if d != holiday and d not in hole]
+    planner = BackfillPlanner(make_db([('INFY', d) for d in stored]))
+
+    windows = planner.plan('INFY', '1594', 'ONE_DAY', datetime(2024, 1, 1, 9, 15), datetime(2024, 4, 5, 15, 30))
+
+    spans = [(w.start, w.end) for w in windows]
+    assert spans == [
+        (datetime(2024, 2, 10), datetime(2024, 2, 18, 23, 59)),
+        (datetime(2024, 3, 30), datetime(2024, 4, 5, 15, 30)),
+    ]
+    assert windows[0].request().params()['fromdate'] == '2024-02-10 00:00'
+
+
+def test_recorded_windows_are_not_requested_again():
+    planner = BackfillPlanner(make_db([]))
+    start, end = datetime(2023, 1, 1, 9, 15), datetime(2024, 1, 1, 15, 30)
+    windows = planner.plan('TCS', '11536', 'FIFTEEN_MINUTE', start, end)
+    assert len(windows) == 2
+    assert windows[0].end - windows[0].start < pd.Timedelta(days=200)
+
+    planner.record(windows[0], 0)
+    planner.record(windows[1], 0, error='Rate limit exceeded')
+    assert planner.plan('TCS', '11536', 'FIFTEEN_MINUTE', start, end) == [windows[1]]
+
+    planner.record(windows[1], 0, now=datetime(2023, 12, 31, 12, 0))
+    rest = planner.plan('TCS', '11536', 'FIFTEEN_MINUTE', start, end)
+    assert [(w.start, w.end) for w in rest] == [(datetime(2023, 12, 31, 12, 1), end)]
+
+
+def test_minute_history_is_split_into_api_windows():
+    windows = split_range('INFY', '1594', 'ONE_MINUTE', datetime(2024, 1, 1, 9, 15), datetime(2024, 6, 30, 15, 30))
+    assert len(windows) == 7
+    assert all(w.end - w.start < pd.Timedelta(days=30) for w in windows)
+    assert all(b.start - a.end == pd.Timedelta(minutes=1) for a, b in zip(windows, windows[1:]))
+
+    planner = BackfillPlanner(make_db([]))
+    interleaved = planner.plan_many({'A': '1', 'B': '2', 'C': None}, 'ONE_MINUTE',
+                                    datetime(2024, 1, 1), datetime(2024, 2, 15))
+    assert [w.symbol for w in interleaved] == ['A', 'B', 'A', 'B']
+
+
+def test_open_window_is_recorded_up_to_exchange_now():
+    # Holds whatever the host timezone; windows are exchange wall clock
+    planner = BackfillPlanner(make_db([]))
+    today = pd.Timestamp.now('Asia/Kolkata').tz_localize(None).normalize().to_pydatetime()
+    window = planner.plan('INFY', '1594', 'ONE_MINUTE', today, today.replace(hour=23, minute=59))[-1]
+
+    planner.record(window, 10)
+    stored = planner.conn.execute('SELECT window_end FROM download_log').fetchone()[0]
+    exchange_now = pd.Timestamp.now('Asia/Kolkata').tz_localize(None)
+    assert abs(pd.Timestamp(stored) - min(exchange_now, pd.Timestamp(window.end))) < pd.Timedelta(minutes=2)
@@ -0,0 +1,141 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.agent.paper_trade_agent import PaperTradeAgent
+from app.service.bar_store import BarStore, bar_store_for
+from app.service.database_manager import read_ohlcv_panel
+from app.strategy.fvgorderblocks import FVGOrderBlocks
+from app.strategy.sonarlaplaceorderblocks import SonarlaplaceOrderBlocks
+
+
+def make_frame(n, start='2020-01-01', seed=0, tz='Asia/Kolkata'):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 2, n))
+    open_ = close + rng.normal(0, 1, n)
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + rng.random(n) * 2,
+        'Low': np.minimum(open_, close) - rng.random(n) * 2,
+        'Close': close,
+        'Volume': rng.integers(1, 10_000, n).astype(float),
+    }, index=pd.date_range(start, periods=n, freq='D', tz=tz))
+
+
+def expected(df):
+    # The store always reads back nanosecond timestamps, whatever unit was written
+    return df.set_axis(df.index.as_unit('ns')).rename_axis('timestamp')
+
+
+def test_write_and_read_round_trip(tmp_path):
+    store = BarStore(str(tmp_path))
+    df = make_frame(300)
+    store.write('ABC', df)
+
+    series = store.read('ABC')
+    assert len(series) == 300
+    assert store.symbols() == ['ABC']
+    np.testing.assert_array_equal(series.close, df['Close'].to_numpy())
+    assert isinstance(series.close, np.memmap) or isinstance(series.close.base, np.memmap)
+    with pytest.raises(ValueError):
+        series.close[0] = 1.0
+    pd.testing.assert_frame_equal(series.to_frame(), expected(df), check_freq=False)
+
+
+def test_microsecond_index_keeps_its_dates(tmp_path):
+    store = BarStore(str(tmp_path))
+    df = make_frame(3)
+    store.write('US', df.set_axis(df.index.as_unit('us')))
+    store.write('NS', df.set_axis(df.index.as_unit('ns')))
+    assert store.read('US').index.equals(store.read('NS').index)
+    assert store.read('US').index[0] == pd.Timestamp('2020-01-01', tz='Asia/Kolkata')
+
+
+def test_append_fills_tail_then_grows(tmp_path):
+    store = BarStore(str(tmp_path))
+    df = make_frame(600)
+    store.write('ABC', df.iloc[:250])
+    capacity_path = store.path('ABC')
+
+    # Overlapping rows are skipped, only newer bars are appended in place
+    assert store.append('ABC', df.iloc[200:255]) == 5
+    size = len(open(capacity_path, 'rb').read())
+    assert len(store.read('ABC')) == 255
+
+    # Running out of capacity rewrites the file with room to spare
+    assert store.append('ABC', df.iloc[255:]) == 345
+    assert len(open(capacity_path, 'rb').read()) > size
+    pd.testing.assert_frame_equal(store.read('ABC').to_frame(), expected(df), check_freq=False)
+    assert store.append('ABC', df) == 0
+
+
+def test_strategies_and_exits_run_on_stored_bars(tmp_path):
+    store = BarStore(str(tmp_path))
+    df = make_frame(800, seed=3)
+    store.write('ABC', df)
+    bars = store.read('ABC').bars
+
+    for strategy_class in (FVGOrderBlocks, SonarlaplaceOrderBlocks):
+        from_df, from_store = strategy_class(), strategy_class()
+        from_df.run(df)
+        from_store.run(bars)
+        assert [(s.index, s.type, s.price) for s in from_df.get_signals()] == \
+            [(s.index, s.type, s.price) for s in from_store.get_signals()]
+
+    agent = PaperTradeAgent()
+    close = df['Close'].to_numpy()
+    for entry in (10, 200, 650):
+        tp, sl = close[entry] * 1.05, close[entry] * 0.97
+        assert agent._simulate_exit(bars, entry, tp, sl, True) == \
+            agent._simulate_exit(df, entry, tp, sl, True)
+
+
+def make_stock_db(path, frames):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE stock_data (symbol TEXT, datetime TEXT, open REAL, high REAL, '
+                 'low REAL, close REAL, volume INTEGER, UNIQUE(symbol, datetime))')
+    for symbol, df in frames.items():
+        insert_rows(conn, symbol, df)
+    conn.commit()
+    return conn
+
+
+def insert_rows(conn, symbol, df):
+    conn.executemany('INSERT OR REPLACE INTO stock_data VALUES (?, ?, ?, ?, ?, ?, ?)', [
+        (symbol, ts.isoformat(), o, h, l, c, int(v))
+        for ts, (o, h, l, c, v) in zip(df.index, df[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy().tolist())
+    ])
+
+
+def test_load_frames_serves_the_stock_table(tmp_path):
+    db = str(tmp_path / 'stock_data.db')
+    conn = make_stock_db(db, {'TCS': make_frame(120, seed=1), 'INFY': make_frame(80, seed=2)})
+    store = bar_store_for(db)
+    symbols = ['INFY', 'MISSING', 'TCS']
+
+    for start, end in [(None, None), ('2020-02-01', '2020-03-15')]:
+        frames = store.load_frames(conn, symbols, start, end)
+        expected = read_ohlcv_panel(conn, symbols, start, end, table='stock_data',
+                                    time_column='datetime', tz_naive=True)
+        assert list(frames) == list(expected) == ['INFY', 'TCS']
+        for symbol in frames:
+            pd.testing.assert_frame_equal(frames[symbol], expected[symbol].astype({'Volume': float}),
+                                          check_freq=False)
+    assert store.symbols() == ['INFY', 'TCS']
+
+
+def test_load_frames_refreshes_files_the_table_outgrew(tmp_path):
+    db = str(tmp_path / 'stock_data.db')
+    df = make_frame(100)
+    conn = make_stock_db(db, {'TCS': df.iloc[:60]})
+    store = bar_store_for(db)
+    assert len(store.load_frames(conn, ['TCS'])['TCS']) == 60
+
+    # Bars saved by a download that did not update the store
+    insert_rows(conn, 'TCS', df.iloc[60:])
+    conn.commit()
+    frame = store.load_frames(conn, ['TCS'])['TCS']
+    assert len(frame) == 100 and len(store.read('TCS')) == 100
+    np.testing.assert_array_equal(frame['Close'].to_numpy(), df['Close'].to_numpy())
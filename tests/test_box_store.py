@@ -0,0 +1,53 @@
+import random
+
+from app.model.box import Box, BoxType
+from app.strategy.box_store import BoxStore
+
+
+def pairwise_nested(boxes):
+    remove = set()
+    for i, box in enumerate(boxes):
+        for j, other in enumerate(boxes):
+            if i != j and box.bottom < other.top < box.top:
+                remove.add(i)
+                break
+    return [b for i, b in enumerate(boxes) if i not in remove]
+
+
+def random_boxes(rng, k):
+    boxes = []
+    for _ in range(k):
+        bottom = rng.choice([rng.uniform(90, 110), float(rng.randint(95, 105))])
+        top = bottom + rng.choice([0.0, rng.uniform(0.1, 8.0)])
+        boxes.append(Box(left=0, right=1, top=top, bottom=bottom, box_type=BoxType.BULL))
+    return boxes
+
+
+def test_remove_nested_matches_pairwise_scan():
+    rng = random.Random(3)
+    for _ in range(300):
+        boxes = random_boxes(rng, rng.randint(0, 25))
+        store = BoxStore(boxes)
+        store.remove_nested()
+        assert store.boxes == pairwise_nested(boxes)
+
+
+def test_range_queries_return_insertion_order():
+    rng = random.Random(5)
+    for _ in range(200):
+        boxes = random_boxes(rng, rng.randint(0, 20))
+        store = BoxStore(boxes)
+        lo, hi = sorted([rng.uniform(88, 115), rng.uniform(88, 115)])
+        assert store.tops_in(lo, hi) == [i for i, b in enumerate(boxes) if hi > b.top >= lo]
+        assert store.bottoms_in(lo, hi) == [i for i, b in enumerate(boxes) if lo < b.bottom <= hi]
+        assert store.bottoms_above(lo) == [i for i, b in enumerate(boxes) if lo < b.bottom]
+        assert store.tops_below(hi) == [i for i, b in enumerate(boxes) if hi > b.top]
+
+
+def test_keep_last_and_remove_preserve_order():
+    boxes = [Box(left=i, right=i, top=float(i + 1), bottom=float(i), box_type=BoxType.BEAR) for i in range(6)]
+    store = BoxStore(boxes)
+    store.remove([1, 3])
+    store.keep_last(3)
+    assert [b.left for b in store.boxes] == [2, 4, 5]
+    assert store.tops_below(5.5) == [0, 1]
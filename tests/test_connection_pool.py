@@ -0,0 +1,138 @@
+import multiprocessing
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.service.connection_pool import ConnectionPool, get_pool
+from app.service.database_manager import DatabaseManager
+
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE t (a INTEGER)')
+    conn.executemany('INSERT INTO t VALUES (?)', [(i,) for i in range(10)])
+    conn.commit()
+    conn.close()
+
+
+def test_connection_reused_within_thread(tmp_path):
+    db = str(tmp_path / 'a.db')
+    make_db(db)
+    pool = ConnectionPool(db)
+    assert pool.connection() is pool.connection()
+    assert get_pool(db) is get_pool(db)
+    assert get_pool(db, read_only=True) is not get_pool(db)
+
+
+def test_one_connection_per_thread(tmp_path):
+    db = str(tmp_path / 'a.db')
+    make_db(db)
+    pool = ConnectionPool(db, read_only=True)
+
+    def read(_):
+        conn = pool.connection()
+        return id(conn), conn.execute('SELECT SUM(a) FROM t').fetchone()[0]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(read, range(40)))
+
+    assert all(total == 45 for _, total in results)
+    assert len({conn_id for conn_id, _ in results}) <= 4
+    pool.close_all()
+    assert len(pool) == 0
+
+
+def test_connections_of_finished_threads_are_closed(tmp_path):
+    db = str(tmp_path / 'a.db')
+    make_db(db)
+    pool = ConnectionPool(db)
+    worker = threading.Thread(target=pool.connection)
+    worker.start()
+    worker.join()
+    assert len(pool) == 1
+    pool.connection()
+    assert len(pool) == 1
+
+
+def test_read_only_pool_rejects_writes(tmp_path):
+    db = str(tmp_path / 'a.db')
+    make_db(db)
+    conn = ConnectionPool(db, read_only=True).connection()
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute('INSERT INTO t VALUES (1)')
+
+
+def test_database_manager_from_worker_threads(tmp_path):
+    manager = DatabaseManager(str(tmp_path / 'market.db'))
+    idx = pd.date_range('2024-01-01', periods=30, freq='D')
+    frame = pd.DataFrame({'Open': 1.0, 'High': 2.0, 'Low': 0.5, 'Close': 1.5,
+                          'Volume': np.arange(30)}, index=idx)
+    for symbol in ('A', 'B', 'C'):
+        manager.save_ohlcv_data(symbol, frame)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        frames = list(executor.map(manager.get_ohlcv_data, ['A', 'B', 'C'] * 4))
+
+    assert all(len(df) == 30 for df in frames)
+    manager.close()
+    # The manager reconnects on demand after close()
+    assert len(manager.get_ohlcv_data('A')) == 30
+    manager.close()
+
+
+def test_close_leaves_other_threads_connections_open(tmp_path):
+    manager = DatabaseManager(str(tmp_path / 'market.db'))
+    held = threading.Event()
+    closed = threading.Event()
+    result = {}
+
+    def worker():
+        conn = manager.pool.connection()
+        held.set()
+        closed.wait()
+        result['count'] = conn.execute('SELECT COUNT(*) FROM ohlcv_data').fetchone()[0]
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    held.wait()
+    main_conn = manager.pool.connection()
+    manager.close()
+    closed.set()
+    thread.join()
+
+    assert result['count'] == 0
+    with pytest.raises(sqlite3.ProgrammingError):
+        main_conn.execute('SELECT 1')
+    assert manager.pool.connection() is not main_conn
+    manager.close()
+
+
+_inherited = {}
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_forked_child_opens_its_own_connection(tmp_path):
+    db = str(tmp_path / 'a.db')
+    make_db(db)
+    pool = get_pool(db, read_only=True)
+    _inherited['conn'] = parent_conn = pool.connection()
+
+    with multiprocessing.get_context('fork').Pool(1) as workers:
+        reused, total = workers.apply(_child_read, (db,))
+
+    assert not reused
+    assert total == 45
+    # The parent's connection is untouched by the child
+    assert pool.connection() is parent_conn
+    assert parent_conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 10
+    _inherited.clear()
+
+
+def _child_read(db):
+    conn = get_pool(db, read_only=True).connection()
+    return conn is _inherited['conn'], conn.execute('SELECT SUM(a) FROM t').fetchone()[0]
@@ -0,0 +1,32 @@
+import pandas as pd
+
+from app.utility.file_util import merge_bars_into_csv
+
+
+def bars(start, periods):
+    index = pd.bdate_range(start, periods=periods, tz='Asia/Kolkata')
+    return pd.DataFrame({
+        'DateTime': [ts.isoformat() for ts in index],
+        'Open': 1.0, 'High': 2.0, 'Low': 0.5, 'Close': range(periods), 'Volume': 100,
+    })
+
+
+def test_second_download_keeps_the_full_range(tmp_path):
+    path = str(tmp_path / 'ABC_1_day_5_years.csv')
+    full = bars('2020-01-01', 300)
+    # First run downloads everything, in two windows that arrive out of order
+    merge_bars_into_csv(path, [full.iloc[150:], full.iloc[:150]])
+
+    # Second run only fetches the tail, overlapping the last stored bar
+    tail = bars(pd.Timestamp(full['DateTime'].iat[-1]).tz_localize(None), 6)
+    tail.loc[0, 'Close'] = -1.0
+    merge_bars_into_csv(path, [tail])
+
+    stored = pd.read_csv(path)
+    assert len(stored) == 305
+    assert stored['DateTime'].iat[0] == full['DateTime'].iat[0]
+    assert stored['DateTime'].iat[-1] == tail['DateTime'].iat[-1]
+    assert stored['DateTime'].is_unique
+    assert pd.to_datetime(stored['DateTime']).is_monotonic_increasing
+    # The re-downloaded bar replaces the stored one
+    assert stored['Close'].iat[299] == -1.0
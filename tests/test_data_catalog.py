@@ -0,0 +1,105 @@
+import os
+import sqlite3
+
+from app.service import data_catalog
+from app.service.data_catalog import DataCatalog
+
+HEADER = "Date,Series,Open,High,Low,Close\n"
+
+
+def write_csv(folder, name, days):
+    folder.mkdir(parents=True, exist_ok=True)
+    lines = [f"{d:02d}-Jul-2025,EQ,100,101,99,100.5\n" for d in days]
+    (folder / name).write_text(HEADER + ''.join(lines))
+
+
+def make_catalog(tmp_path):
+    return DataCatalog(catalog_path=str(tmp_path / 'catalog.json'), resource_dir=str(tmp_path / 'resource'))
+
+
+def test_catalog_records_rows_dates_and_symbol(tmp_path):
+    data = tmp_path / 'resource' / 'data'
+    write_csv(data, '01-07-2025-TO-10-07-2025-ABB-EQ-N.csv', [1, 2, 3, 4])
+    write_csv(data, '01-07-2025-TO-10-07-2025-TCS-EQ-N.csv', [7, 8])
+    catalog = make_catalog(tmp_path)
+
+    assert catalog.files('data') == ['01-07-2025-TO-10-07-2025-ABB-EQ-N.csv',
+                                     '01-07-2025-TO-10-07-2025-TCS-EQ-N.csv']
+    entry = catalog.entry('01-07-2025-TO-10-07-2025-ABB-EQ-N.csv')
+    assert (entry.symbol, entry.rows, entry.interval) == ('ABB', 4, 'ONE_DAY')
+    assert entry.first_date.startswith('2025-07-01') and entry.last_date.startswith('2025-07-04')
+    assert catalog.resolve('tcs') == str(data / '01-07-2025-TO-10-07-2025-TCS-EQ-N.csv')
+    assert catalog.resolve('missing') is None
+
+
+def test_catalog_is_persisted_and_refreshed_incrementally(tmp_path, monkeypatch):
+    data = tmp_path / 'resource' / 'data'
+    write_csv(data, 'A-EQ.csv', [1, 2])
+    write_csv(data, 'B-EQ.csv', [1, 2, 3])
+    make_catalog(tmp_path).entries('data')
+
+    scanned = []
+    scan = data_catalog._scan_csv
+    monkeypatch.setattr(data_catalog, '_scan_csv', lambda p, n, s: scanned.append(n) or scan(p, n, s))
+
+    # A fresh instance reads the manifest instead of parsing
+    catalog = make_catalog(tmp_path)
+    assert catalog.rows('B-EQ.csv') == 3
+    assert scanned == []
+
+    # Listing never parses; only the changed and the new file are parsed when asked for
+    write_csv(data, 'B-EQ.csv', [1, 2, 3, 4, 5])
+    stat = os.stat(data / 'B-EQ.csv')
+    os.utime(data / 'B-EQ.csv', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    write_csv(data, 'C-EQ.csv', [1])
+    assert catalog.files('data') == ['A-EQ.csv', 'B-EQ.csv', 'C-EQ.csv']
+    assert scanned == []
+    assert catalog.rows('B-EQ.csv') == 5
+    assert catalog.rows('A-EQ.csv') == 2
+    assert catalog.rows('C-EQ.csv') == 1
+    assert scanned == ['B-EQ.csv', 'C-EQ.csv']
+
+    os.remove(data / 'A-EQ.csv')
+    assert catalog.files('data') == ['B-EQ.csv', 'C-EQ.csv']
+
+
+def test_listing_an_unchanged_folder_stats_only_the_folder(tmp_path, monkeypatch):
+    data = tmp_path / 'resource' / 'data'
+    for n in range(5):
+        write_csv(data, f'S{n}-EQ.csv', [1, 2])
+    catalog = make_catalog(tmp_path)
+    catalog.entries('data')
+
+    stats = []
+    real_stat = os.stat
+    monkeypatch.setattr(os, 'stat', lambda p, *a, **k: stats.append(str(p)) or real_stat(p, *a, **k))
+    catalog.files('data')
+    catalog.resolve('S3')
+    assert str(data) in stats
+    assert not [p for p in stats if p.endswith('.csv')]
+
+    # An explicit refresh re-stats every file
+    stats.clear()
+    assert catalog.refresh('data', force=True) is False
+    assert len([p for p in stats if p.endswith('.csv')]) == 5
+
+def test_catalog_db_symbols(tmp_path):
+    db = str(tmp_path / 'stock.db')
+    conn = sqlite3.connect(db)
+    conn.execute('CREATE TABLE stock_data (symbol TEXT, datetime TEXT, open REAL, high REAL, '
+                 'low REAL, close REAL, volume INTEGER)')
+    conn.executemany('INSERT INTO stock_data VALUES (?, ?, 1, 1, 1, 1, 1)',
+                     [('A', f'2024-01-{d:02d}') for d in range(1, 21)] + [('B', '2024-01-01')])
+    conn.commit()
+    catalog = make_catalog(tmp_path)
+
+    assert catalog.db_symbols(db) == ['A', 'B']
+    assert catalog.db_symbols(db, min_rows=10) == ['A']
+    assert catalog.db_entry(db, 'A').last_date == '2024-01-20'
+    assert catalog.refresh_db(db) is False
+
+    conn.execute("INSERT INTO stock_data VALUES ('B', '2024-01-02', 1, 1, 1, 1, 1)")
+    conn.commit()
+    conn.close()
+    assert catalog.refresh_db(db) is True
+    assert catalog.db_entry(db, 'B').rows == 2
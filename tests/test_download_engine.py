@@ -0,0 +1,124 @@
+import threading
+import time
+
+from app.service.download_engine import (
+    CandleRequest,
+    DownloadEngine,
+    TokenBucket,
+    candle_requests,
+    is_rate_limited,
+)
+
+
+class FakeSmartConnect:
+    """getCandleData stand-in that records concurrency and can reject the first calls per symbol."""
+
+    def __init__(self, latency=0.02, rate_limited_calls=0, empty=()):
+        self.latency = latency
+        self.rate_limited_calls = rate_limited_calls
+        self.empty = set(empty)
+        self.calls = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def getCandleData(self, params):
+        token = params['symboltoken']
+        with self.lock:
+            self.calls[token] = self.calls.get(token, 0) + 1
+            attempt = self.calls[token]
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            if attempt <= self.rate_limited_calls:
+                return {'status': False, 'message': 'Access denied because of exceeding access rate',
+                        'errorcode': 'AB1004', 'data': None}
+            if token in self.empty:
+                return {'status': True, 'data': []}
+            return {'status': True, 'data': [
+                ['2024-01-01T00:00:00+05:30', 10, 11, 9, 10.5, 100],
+                ['2024-01-02T00:00:00+05:30', 10.5, 12, 10, 11.5, 200],
+            ]}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def make_requests(n):
+    tokens = {f'S{i}': str(i) for i in range(n)}
+    return candle_requests(list(tokens) + ['NOTOKEN'], tokens, '2024-01-01 09:15', '2024-01-02 15:30')
+
+
+def test_downloads_overlap_but_stay_bounded():
+    client = FakeSmartConnect(latency=0.05)
+    engine = DownloadEngine(client, TokenBucket(rate=1000), max_in_flight=4)
+    seen = []
+
+    started = time.monotonic()
+    stats = engine.run(make_requests(12), lambda r: seen.append(r.symbol))
+    elapsed = time.monotonic() - started
+
+    assert sorted(seen) == sorted(f'S{i}' for i in range(12))
+    assert stats.success_count == 12 and not stats.failed and stats.requests == 12
+    assert client.max_in_flight == 4
+    # 12 requests of 50ms, 4 at a time
+    assert elapsed < 12 * 0.05
+
+
+def test_token_bucket_bounds_request_rate():
+    client = FakeSmartConnect(latency=0)
+    engine = DownloadEngine(client, TokenBucket(rate=50, capacity=1), max_in_flight=8)
+
+    started = time.monotonic()
+    engine.run(make_requests(11))
+    assert time.monotonic() - started >= 10 / 50 * 0.9
+
+
+def test_rate_limited_requests_back_off_and_retry():
+    client = FakeSmartConnect(latency=0, rate_limited_calls=2, empty={'3'})
+    limiter = TokenBucket(rate=1000)
+    engine = DownloadEngine(client, limiter, max_in_flight=2, backoff=0.01)
+
+    stats = engine.run(make_requests(4))
+
+    assert stats.success_count == 3
+    assert stats.failed == {'S3': 'No data available'}
+    assert stats.rate_limit_count == 8 and stats.requests == 12
+    assert limiter.rate < limiter.base_rate
+
+
+def test_gives_up_after_max_retries():
+    client = FakeSmartConnect(latency=0, rate_limited_calls=10)
+    engine = DownloadEngine(client, TokenBucket(rate=1000), max_retries=2, backoff=0.001)
+
+    result = engine.fetch(CandleRequest('S1', '1', '2024-01-01 09:15', '2024-01-02 15:30'))
+
+    assert not result.ok and result.error == 'Rate limit exceeded'
+    assert result.attempts == 3 and client.calls['1'] == 3
+
+
+def test_bucket_pause_and_recover_with_fake_clock():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+    bucket.acquire()
+    bucket.acquire()
+    assert sleeps == []
+    bucket.acquire()
+    assert sleeps == [0.5]
+
+    bucket.throttle(3.0)
+    assert bucket.rate == 1
+    bucket.acquire()
+    assert now[0] >= 3.5
+    for _ in range(20):
+        bucket.recover()
+    assert bucket.rate == bucket.base_rate
+    assert is_rate_limited({'status': False, 'message': 'Too many requests'})
+    assert not is_rate_limited({'status': False, 'message': 'Invalid token'})
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from app.agent.exit_engine import ExitEngine
+
+
+def scan_reference(high, low, entry_idx, tp, sl, is_long):
+    for i in range(entry_idx + 1, len(high)):
+        if is_long:
+            if high[i] >= tp:
+                return i, True
+            if low[i] <= sl:
+                return i, False
+        else:
+            if low[i] <= tp:
+                return i, True
+            if high[i] >= sl:
+                return i, False
+    return None, False
+
+
+def test_first_touch_matches_bar_scan():
+    rng = np.random.default_rng(2)
+    n = 3000
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    high = close + rng.random(n) * 2
+    low = close - rng.random(n) * 2
+    high[rng.random(n) < 0.01] = np.nan
+    engine = ExitEngine(high, low)
+
+    for _ in range(400):
+        entry = int(rng.integers(0, n))
+        is_long = bool(rng.integers(0, 2))
+        ref_price = close[entry]
+        tp_pct, sl_pct = rng.uniform(0.005, 0.3), rng.uniform(0.005, 0.3)
+        if is_long:
+            tp, sl = ref_price * (1 + tp_pct), ref_price * (1 - sl_pct)
+        else:
+            tp, sl = ref_price * (1 - tp_pct), ref_price * (1 + sl_pct)
+        assert engine.first_touch(entry, tp, sl, is_long) == scan_reference(high, low, entry, tp, sl, is_long)
+
+
+def test_target_wins_when_both_levels_touched_on_same_bar():
+    df = pd.DataFrame({'High': [100.0, 101.0, 120.0], 'Low': [99.0, 99.5, 80.0]})
+    engine = ExitEngine.from_df(df)
+
+    assert engine.first_touch(0, 110.0, 90.0, is_long=True) == (2, True)
+    assert engine.first_touch(0, 90.0, 110.0, is_long=False) == (2, True)
+    assert engine.first_touch(0, 130.0, 70.0, is_long=True) == (None, False)
+
+
+def test_batch_matches_single_queries():
+    rng = np.random.default_rng(9)
+    n = 2500
+    close = 50 + np.cumsum(rng.normal(0, 0.8, n))
+    high = close + rng.random(n)
+    low = close - rng.random(n)
+    low[rng.random(n) < 0.01] = np.nan
+    engine = ExitEngine(high, low)
+
+    m = 500
+    entries = rng.integers(0, n + 3, m)
+    is_long = rng.random(m) < 0.5
+    ref = close[np.minimum(entries, n - 1)]
+    tp_pct, sl_pct = rng.uniform(0.001, 0.4, m), rng.uniform(0.001, 0.4, m)
+    tp = np.where(is_long, ref * (1 + tp_pct), ref * (1 - tp_pct))
+    sl = np.where(is_long, ref * (1 - sl_pct), ref * (1 + sl_pct))
+    tp[::50] = np.nan
+
+    exit_idx, is_target = engine.first_touch_batch(entries, tp, sl, is_long)
+
+    for k in range(m):
+        idx, target = engine.first_touch(entries[k], tp[k], sl[k], bool(is_long[k]))
+        assert (exit_idx[k], bool(is_target[k])) == ((-1, False) if idx is None else (idx, target))
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+from types import SimpleNamespace
+
+from app.agent.exit_schedule import EARLIEST, ExitSchedule, event_time_key
+from app.agent.paper_trade_agent import PaperTradeAgent
+from app.model.OutcomeType import OutcomeType
+
+
+def make_signal(idx, price, date, symbol, typ='buy', strength=1):
+    return SimpleNamespace(index=idx, price=price, date=date, type=typ, symbol=symbol, signalStrength=strength)
+
+
+def test_event_time_key_uses_epoch_ns():
+    naive = pd.Timestamp('2025-01-02 09:15')
+    aware = naive.tz_localize('Asia/Kolkata')
+    # Tz-naive stamps are exchange wall clock
+    assert event_time_key(naive) == event_time_key(aware) == aware.value
+    assert event_time_key(aware.tz_convert('UTC')) == aware.value
+    assert event_time_key(7) == 7
+    assert event_time_key(None) == EARLIEST
+    assert event_time_key('not a date') == EARLIEST
+
+
+def test_pop_due_orders_by_key_then_opening_order():
+    schedule = ExitSchedule()
+    schedule.push(30, 1, 'C', 'c')
+    schedule.push(10, 3, 'B', 'b')
+    schedule.push(10, 2, 'A', 'a')
+    schedule.push(50, 0, 'D', 'd')
+
+    due = schedule.pop_due(30)
+    assert [e[2] for e in due] == ['A', 'B', 'C']
+    assert len(schedule) == 1
+
+
+def test_multi_symbol_exits_close_in_date_order():
+    rng = np.random.default_rng(11)
+    n = 120
+    index = pd.date_range('2024-01-01', periods=n, freq='D')
+    frames = {}
+    for sym in ('AAA', 'BBB', 'CCC', 'DDD'):
+        close = 100 + np.cumsum(rng.normal(0, 1.5, n))
+        frames[sym] = pd.DataFrame(
+            {'Open': close, 'High': close + 2, 'Low': close - 2, 'Close': close}, index=index
+        )
+
+    signals = []
+    for i in range(0, n - 10, 3):
+        sym = ('AAA', 'BBB', 'CCC', 'DDD')[i % 4]
+        signals.append(make_signal(i, float(frames[sym]['Close'].iat[i]), index[i], sym))
+
+    ta = PaperTradeAgent(initial_capital=100000, target_pct=0.03, stop_loss_pct=0.02)
+    ta._df_mapping = frames
+    for signal in signals:
+        ta._process_pending_exits(signal.date)
+        trade = ta._execute_single_trade(frames[signal.symbol], signal)
+        if trade:
+            ta.trades.append(trade)
+    ta._process_pending_exits(None)
+
+    exits = [t.exit_date for t in ta.trades]
+    assert exits and exits == sorted(exits)
+    assert all(t.outcome in (OutcomeType.WIN, OutcomeType.LOSS) for t in ta.trades)
+    assert len(ta._exit_schedule) == 0
+    # Every closed long returned its proceeds
+    assert ta.cash + ta.portfolio.total_capital_used == ta.initial_capital + sum(t.pnl for t in ta.trades)
+
+
+def test_rescheduled_exit_skips_stale_entry():
+    index = pd.date_range('2025-01-01', periods=4, freq='D')
+    df = pd.DataFrame(
+        {'Open': [100, 101, 130, 100], 'High': [101, 102, 131, 101], 'Low': [99, 100, 129, 99], 'Close': [100, 101, 130, 100]},
+        index=index
+    )
+    ta = PaperTradeAgent(initial_capital=100000)
+    ta._df_mapping = {'AAA': df}
+    ta._execute_single_trade(df, make_signal(0, 100.0, index[0], 'AAA'))
+    pos = ta.portfolio.get_position('AAA')
+    assert pos.exit_date == index[2]
+
+    # Move the exit later; the entry queued for index[2] is now stale
+    pos.exit_idx = 3
+    pos.exit_date = index[3]
+    pos.exit_price = 100.0
+    pos.pnl = 0.0
+    pos.proceeds = pos.shares * 100.0
+    pos.outcome = OutcomeType.EXIT
+    ta.schedule_exit('AAA')
+
+    ta._process_pending_exits(index[2])
+    assert ta.portfolio.has_position('AAA')
+
+    ta._process_pending_exits(index[3])
+    assert not ta.portfolio.has_position('AAA')
+    assert [t.exit_date for t in ta.trades] == [index[3]]
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from app.model.bars import Bars
+from app.strategy.fvgorderblocks import FVGOrderBlocks
+
+
+def make_walk(n=600, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1.5, n))
+    open_ = close + rng.normal(0, 1.0, n)
+    high = np.maximum(open_, close) + rng.random(n)
+    low = np.minimum(open_, close) - rng.random(n)
+    return pd.DataFrame(
+        {'Open': open_, 'High': high, 'Low': low, 'Close': close},
+        index=pd.date_range('2024-01-01', periods=n, freq='15min')
+    )
+
+
+def test_gap_masks_match_scalar_definition():
+    df = make_walk()
+    s = FVGOrderBlocks(filter_gap=0.2)
+    bars = Bars.from_df(df)
+    h, l = df['High'], df['Low']
+    filt_up = ((l - h.shift(2)) / l * 100).to_numpy()
+    filt_dn = ((l.shift(2) - h) / l.shift(2) * 100).to_numpy()
+
+    bull, bear = s._detect_gaps(bars, filt_up, filt_dn)
+
+    for i in range(len(df)):
+        exp_bull = i >= 2 and (h.iat[i - 2] < l.iat[i] and h.iat[i - 2] < h.iat[i - 1]
+                               and l.iat[i - 2] < l.iat[i] and filt_up[i] > 0.2)
+        exp_bear = i >= 2 and (l.iat[i - 2] > h.iat[i] and l.iat[i - 2] > l.iat[i - 1]
+                               and h.iat[i - 2] > h.iat[i] and filt_dn[i] > 0.2)
+        assert bool(bull[i]) == exp_bull
+        assert bool(bear[i]) == exp_bear
+    assert bull.any() and bear.any()
+
+
+def test_run_accepts_bars_and_dataframe_identically():
+    df = make_walk()
+    a = FVGOrderBlocks(filter_gap=0.2, show_signal=True, lookback=300)
+    b = FVGOrderBlocks(filter_gap=0.2, show_signal=True, lookback=300)
+    a.run(df)
+    b.run(Bars.from_df(df))
+
+    assert [x.to_dict() for x in a.bull_boxes + a.bear_boxes] == [x.to_dict() for x in b.bull_boxes + b.bear_boxes]
+    assert [x.to_dict() for x in a.temp_boxes] == [x.to_dict() for x in b.temp_boxes]
+    assert [(x.index, x.type, x.price) for x in a.signals] == [(x.index, x.type, x.price) for x in b.signals]
+    # No imbalance may start before the lookback window
+    assert all(t.left + 1 > len(df) - 1 - 300 for t in a.temp_boxes)
@@ -0,0 +1,111 @@
+import os
+from datetime import date
+
+import pytest
+
+from app.service.instrument_master import InstrumentMaster, TokenMap
+
+SCRIP_MASTER = [
+    {'token': '1594', 'symbol': 'INFY-EQ', 'name': 'INFY', 'exch_seg': 'NSE', 'instrumenttype': '', 'lotsize': '1'},
+    {'token': '11536', 'symbol': 'TCS-EQ', 'name': 'TCS', 'exch_seg': 'NSE', 'instrumenttype': ''},
+    {'token': '2031', 'symbol': 'M&M', 'name': 'M&M', 'exch_seg': 'NSE', 'instrumenttype': 'EQ'},
+    {'token': '500209', 'symbol': 'INFY', 'name': 'INFY', 'exch_seg': 'BSE', 'instrumenttype': ''},
+    {'token': '35001', 'symbol': 'WIPRO25JANFUT', 'name': 'WIPRO', 'exch_seg': 'NFO', 'instrumenttype': 'FUTSTK'},
+    {'token': '35000', 'symbol': 'WIPRO24DECFUT', 'name': 'WIPRO', 'exch_seg': 'NFO', 'instrumenttype': 'FUTSTK'},
+]
+
+
+class Fetcher:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError('offline')
+        return SCRIP_MASTER
+
+
+def make_master(tmp_path, fetch, day):
+    return InstrumentMaster(str(tmp_path / 'instruments.json.gz'), fetch=fetch, today=lambda: day[0])
+
+
+def test_lookups_download_once_per_day(tmp_path):
+    fetch, day = Fetcher(), [date(2025, 1, 6)]
+    master = make_master(tmp_path, fetch, day)
+
+    assert master.token('INFY') == '1594'
+    assert master.token('M&M') == '2031'
+    assert master.token('WIPRO') == '35000'
+    assert master.token('UNKNOWN') is None
+    assert master.get('BSE', 'INFY')['token'] == '500209'
+    assert [r['token'] for r in master.rows('NFO')] == ['35001', '35000']
+    assert fetch.calls == 1
+
+    # A fresh process reads today's copy from disk
+    assert make_master(tmp_path, fetch, day).tokens(['TCS', 'NOPE']) == {'TCS': '11536'}
+    assert fetch.calls == 1
+
+    day[0] = date(2025, 1, 7)
+    assert master.token('TCS') == '11536'
+    assert fetch.calls == 2
+
+
+def test_stale_cache_is_used_when_download_fails(tmp_path):
+    fetch, day = Fetcher(), [date(2025, 1, 6)]
+    make_master(tmp_path, fetch, day).refresh()
+
+    fetch.fail = True
+    day[0] = date(2025, 1, 8)
+    master = make_master(tmp_path, fetch, day)
+    assert master.token('INFY') == '1594'
+    assert master.token('TCS') == '11536'
+    assert fetch.calls == 2
+
+
+
+def test_missing_master_fails_loudly_and_retries_later(tmp_path):
+    fetch, day = Fetcher(), [date(2025, 1, 6)]
+    fetch.fail = True
+    master = make_master(tmp_path, fetch, day)
+
+    with pytest.raises(RuntimeError, match='offline'):
+        master.token('INFY')
+    # The failure is not cached as an empty master, and lookups don't refetch right away
+    with pytest.raises(RuntimeError):
+        len(master)
+    assert fetch.calls == 1
+
+    fetch.fail = False
+    assert master.refresh(force=True) is True
+    assert master.token('INFY') == '1594'
+
+
+def test_token_map_covers_fixed_universe(tmp_path):
+    master = make_master(tmp_path, Fetcher(), [date(2025, 1, 6)])
+    tokens = TokenMap(['INFY', 'TCS', 'DELISTED'], master)
+
+    assert list(tokens) == ['INFY', 'TCS', 'DELISTED'] and len(tokens) == 3
+    assert 'DELISTED' in tokens and 'WIPRO' not in tokens
+    assert tokens['INFY'] == '1594'
+    assert tokens.get('DELISTED') is None
+    with pytest.raises(KeyError):
+        tokens['WIPRO']
+
+
+def test_token_map_falls_back_to_seed_tokens(tmp_path):
+    fetch = Fetcher()
+    fetch.fail = True
+    seed = {'INFY': '1594', 'TCS': '11536'}
+    tokens = TokenMap(['INFY', 'TCS', 'DELISTED'], make_master(tmp_path, fetch, [date(2025, 1, 6)]), fallback=seed)
+
+    assert tokens['INFY'] == '1594'
+    assert tokens.get('TCS') == '11536'
+    with pytest.raises(RuntimeError):
+        tokens['DELISTED']
+
+    # With the master available, the master wins and the seed only fills gaps
+    tokens = TokenMap(['INFY', 'SEEDONLY'], make_master(tmp_path, Fetcher(), [date(2025, 1, 6)]),
+                      fallback={'INFY': 'stale', 'SEEDONLY': '7'})
+    assert (tokens['INFY'], tokens['SEEDONLY']) == ('1594', '7')
@@ -0,0 +1,54 @@
+import os
+
+import pandas as pd
+
+from app.utility import utility
+from app.utility.utility import CACHE_DIR_NAME, load_data
+
+CSV = """Date,Series,Open,High,Low,Close,Volume
+03-Jul-2025,EQ,"1,200.50","1,210.00","1,190.25","1,205.75",1000
+04-Jul-2025,EQ,"1,205.75","1,230.00","1,201.00","(1,220.00)",
+07-Jul-2025,,1220,1225,1199,1201,900
+"""
+
+
+def write_csv(path, text=CSV):
+    path.write_text(text)
+    return str(path)
+
+
+def test_cached_load_matches_fresh_parse(tmp_path):
+    csv = write_csv(tmp_path / 'ABC-EQ.csv')
+    first = load_data(csv)
+    assert os.path.isfile(tmp_path / CACHE_DIR_NAME / 'ABC-EQ.csv.arrow')
+
+    cached = load_data(csv)
+    pd.testing.assert_frame_equal(cached, first)
+    pd.testing.assert_frame_equal(cached, load_data(csv, use_cache=False))
+    assert cached['Close'].iloc[1] == -1220.0
+
+
+def test_cache_is_not_reparsed_until_csv_changes(tmp_path, monkeypatch):
+    csv = write_csv(tmp_path / 'ABC-EQ.csv')
+    load_data(csv)
+
+    calls = []
+    parse = utility._parse_ohlc_csv
+    monkeypatch.setattr(utility, '_parse_ohlc_csv', lambda p: calls.append(p) or parse(p))
+    load_data(csv)
+    assert calls == []
+
+    # A rewritten CSV (new size and mtime) invalidates the cache
+    write_csv(tmp_path / 'ABC-EQ.csv', CSV.replace('1201,900', '1300,900'))
+    stat = os.stat(csv)
+    os.utime(csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    df = load_data(csv)
+    assert calls == [csv]
+    assert df['Close'].iloc[-1] == 1300.0
+
+
+def test_corrupt_cache_falls_back_to_csv(tmp_path):
+    csv = write_csv(tmp_path / 'ABC-EQ.csv')
+    load_data(csv)
+    (tmp_path / CACHE_DIR_NAME / 'ABC-EQ.csv.arrow').write_bytes(b'not arrow')
+    assert len(load_data(csv)) == 3
@@ -0,0 +1,50 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from app.service.database_manager import DatabaseManager, read_ohlcv_panel
+
+
+def make_frame(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    idx = pd.date_range('2024-01-01', periods=n, freq='D', tz='Asia/Kolkata')
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1,
+                         'Close': close, 'Volume': rng.integers(1, 1000, n)}, index=idx)
+
+
+def test_panel_matches_per_symbol_queries(tmp_path):
+    manager = DatabaseManager(str(tmp_path / 'market.db'))
+    symbols = ['TCS', 'INFY', 'ACC', 'WIPRO']
+    for i, symbol in enumerate(symbols):
+        manager.save_ohlcv_data(symbol, make_frame(40 + i * 7, i))
+    manager.save_ohlcv_data('TCS', make_frame(10, 9), interval='FIVE_MINUTE')
+
+    start = pd.Timestamp('2024-01-05').to_pydatetime()
+    panel = manager.get_ohlcv_panel(symbols + ['MISSING'], start=start)
+
+    assert list(panel) == symbols
+    for symbol in symbols:
+        expected = manager.get_ohlcv_data(symbol, from_date=start)
+        pd.testing.assert_frame_equal(panel[symbol], expected)
+    manager.close()
+
+
+def test_panel_frames_are_slices_of_one_block(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'stock.db'))
+    conn.execute('CREATE TABLE stock_data (symbol TEXT, datetime TEXT, open REAL, high REAL, '
+                 'low REAL, close REAL, volume INTEGER)')
+    rows = [(s, f'2024-01-{d:02d}T00:00:00+05:30', d, d + 1, d - 1, d, d * 10)
+            for s in ('B', 'A') for d in range(1, 21)]
+    conn.executemany('INSERT INTO stock_data VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+
+    panel = read_ohlcv_panel(conn, ['A', 'B'], start='2024-01-05', end='2024-01-10',
+                             table='stock_data', time_column='datetime', tz_naive=True)
+
+    assert list(panel) == ['A', 'B']
+    assert len(panel['A']) == 5 and panel['A'].index.tz is None
+    assert panel['A'].index[0] == pd.Timestamp('2024-01-05')
+    assert np.shares_memory(panel['A']['Close'].to_numpy(), panel['B']['Close'].to_numpy()) or \
+        panel['A']['Close'].to_numpy().base is not None
+    assert read_ohlcv_panel(conn, [], table='stock_data', time_column='datetime') == {}
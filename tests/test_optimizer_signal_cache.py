@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from app.model.signal import Signal
+from app.model.SignalType import SignalType
+from app.ui.optimizer import BacktestOptimizer
+
+
+class CountingSignalGenerator:
+    def __init__(self):
+        self.calls = []
+
+    def generate_signals(self, df, symbol):
+        self.calls.append(symbol)
+        return [
+            Signal(index=i, price=float(df['Close'].iat[i]), date=df.index[i], type=SignalType.BUY,
+                   symbol=symbol, color=None, inside_fvg=True, inside_sonar=False, fvg_alpha=0.3,
+                   signalStrength=0, source_strategy=['FVGOrderBlocks'])
+            for i in range(0, len(df), 2)
+        ]
+
+
+class FakeAgent:
+    def __init__(self, initial_capital, target_pct, stop_loss_pct, allocation_step, risk_reward_ratio=None):
+        self.initial_capital = initial_capital
+        self.stop_loss_pct = stop_loss_pct
+        self.allocation_step = allocation_step
+        self.max_winning_streak = 0
+        self.max_losing_streak = 0
+
+    def execute_signals(self, df, signals):
+        dates = [s.date for s in signals]
+        assert dates == sorted(dates)
+        self.final_pnl = len(signals) * self.stop_loss_pct * 100 + self.allocation_step
+        self.final_balance = self.initial_capital + self.final_pnl
+        return pd.DataFrame({'pnl': [self.final_pnl], 'cash_after': [self.final_balance]})
+
+
+def make_data():
+    idx = pd.date_range('2024-01-01', periods=6, freq='D')
+    return {
+        'AAA': pd.DataFrame({'Close': [10.0, 11, 12, 13, 14, 15]}, index=idx),
+        'BBB': pd.DataFrame({'Close': [20.0, 21, 22, 23, 24, 25]}, index=idx + pd.Timedelta(hours=1)),
+    }
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_signals_generated_once_per_symbol(max_workers):
+    generator = CountingSignalGenerator()
+    optimizer = BacktestOptimizer(make_data(), None, FakeAgent, generator)
+    param_ranges = {'stop_loss_pct': [0.02, 0.03, 0.04], 'allocation_step': [0.1, 0.2]}
+
+    results = optimizer.optimize(param_ranges, metric='total_pnl', max_workers=max_workers)
+
+    assert sorted(generator.calls) == ['AAA', 'BBB']
+    assert len(results) == 6
+    # 6 signals reach every combination
+    expected = {(sl, a): 6 * sl * 100 + a for sl in [0.02, 0.03, 0.04] for a in [0.1, 0.2]}
+    for _, row in results.iterrows():
+        assert row['total_pnl'] == pytest.approx(expected[(row['stop_loss_pct'], row['allocation_step'])])
+
+
+def test_single_backtest_without_cache_still_generates():
+    generator = CountingSignalGenerator()
+    optimizer = BacktestOptimizer(make_data(), None, FakeAgent, generator)
+
+    result = optimizer._run_single_backtest({'stop_loss_pct': 0.05})
+
+    assert sorted(generator.calls) == ['AAA', 'BBB']
+    assert result['total_pnl'] == pytest.approx(6 * 0.05 * 100 + 0.2)
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from app.agent.paper_trade_agent import PaperTradeAgent
+from app.model.OutcomeType import OutcomeType
+
+
+def test_simulate_exits_matches_per_entry_simulation():
+    rng = np.random.default_rng(4)
+    n = 400
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    df = pd.DataFrame(
+        {'Open': close, 'High': close + rng.random(n) * 2, 'Low': close - rng.random(n) * 2, 'Close': close},
+        index=pd.date_range('2024-01-01', periods=n, freq='D')
+    )
+    agent = PaperTradeAgent(target_pct=0.05, stop_loss_pct=0.03)
+
+    entries = list(range(0, n, 7))
+    for is_long in (True, False):
+        levels = [agent._calculate_exit_prices(df['Close'].iat[i], is_long) for i in entries]
+        batch = agent.simulate_exits(df, entries, [t for t, _ in levels], [s for _, s in levels], is_long)
+        single = [agent._simulate_exit(df, i, t, s, is_long) for i, (t, s) in zip(entries, levels)]
+        assert batch == single
+        assert {r[2] for r in batch} >= {OutcomeType.WIN, OutcomeType.LOSS}
@@ -0,0 +1,74 @@
+import os
+import shutil
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from app.agent.parallel_signals import generate_for_csv_groups, generate_for_db_symbols, merge_frames
+from app.agent.signal_generator import SignalGenerator
+from app.utility.utility import load_data
+
+BACKTEST_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'resource', 'backtest_data')
+
+
+def make_frame(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 2, n))
+    idx = pd.date_range('2023-01-02', periods=n, freq='D')
+    return pd.DataFrame({'Open': close + rng.normal(0, 1, n), 'High': close + 3, 'Low': close - 3,
+                         'Close': close, 'Volume': rng.integers(1, 1000, n)}, index=idx)
+
+
+def make_db(path, frames):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE stock_data (symbol TEXT, datetime TEXT, open REAL, high REAL, '
+                 'low REAL, close REAL, volume INTEGER)')
+    for symbol, df in frames.items():
+        rows = [(symbol, ts.isoformat(), o, h, l, c, int(v)) for ts, (o, h, l, c, v)
+                in zip(df.index, df[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy().tolist())]
+        conn.executemany('INSERT INTO stock_data VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+
+def test_db_workers_match_in_process_generation(tmp_path):
+    frames = {s: make_frame(300, i) for i, s in enumerate(['TCS', 'INFY', 'ACC', 'WIPRO', 'HDFC'])}
+    db = str(tmp_path / 'stock.db')
+    make_db(db, frames)
+    symbols = ['WIPRO', 'TCS', 'MISSING', 'ACC', 'INFY', 'HDFC']
+
+    calls = []
+    parallel = generate_for_db_symbols(symbols, db, max_workers=2, chunk_size=2,
+                                       progress=lambda done, total: calls.append((done, total)))
+    sequential = generate_for_db_symbols(symbols, db, max_workers=1)
+
+    assert [r.symbol for r in parallel] == ['WIPRO', 'TCS', 'ACC', 'INFY', 'HDFC']
+    assert calls[-1] == (6, 6) and len(calls) == 3
+    sg = SignalGenerator()
+    for p, s in zip(parallel, sequential):
+        pd.testing.assert_frame_equal(p.df, s.df)
+        assert p.signals == s.signals == sg.generate_from_file(s.df, s.symbol)
+    assert any(r.signals for r in parallel)
+
+
+def test_csv_groups_are_merged_per_security(tmp_path):
+    names = sorted(n for n in os.listdir(BACKTEST_DIR) if n.endswith('.csv'))
+    infy = [n for n in names if '-INFY-' in n][:2]
+    other = [n for n in names if '-INFY-' not in n][:1]
+    for name in infy + other:
+        shutil.copy(os.path.join(BACKTEST_DIR, name), tmp_path / name)
+    groups = {'INFY': [str(tmp_path / n) for n in infy], 'OTHER': [str(tmp_path / n) for n in other],
+              'BROKEN': [str(tmp_path / 'missing.csv')]}
+
+    parallel = generate_for_csv_groups(groups, max_workers=2)
+    sequential = generate_for_csv_groups(groups, max_workers=1)
+
+    assert [r.symbol for r in parallel] == ['BROKEN', 'INFY', 'OTHER']
+    assert parallel[0].df is None and parallel[0].warnings
+    expected = merge_frames([load_data(p) for p in groups['INFY']])
+    assert expected.index.is_monotonic_increasing and not expected.index.has_duplicates
+    for p, s in zip(parallel[1:], sequential[1:]):
+        pd.testing.assert_frame_equal(p.df, s.df)
+        assert p.signals == s.signals
+    pd.testing.assert_frame_equal(parallel[1].df, expected)
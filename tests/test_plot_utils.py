@@ -0,0 +1,64 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.collections import LineCollection, PathCollection, PolyCollection
+from types import SimpleNamespace
+
+from app.model.box import Box
+from app.utility.plot_utils import draw_boxes, draw_candlesticks, draw_signals, draw_temp_boxes
+
+
+def make_df(n=200):
+    rng = np.random.default_rng(5)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = close + rng.normal(0, 0.5, n)
+    index = pd.date_range('2025-01-01', periods=n, freq='D')
+    return pd.DataFrame({
+        'Open': open_, 'High': np.maximum(open_, close) + 1,
+        'Low': np.minimum(open_, close) - 1, 'Close': close,
+    }, index=index)
+
+
+def test_candles_draw_as_two_collections():
+    df = make_df()
+    fig, ax = plt.subplots()
+    draw_candlesticks(ax, df)
+
+    assert not ax.patches and not ax.lines
+    wicks, bodies = ax.collections
+    assert isinstance(wicks, LineCollection) and isinstance(bodies, PolyCollection)
+    assert len(wicks.get_segments()) == len(bodies.get_paths()) == len(df)
+
+    # Body of the first bar spans open..close around its date
+    x0 = matplotlib.dates.date2num(df.index[0])
+    verts = bodies.get_paths()[0].vertices
+    assert np.isclose(verts[:, 0].min(), x0 - 0.3) and np.isclose(verts[:, 0].max(), x0 + 0.3)
+    o, c = df['Open'].iat[0], df['Close'].iat[0]
+    assert np.isclose(verts[:, 1].min(), min(o, c)) and np.isclose(verts[:, 1].max(), max(o, c))
+    plt.close(fig)
+
+
+def test_boxes_and_signals_are_batched():
+    df = make_df(50)
+    dates = list(df.index)
+    boxes = [Box(left=i, right=i + 5, top=110.0, bottom=100.0, box_type='bull', bg_color='#00ff00', border_color='#008800', percent=1.5) for i in range(0, 40, 4)]
+    temp = [Box(left=3, right=60, top=105.0, bottom=101.0, box_type='temp_bull', alpha=0.3), Box(left=-1, right=4, top=1.0, bottom=0.0, box_type='temp_bull')]
+    signals = [
+        SimpleNamespace(index=i, price=100.0, type='bull', color=None, symbol=None) for i in range(10)
+    ] + [SimpleNamespace(index=20, price=99.0, type='bear', color=None, symbol='S')]
+
+    fig, ax = plt.subplots()
+    draw_boxes(ax, boxes, dates)
+    draw_temp_boxes(ax, temp, dates)
+    draw_signals(ax, signals, dates)
+
+    polys = [c for c in ax.collections if isinstance(c, PolyCollection)]
+    assert [len(p.get_paths()) for p in polys] == [len(boxes), 1]
+    markers = [c for c in ax.collections if isinstance(c, PathCollection)]
+    assert len(markers) == 1 and len(markers[0].get_offsets()) == 10
+    # Percent labels plus the one labelled signal
+    assert len(ax.texts) == len(boxes) + 1
+    plt.close(fig)
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.agent.signal_strength import check_fvg_inclusion, check_inclusions_batch, check_sonar_inclusion
+from app.model.box import Box, BoxType
+from app.model.box_table import BoxTable
+from app.model.portfolio import Position
+from app.model.signal import Signal
+from app.model.signal_batch import SignalBatch
+from app.model.timestamps import NAT_NS
+from app.strategy.fvgorderblocks import FVGOrderBlocks
+from app.strategy.sonarlaplaceorderblocks import SonarlaplaceOrderBlocks
+
+
+def make_signal(index, price, date, strength=1, alpha=None):
+    return Signal(index=index, price=price, date=date, type='buy', symbol='TEST', color=None,
+                  inside_fvg=alpha is not None, inside_sonar=False, fvg_alpha=alpha,
+                  signalStrength=strength, source_strategy=['test'])
+
+
+def test_models_are_slotted():
+    position = Position('TEST', 1, 100.0, None, 0, 100.0, 97.0, 107.0, 1)
+    assert position.exit_date is None and position.is_long
+    with pytest.raises(AttributeError):
+        position.unknown = 1
+    assert not hasattr(make_signal(0, 1.0, None), '__dict__')
+
+
+def test_signal_batch_columns_and_views():
+    t = pd.Timestamp('2024-01-02 09:15')
+    signals = [make_signal(5, 10.0, t, 2, 0.5), make_signal(1, 20.0, None), make_signal(3, 30.0, t - pd.Timedelta('1D'))]
+    batch = SignalBatch.from_signals(signals)
+
+    assert batch.data['index'].tolist() == [5, 1, 3]
+    assert batch.data['time_ns'][1] == NAT_NS
+    assert np.isnan(batch.data['fvg_alpha'][1]) and batch.data['fvg_alpha'][0] == 0.5
+    assert batch[0] is signals[0]
+    ordered = batch[batch.time_order()]
+    assert ordered.to_signals() == [signals[1], signals[2], signals[0]]
+    assert ordered[ordered.data['strength'] > 1].to_signals() == [signals[0]]
+
+
+def test_box_table_matches_contains_point():
+    rng = np.random.default_rng(2)
+    boxes = []
+    for _ in range(40):
+        left = int(rng.integers(0, 80))
+        bottom = float(rng.uniform(90, 110))
+        boxes.append(Box(left, left + int(rng.integers(0, 30)), bottom + float(rng.uniform(0, 5)), bottom, BoxType.BULL))
+    idx = rng.integers(0, 110, 500)
+    price = rng.uniform(85, 120, 500)
+
+    hits = BoxTable.from_boxes(boxes).first_containing(idx, price)
+    for i, p, hit in zip(idx.tolist(), price.tolist(), hits.tolist()):
+        expected = next((k for k, b in enumerate(boxes) if b.contains_point(i, p)), -1)
+        assert hit == expected
+
+
+def test_batch_inclusion_matches_per_signal_checks():
+    rng = np.random.default_rng(9)
+    n = 300
+    close = 100 + np.cumsum(rng.normal(0, 1.2, n))
+    df = pd.DataFrame({'Open': close, 'High': close + rng.random(n) * 2, 'Low': close - rng.random(n) * 2,
+                       'Close': close + rng.normal(0, 0.5, n)},
+                      index=pd.date_range('2024-01-01', periods=n, freq='D'))
+    fvg, sonar = FVGOrderBlocks(), SonarlaplaceOrderBlocks()
+    fvg.run(df)
+    sonar.run(df)
+
+    idx = rng.integers(0, n, 400)
+    price = rng.uniform(close.min(), close.max(), 400)
+    is_buy = rng.random(400) < 0.5
+    inside_fvg, fvg_alpha, inside_sonar = check_inclusions_batch(idx, price, is_buy, fvg, sonar)
+    for k in range(400):
+        args = (int(idx[k]), float(price[k]), bool(is_buy[k]))
+        assert (inside_fvg[k], fvg_alpha[k]) == check_fvg_inclusion(*args, fvg)
+        assert inside_sonar[k] == check_sonar_inclusion(*args, sonar)
@@ -37,3 +37,40 @@ def test_to_dataframe_and_date_present():
     if not df_out.empty:
         assert pd.api.types.is_datetime64_any_dtype(df_out['date'])
 
+
+
+def make_walk(n, seed):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 2, n))
+    idx = pd.date_range('2023-01-02', periods=n, freq='D')
+    return pd.DataFrame({'Open': close + rng.normal(0, 1, n), 'High': close + 3,
+                         'Low': close - 3, 'Close': close}, index=idx)
+
+
+def test_shared_generator_is_safe_across_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    frames = {f'S{i}': make_walk(300, i) for i in range(6)}
+    sg = SignalGenerator()
+    expected = {s: sg.generate_from_file(df, s) for s, df in frames.items()}
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        results = dict(zip(frames, executor.map(lambda s: sg.generate_from_file(frames[s], s), frames)))
+
+    assert results == expected
+    assert any(expected.values())
+
+
+def test_pipeline_returns_box_snapshot_and_config_pickles():
+    import pickle
+    from app.agent.signal_generator import SignalConfig, run_signal_pipeline
+
+    config = SignalConfig(dark_alpha_threshold=0.5, fvg_params={'box_amount': 3})
+    assert pickle.loads(pickle.dumps(config)) == config
+
+    df = make_walk(300, 1)
+    result = run_signal_pipeline(df, 'TEST', config)
+    assert result.signals == SignalGenerator(config=config).generate_from_file(df, 'TEST')
+    assert len(result.boxes.fvg_bull) <= 3 and len(result.boxes.fvg_bear) <= 3
+    assert isinstance(result.boxes.sonar_long, tuple)
@@ -0,0 +1,146 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app.agent.signal_generator as signal_generator
+import app.service.signal_store as signal_store
+from app.agent.signal_generator import SignalConfig, SignalGenerator
+from app.service.signal_store import SignalStore, data_fingerprint, infer_interval
+
+
+def make_df(n=120):
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(0, 1.5, n))
+    return pd.DataFrame({
+        'Open': close + rng.normal(0, 0.5, n),
+        'High': close + 2,
+        'Low': close - 2,
+        'Close': close,
+        'Volume': 1000,
+    }, index=pd.bdate_range('2024-01-01', periods=n))
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    calls = []
+    pipeline = signal_generator.run_signal_pipeline
+
+    def counting(df, file_name, *args, **kwargs):
+        calls.append(file_name)
+        return pipeline(df, file_name, *args, **kwargs)
+
+    monkeypatch.setattr(signal_generator, 'run_signal_pipeline', counting)
+    return calls
+
+
+def test_repeated_run_is_served_from_store(tmp_path, runs):
+    store = SignalStore(str(tmp_path / 'signals.db'))
+    df = make_df()
+
+    first = SignalGenerator(store=store).generate_with_boxes(df, 'INFY')
+    # A fresh generator (e.g. a new process) over the same file hits the cache
+    second = SignalGenerator(store=SignalStore(store.path)).generate_with_boxes(df.copy(), 'INFY')
+
+    assert runs == ['INFY']
+    assert [(s.index, s.price, s.signalStrength) for s in second.signals] == \
+        [(s.index, s.price, s.signalStrength) for s in first.signals]
+    assert len(second.boxes.fvg_bull) == len(first.boxes.fvg_bull)
+    assert infer_interval(df) == 'ONE_DAY'
+
+
+def test_keys_do_not_depend_on_index_resolution():
+    df = make_df()
+    us = df.set_axis(df.index.as_unit('us'))
+    ns = df.set_axis(df.index.as_unit('ns'))
+    assert infer_interval(us) == infer_interval(ns) == 'ONE_DAY'
+    assert data_fingerprint(us) == data_fingerprint(ns)
+    minutes = df.set_axis(pd.date_range('2024-01-01 09:15', periods=len(df), freq='5min', unit='us'))
+    assert infer_interval(minutes) == '5_MINUTE'
+
+
+def test_new_bars_and_new_settings_miss(tmp_path, runs):
+    store = SignalStore(str(tmp_path / 'signals.db'), max_runs=1)
+    df = make_df()
+    sg = SignalGenerator(store=store)
+    sg.generate_from_file(df.iloc[:-1], 'INFY')
+
+    sg.generate_from_file(df, 'INFY')
+    assert runs == ['INFY', 'INFY']
+    # With max_runs=1 the entry for the shorter series was replaced
+    assert len(store) == 1
+
+    SignalGenerator(config=SignalConfig(dark_alpha_threshold=0.6), store=store).generate_from_file(df, 'INFY')
+    assert len(runs) == 3 and len(store) == 2
+
+    sg.generate_from_file(df, 'INFY')
+    assert len(runs) == 3
+
+
+def test_files_of_one_symbol_do_not_evict_each_other(tmp_path, runs):
+    store = SignalStore(str(tmp_path / 'signals.db'), max_runs=2)
+    df = make_df()
+    sg = SignalGenerator(store=store)
+    first, second, third = df.iloc[:80], df.iloc[20:100], df.iloc[40:]
+
+    for frame in (first, second, first, second):
+        sg.generate_from_file(frame, 'INFY')
+    assert len(runs) == 2 and len(store) == 2
+
+    # A third range evicts the oldest stored one
+    sg.generate_from_file(third, 'INFY')
+    sg.generate_from_file(second, 'INFY')
+    assert len(runs) == 3 and len(store) == 2
+    sg.generate_from_file(first, 'INFY')
+    assert len(runs) == 4
+
+
+def test_persistence_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.delenv(signal_store.STORE_PATH_ENV, raising=False)
+    signal_store.reset_signal_store()
+    assert signal_store.get_signal_store() is None
+
+    monkeypatch.setenv(signal_store.STORE_PATH_ENV, str(tmp_path / 'env.db'))
+    assert signal_store.get_signal_store().path == str(tmp_path / 'env.db')
+
+    signal_store.configure_signal_store(str(tmp_path / 'cli.db'))
+    assert signal_store.get_signal_store().path == str(tmp_path / 'cli.db')
+    signal_store.reset_signal_store()
+
+
+def test_appended_bars_resume_from_checkpoint(tmp_path, monkeypatch):
+    store = SignalStore(str(tmp_path / 'signals.db'))
+    df = make_df(400)
+    SignalGenerator(store=store).generate_from_file(df.iloc[:380], 'INFY')
+    expected = signal_generator.run_signal_pipeline(df, 'INFY')
+
+    full_runs = []
+    run_all = signal_generator.run_all_strategies
+    monkeypatch.setattr(signal_generator, 'run_all_strategies',
+                        lambda strategies, data: full_runs.append(len(data)) or run_all(strategies, data))
+
+    resumed = SignalGenerator(store=SignalStore(store.path)).generate_with_boxes(df, 'INFY')
+    assert full_runs == []
+
+    assert [(s.index, s.price, s.signalStrength) for s in resumed.signals] == \
+        [(s.index, s.price, s.signalStrength) for s in expected.signals]
+    assert resumed.boxes == expected.boxes
+
+    # A corrected historical bar no longer matches the checkpoint
+    df.iloc[10, df.columns.get_loc('Close')] += 1
+    SignalGenerator(store=store).generate_from_file(df, 'INFY')
+    assert full_runs == [400]
+
+
+def test_generator_with_store_pickles(tmp_path, runs):
+    # Spawn/forkserver process pools pickle the generator into every worker
+    store = SignalStore(str(tmp_path / 'signals.db'))
+    df = make_df()
+    SignalGenerator(store=store).generate_with_boxes(df, 'INFY')
+
+    clone = pickle.loads(pickle.dumps(SignalGenerator(store=store)))
+    assert clone.store.path == store.path
+    assert len(clone.store) == 1
+    clone.generate_with_boxes(df, 'INFY')
+    assert runs == ['INFY']
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.strategy.sonar_kernel import _first_crossing_numpy, expand_ranges, first_candle_before
+from app.strategy.sonarlaplaceorderblocks import SonarlaplaceOrderBlocks
+
+
+def make_walk(n=1500, seed=0, vol=1.0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, vol, n))
+    open_ = close + rng.normal(0, vol / 2, n)
+    high = np.maximum(open_, close) + rng.random(n)
+    low = np.minimum(open_, close) - rng.random(n)
+    return pd.DataFrame(
+        {'Open': open_, 'High': high, 'Low': low, 'Close': close},
+        index=pd.date_range('2024-01-01', periods=n, freq='15min')
+    )
+
+
+def snapshot(strategy):
+    boxes = [b.to_dict() for b in strategy.long_boxes + strategy.short_boxes]
+    signals = [(s.index, s.type, s.price, s.symbol, s.color) for s in strategy.signals]
+    return boxes, signals
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('mitigation', ['Close', 'Wick'])
+@pytest.mark.parametrize('sensitivity', [5, 28])
+def test_kernel_matches_reference_loop(seed, mitigation, sensitivity):
+    df = make_walk(seed=seed)
+    ref = SonarlaplaceOrderBlocks(sensitivity=sensitivity, OBMitigationType=mitigation, use_kernel=False)
+    fast = SonarlaplaceOrderBlocks(sensitivity=sensitivity, OBMitigationType=mitigation, use_kernel=True)
+    ref.run(df)
+    fast.run(df)
+
+    assert snapshot(fast) == snapshot(ref)
+    assert len(ref.signals) > 0
+
+
+@pytest.mark.parametrize('buy_alert, sell_alert', [(True, False), (False, True)])
+def test_kernel_respects_alert_flags(buy_alert, sell_alert):
+    df = make_walk(seed=4)
+    ref = SonarlaplaceOrderBlocks(buy_alert=buy_alert, sell_alert=sell_alert, use_kernel=False)
+    fast = SonarlaplaceOrderBlocks(buy_alert=buy_alert, sell_alert=sell_alert)
+    ref.run(df)
+    fast.run(df)
+
+    assert snapshot(fast) == snapshot(ref)
+
+
+def test_kernel_handles_missing_prices():
+    df = make_walk(n=600, seed=5)
+    df.iloc[100:104] = np.nan
+    df.iloc[300, df.columns.get_loc('Open')] = np.nan
+    ref = SonarlaplaceOrderBlocks(use_kernel=False)
+    fast = SonarlaplaceOrderBlocks()
+    ref.run(df)
+    fast.run(df)
+
+    assert snapshot(fast) == snapshot(ref)
+
+
+def test_numpy_first_crossing_fallback():
+    values = np.array([1.0, np.nan, 3.0, 0.5, 7.0] * 50)
+    assert _first_crossing_numpy(values, 0, 2.0, above=True) == 2
+    assert _first_crossing_numpy(values, 3, 2.0, above=True) == 4
+    assert _first_crossing_numpy(values, 0, 0.8, above=False) == 3
+    assert _first_crossing_numpy(values, 0, 100.0, above=True) == len(values)
+
+
+def test_first_candle_before_picks_nearest_offset():
+    mask = np.zeros(40, dtype=bool)
+    mask[[3, 10, 12]] = True
+    idxs = np.array([2, 16, 20, 30, 35])
+    assert first_candle_before(mask, idxs).tolist() == [-1, 12, 12, -1, -1]
+
+
+def test_expand_ranges():
+    owners, positions = expand_ranges(np.array([2, 5, 9]), np.array([4, 5, 11]))
+    assert owners.tolist() == [0, 0, 2, 2]
+    assert positions.tolist() == [2, 3, 9, 10]
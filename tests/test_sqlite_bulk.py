@@ -0,0 +1,69 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from app.service.database_manager import DatabaseManager
+from app.service.sqlite_bulk import bulk_insert, ohlcv_rows, timestamp_strings
+
+
+def make_ohlcv(n=50, tz=None):
+    idx = pd.date_range('2024-01-01 09:15', periods=n, freq='min', tz=tz)
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        'Open': close,
+        'High': close + 1,
+        'Low': close - 1,
+        'Close': close,
+        'Volume': rng.integers(1, 10_000, n),
+    }, index=idx)
+
+
+def test_timestamp_strings_match_isoformat():
+    for idx in [
+        pd.date_range('2024-01-01 09:15', periods=10, freq='min', tz='Asia/Kolkata'),
+        pd.date_range('2024-03-09', periods=48, freq='h', tz='America/New_York'),
+        pd.date_range('2024-01-01', periods=5, freq='D'),
+        pd.DatetimeIndex(['2024-01-01 00:00:00.25']),
+        # Microsecond unit with stamps on whole multiples of 1000 s
+        pd.date_range('2024-01-01 13:30', periods=3, freq='1000s', tz='Asia/Kolkata', unit='us'),
+    ]:
+        assert timestamp_strings(idx) == [ts.isoformat(' ') for ts in idx]
+    assert timestamp_strings(['2024-01-01T09:15:00+05:30']) == ['2024-01-01T09:15:00+05:30']
+
+
+def test_ohlcv_rows_are_python_scalars():
+    df = make_ohlcv(3)
+    rows = ohlcv_rows('ABC', timestamp_strings(df.index), df,
+                      ('Open', 'High', 'Low', 'Close', 'Volume'), 'ONE_MINUTE')
+    assert len(rows) == 3
+    assert rows[0][0] == 'ABC' and rows[0][-1] == 'ONE_MINUTE'
+    assert all(type(v) is float for v in rows[0][2:6])
+    assert type(rows[0][6]) is int
+
+
+def test_bulk_insert_rolls_back_on_error():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE t (a INTEGER PRIMARY KEY, b TEXT NOT NULL)')
+    try:
+        bulk_insert(conn, 'INSERT INTO t VALUES (?, ?)', [(1, 'x'), (2, None)])
+    except sqlite3.IntegrityError:
+        pass
+    assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+
+
+def test_save_ohlcv_data_round_trip(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'market.db'))
+    df = make_ohlcv(200, tz='Asia/Kolkata')
+    db.save_ohlcv_data('ABC', df, interval='ONE_MINUTE')
+    # Saving again replaces instead of duplicating
+    db.save_ohlcv_data('ABC', df, interval='ONE_MINUTE')
+
+    out = db.get_ohlcv_data('ABC', interval='ONE_MINUTE')
+    db.close()
+
+    assert len(out) == len(df)
+    np.testing.assert_array_equal(out['Close'].to_numpy(), df['Close'].to_numpy())
+    np.testing.assert_array_equal(out['Volume'].to_numpy(), df['Volume'].to_numpy())
+    assert (out.index == df.index).all()
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.strategy.fvgorderblocks import FVGOrderBlocks
+from app.strategy.sonarlaplaceorderblocks import SonarlaplaceOrderBlocks
+from app.strategy.strategy import Strategy
+
+
+def make_walk(n=700, seed=11):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1.5, n))
+    open_ = close + rng.normal(0, 1.0, n)
+    high = np.maximum(open_, close) + rng.random(n)
+    low = np.minimum(open_, close) - rng.random(n)
+    return pd.DataFrame(
+        {'Open': open_, 'High': high, 'Low': low, 'Close': close},
+        index=pd.date_range('2024-01-01', periods=n, freq='15min')
+    )
+
+
+def fvg_state(s):
+    boxes = [b.to_dict() for b in s.bull_boxes + s.bear_boxes + s.temp_boxes]
+    return boxes, [(x.index, x.type, x.price, x.fvg_alpha) for x in s.signals]
+
+
+def sonar_state(s):
+    boxes = [b.to_dict() for b in s.long_boxes + s.short_boxes]
+    return boxes, [(x.index, x.type, x.price) for x in s.signals]
+
+
+@pytest.mark.parametrize('make, state', [
+    (lambda: FVGOrderBlocks(filter_gap=0.2, show_signal=True, box_amount=8), fvg_state),
+    (lambda: FVGOrderBlocks(filter_gap=0.2, show_signal=True, show_broken=True), fvg_state),
+    (lambda: SonarlaplaceOrderBlocks(), sonar_state),
+    (lambda: SonarlaplaceOrderBlocks(OBMitigationType="Wick"), sonar_state),
+])
+def test_update_matches_batch_run_on_prefix(make, state):
+    df = make_walk()
+    streaming = make()
+    emitted = []
+    checkpoints = {5, 60, 250, len(df)}
+
+    for k, (_, row) in enumerate(df.iterrows(), start=1):
+        emitted.extend(streaming.update(row))
+        if k in checkpoints:
+            batch = make()
+            batch.run(df.iloc[:k])
+            assert state(streaming) == state(batch)
+
+    assert emitted == streaming.get_signals()
+    assert len(emitted) > 0
+
+
+def test_on_bar_accepts_tuples_and_run_resets_stream():
+    df = make_walk(n=120)
+    s = FVGOrderBlocks(filter_gap=0.2, show_signal=True)
+    for row in df[['Open', 'High', 'Low', 'Close']].itertuples(index=False):
+        s.on_bar(tuple(row))
+    streamed = fvg_state(s)
+
+    s.run(df)
+    assert fvg_state(s) == streamed
+
+    # A new stream after run() starts from scratch
+    s.update(df.iloc[0])
+    assert s.signals == [] and s.bull_boxes == [] and s.bear_boxes == []
+
+
+@pytest.mark.parametrize('make, state', [
+    (lambda: FVGOrderBlocks(filter_gap=0.2, show_signal=True, box_amount=8), fvg_state),
+    (lambda: SonarlaplaceOrderBlocks(), sonar_state),
+    (lambda: SonarlaplaceOrderBlocks(OBMitigationType="Wick"), sonar_state),
+])
+def test_primed_run_continues_with_updates(make, state):
+    df = make_walk()
+    resumed = make()
+    resumed.run(df.iloc[:650])
+    resumed.prime_updates(df.iloc[:650])
+    for row in df.iloc[650:][['Open', 'High', 'Low', 'Close']].itertuples(index=False):
+        resumed.update(tuple(row))
+
+    full = make()
+    full.run(df)
+    assert state(resumed) == state(full)
+    assert resumed.supports_resume(len(df))
+
+
+def test_strategies_must_implement_incremental_updates():
+    class BatchOnly(Strategy):
+        def run(self, df):
+            pass
+
+        def get_signals(self):
+            return []
+
+        def plot(self, df, title="", ax=None):
+            pass
+
+    with pytest.raises(TypeError, match='update'):
+        BatchOnly()
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from app.model.timestamps import (
+    EXCHANGE_TZ, MINUTE_NS, NAT_NS, epoch_ns, epoch_ns_array, exchange_day, exchange_time_of_day, normalize_index
+)
+
+
+def test_normalize_index_converts_mixed_offsets_to_exchange_tz():
+    index = normalize_index(['2024-01-01 09:15:00+05:30', '2024-01-01 03:50:00+00:00', 'garbage'])
+    assert str(index.tz) == EXCHANGE_TZ
+    assert index.dtype.unit == 'ns'
+    assert list(index[:2].strftime('%H:%M')) == ['09:15', '09:20']
+    assert pd.isna(index[2])
+
+
+def test_epoch_ns_agrees_for_naive_and_aware_input():
+    naive = pd.date_range('2024-03-01 09:15', periods=5, freq='5min')
+    aware = naive.tz_localize(EXCHANGE_TZ).as_unit('ns')
+    np.testing.assert_array_equal(epoch_ns_array(naive), aware.asi8)
+    np.testing.assert_array_equal(epoch_ns_array(aware.tz_convert('UTC')), aware.asi8)
+    assert epoch_ns(naive[0]) == epoch_ns(str(aware[0])) == aware[0].value
+    assert epoch_ns(None) is None and epoch_ns(pd.NaT) is None
+    assert epoch_ns_array(pd.Series(['2024-03-01', None]))[1] == NAT_NS
+
+
+def test_day_and_time_of_day_are_exchange_local():
+    ns = epoch_ns(pd.Timestamp('2024-03-01 15:30', tz=EXCHANGE_TZ))
+    assert exchange_time_of_day(ns) // MINUTE_NS == 15 * 60 + 30
+    # 00:15 IST is still the previous day in UTC
+    early = epoch_ns(pd.Timestamp('2024-03-02 00:15'))
+    assert exchange_day(early) == exchange_day(ns) + 1
+    assert exchange_day(ns) == pd.Timestamp('2024-03-01').value // (24 * 60 * MINUTE_NS)
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from app.agent.signal_generator import SignalGenerator
+from app.model.ledger import Ledger, TradeLedger
+from app.model.OutcomeType import OutcomeType
+from app.model.signal import Signal
+from app.model.SignalType import SignalType
+from app.model.trade import SignalStrength, Trade
+
+
+def make_trade(i, tz=None):
+    entry = pd.Timestamp('2024-01-01', tz=tz) + pd.Timedelta(days=i)
+    return Trade(i, entry, entry + pd.Timedelta(days=2), SignalType.BUY, 100.0, 107.0, 10, 70.0 - i,
+                 'TEST', OutcomeType.WIN, SignalStrength(2), 1000.0, 1070.0)
+
+
+def as_rows(trades):
+    # The per-trade dict conversion the ledger replaces
+    return pd.DataFrame([{
+        'entry_index': t.entry_index, 'entry_date': t.entry_date, 'exit_date': t.exit_date,
+        'side': t.side.value, 'entry_price': t.entry_price, 'exit_price': t.exit_price,
+        'shares': t.shares, 'pnl': t.pnl, 'security': t.security, 'outcome': t.outcome.value,
+        'signalStrength': t.signalStrength.value, 'cash_before': t.cash_before, 'cash_after': t.cash_after,
+        'money_allocated': t.money_allocated, 'lockin_period': t.lockin_period
+    } for t in trades])
+
+
+def test_trade_ledger_grows_and_matches_row_conversion():
+    for tz in (None, 'Asia/Kolkata'):
+        trades = [make_trade(i, tz) for i in range(150)]
+        ledger = TradeLedger(capacity=4)
+        for trade in trades:
+            ledger.append(trade)
+
+        assert len(ledger) == 150 and list(ledger) == trades and ledger[-1] is trades[-1]
+        df = ledger.to_dataframe()
+        pd.testing.assert_frame_equal(df, as_rows(trades), check_dtype=False)
+        assert str(df['entry_date'].dt.tz) == str(tz)
+
+
+def test_numeric_columns_keep_the_source_dtype():
+    # Integer capital and prices stay int64 like the row conversion; any float makes the column float64
+    trades = [Trade(i, pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-03'), SignalType.BUY, 100, 107, 10,
+                    70, 'TEST', OutcomeType.WIN, SignalStrength(2), 1000, 1070 if i else 1070.5)
+              for i in range(3)]
+    ledger = TradeLedger()
+    for trade in trades:
+        ledger.append(trade)
+    df, expected = ledger.to_dataframe(), as_rows(trades)
+    numeric = ['entry_price', 'exit_price', 'pnl', 'cash_before', 'cash_after', 'money_allocated']
+    assert df[numeric].dtypes.tolist() == expected[numeric].dtypes.tolist()
+    assert str(df['cash_before'].dtype) == 'int64' and str(df['cash_after'].dtype) == 'float64'
+    assert df['cash_after'].tolist() == [1070.5, 1070.0, 1070.0]
+
+
+def test_export_shares_the_ledger_buffers():
+    ledger = TradeLedger()
+    for i in range(10):
+        ledger.append(make_trade(i))
+    df = ledger.to_dataframe()
+    assert np.shares_memory(df['pnl'].to_numpy(), ledger.column('pnl'))
+    assert np.shares_memory(df['shares'].to_numpy(), ledger.column('shares'))
+    assert ledger.to_arrow().num_rows == 10
+    assert TradeLedger().to_dataframe().empty
+
+
+def test_unstorable_value_falls_back_to_object_column():
+    ledger = Ledger([('n', 'int'), ('when', 'datetime'), ('x', 'float'), ('m', 'number')])
+    ledger.append_row('a', (1, pd.Timestamp('2024-01-01'), None, 3))
+    ledger.append_row('b', (None, pd.Timestamp('2024-01-02', tz='UTC'), 2.5, None))
+    df = ledger.to_dataframe()
+    assert df['n'].tolist() == [1, None]
+    assert df['when'].tolist() == [pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-02', tz='UTC')]
+    assert np.isnan(df['x'].iloc[0]) and df['x'].iloc[1] == 2.5
+    assert df['m'].dtype == np.float64 and df['m'].iloc[0] == 3 and np.isnan(df['m'].iloc[1])
+
+
+def test_signal_dataframe_columns():
+    dates = pd.date_range('2024-01-01', periods=3, freq='D')
+    signals = [Signal(i, 100.0 + i, dates[i], 'bullish', 'TEST', None, True, False, 0.5, 2, ['fvg'])
+               for i in range(3)]
+    df = SignalGenerator().to_dataframe(signals)
+    assert df['type'].tolist() == ['buy'] * 3
+    assert df['source_strategy'].tolist() == ['fvg'] * 3
+    assert pd.api.types.is_datetime64_any_dtype(df['date'])
+    assert list(SignalGenerator().to_dataframe([]).columns)[:3] == ['date', 'index', 'price']